@@ -0,0 +1,48 @@
+"""
+Admin pages for core diagnostics.
+"""
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import Http404
+from django.shortcuts import render
+
+from .slowlog import get_slow_request, slow_requests
+
+
+def slow_requests_view(request):
+    """Slowest traced requests; ``?id=`` shows one trace in full."""
+    context = {
+        **admin.site.each_context(request),
+        "title": "Slow requests",
+        "threshold_ms": settings.SLOW_REQUEST_THRESHOLD_MS,
+        "sample_rate": settings.SLOW_REQUEST_SAMPLE_RATE,
+    }
+    trace_id = request.GET.get("id")
+    if trace_id:
+        try:
+            context["trace"] = get_slow_request(trace_id)
+        except LookupError:
+            raise Http404("Trace not found")
+        return render(request, "admin/slow_requests.html", context)
+
+    try:
+        min_ms = float(request.GET["min_ms"]) if request.GET.get("min_ms") else None
+    except ValueError:
+        min_ms = None
+    context["filters"] = {
+        "reason": request.GET.get("reason", ""),
+        "path": request.GET.get("path", ""),
+        "min_ms": request.GET.get("min_ms", ""),
+    }
+    context["requests"] = slow_requests(
+        limit=200,
+        reason=context["filters"]["reason"] or None,
+        path=context["filters"]["path"] or None,
+        min_ms=min_ms,
+    )
+    for entry in context["requests"]:
+        entry["recorded"] = datetime.fromtimestamp(entry["recorded_at"], timezone.utc)
+    return render(request, "admin/slow_requests.html", context)
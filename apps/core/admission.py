@@ -0,0 +1,221 @@
+"""
+Adaptive admission control for expensive endpoints.
+
+Expensive views are tagged with an endpoint class (``admission_controlled``)
+and the costly, uncached part of their work runs inside ``admit()``. Each
+class has an AIMD concurrency limiter per process, configured in
+``ADMISSION_LIMITS``: every admitted call reports its latency, and the limit
+grows by about one per window of calls that finish within ``target_ms`` and
+shrinks by ``backoff`` when they take longer. A call over the limit raises
+``Overloaded`` at once instead of queueing; callers may fall back to stale
+results, otherwise the view answers ``503`` with ``Retry-After``.
+
+Cache hits never enter a limiter, and endpoints without a class are never
+limited. A view doing several units of work per request (bulk) serves its
+cached units first and admits the uncached rest once, so it is never shed
+halfway through. Keep each ``max_limit`` below the worker's thread count so
+cheap requests always find a free thread. Limiter state is reported by
+``/api/stats/``.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+_endpoint_class: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "admission_endpoint_class", default=None
+)
+_admitted: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "admission_admitted", default=False
+)
+
+
+class Overloaded(Exception):
+    """An endpoint class is at its concurrency limit."""
+
+    def __init__(self, endpoint_class: str, retry_after: int):
+        super().__init__(f"{endpoint_class} is at its concurrency limit")
+        self.endpoint_class = endpoint_class
+        self.retry_after = retry_after
+
+
+class AIMDLimiter:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease."""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        target_ms: float,
+        backoff: float = 0.9,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_ms = target_ms
+        self.backoff = backoff
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.served_stale = 0
+        self.latency_ms: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency_ms: float) -> None:
+        with self._lock:
+            in_use = self.in_flight
+            self.in_flight -= 1
+            self.latency_ms = (
+                latency_ms
+                if self.latency_ms is None
+                else self.latency_ms + self.EWMA_ALPHA * (latency_ms - self.latency_ms)
+            )
+            now = time.monotonic()
+            if latency_ms > self.target_ms:
+                # One decrease per target interval: the calls finishing right
+                # after a decrease started under the old limit.
+                if now - self._last_decrease >= self.target_ms / 1000:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            elif in_use * 2 >= self.limit:
+                # Only grow while the limit is actually being used.
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def note_stale(self) -> None:
+        with self._lock:
+            self.served_stale += 1
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: about one call's latency."""
+        return max(1, math.ceil((self.latency_ms or 0) / 1000))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "served_stale": self.served_stale,
+                "latency_ms": (
+                    round(self.latency_ms, 3) if self.latency_ms is not None else None
+                ),
+                "target_ms": self.target_ms,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+            }
+
+
+_limiters: Dict[str, AIMDLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> AIMDLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AIMDLimiter(name, **settings.ADMISSION_LIMITS[name])
+            _limiters[name] = limiter
+        return limiter
+
+
+def admission_stats() -> Dict[str, Any]:
+    """Limiter state per endpoint class of this process."""
+    return {
+        "enabled": settings.ADMISSION_CONTROL,
+        "limiters": {
+            name: get_limiter(name).stats() for name in settings.ADMISSION_LIMITS
+        },
+    }
+
+
+def reset_limiters() -> None:
+    """Forget limiter state (tests)."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+@contextmanager
+def admit(items: int = 1):
+    """
+    Run the enclosed block under the current endpoint class's limiter.
+
+    Raises ``Overloaded`` when the class is at its limit. A no-op outside an
+    ``admission_controlled`` view, with ``ADMISSION_CONTROL`` off, or inside
+    a block that was already admitted. A block doing ``items`` units of work
+    holds one slot and reports the latency per item, so large batches do not
+    read as overload.
+    """
+    name = _endpoint_class.get()
+    if name is None or not settings.ADMISSION_CONTROL or _admitted.get():
+        yield
+        return
+    limiter = get_limiter(name)
+    if not limiter.try_acquire():
+        raise Overloaded(name, limiter.retry_after())
+    token = _admitted.set(True)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _admitted.reset(token)
+        limiter.release((time.perf_counter() - start) * 1000 / max(1, items))
+
+
+def record_stale() -> None:
+    """Count a request answered from stale results because of the limit."""
+    name = _endpoint_class.get()
+    if name is not None:
+        get_limiter(name).note_stale()
+
+
+def admission_controlled(endpoint_class: str):
+    """
+    Decorate a DRF view handler: work it does inside ``admit()`` counts
+    against ``endpoint_class``, and ``Overloaded`` becomes a ``503``.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            token = _endpoint_class.set(endpoint_class)
+            try:
+                return view_method(self, request, *args, **kwargs)
+            except Overloaded as exc:
+                return Response(
+                    {
+                        "success": False,
+                        "error": "Service is busy, retry later",
+                    },
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(exc.retry_after)},
+                )
+            finally:
+                _endpoint_class.reset(token)
+
+        return wrapper
+
+    return decorator
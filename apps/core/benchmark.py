@@ -0,0 +1,634 @@
+"""
+Benchmark suite for the recommendation pipeline.
+
+Runs a fixed set of timing cases against seeded synthetic catalogs and
+returns a JSON-serializable report. Reports can be compared against a stored
+baseline to flag regressions; see the ``benchmark`` management command.
+"""
+
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.pool import ConnectionPool
+from apps.core.renderers import MessagePackRenderer, ORJSONRenderer
+from apps.products.models import Product
+from apps.products.search import search_products
+from apps.products.catalog import get_catalog_version
+from apps.products.similarity import (
+    ENCODED_FIELDS,
+    CatalogSimilarityIndex,
+    SimilarityIndex,
+)
+from apps.products.snapshot import CatalogSnapshot
+from apps.products.synthetic import (
+    SKU_PREFIX,
+    build_synthetic_catalog,
+    synthetic_import_rows,
+)
+from apps.products.utils import import_products_from_workbook_rows
+from apps.recommendations.services.constants import OUTFIT_CATEGORIES
+from apps.recommendations.services.outfit_stream import BATCH_SIZE, OutfitStream
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_TOLERANCE = 0.25
+
+LOCAL_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "outfit-benchmark",
+        "TIMEOUT": 300,
+    }
+}
+
+BENCH_PREFERENCES = [
+    {},
+    {"occasion": "office"},
+    {"occasion": "casual", "season": "summer"},
+    {"season": "winter", "budget": "mid"},
+]
+
+
+# ---------------------------------------------------------------------------
+# Environment
+# ---------------------------------------------------------------------------
+
+
+@contextmanager
+def benchmark_database(verbosity: int = 0):
+    """
+    Create a throwaway test database for the configured ``default`` alias.
+
+    SQLite databases are file-backed (in a temp directory) rather than
+    in-memory so large catalogs behave like a deployed instance. Postgres
+    uses the usual ``test_<name>`` database.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    original_test_name = test_settings.get("NAME")
+    tmpdir = None
+    if connection.vendor == "sqlite" and not original_test_name:
+        tmpdir = tempfile.mkdtemp(prefix="outfit-bench-")
+        test_settings["NAME"] = os.path.join(tmpdir, "benchmark.sqlite3")
+
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings["NAME"] = original_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextmanager
+def local_cache():
+    """Swap the configured cache for an in-process LocMemCache."""
+    with override_settings(CACHES=LOCAL_CACHE):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------------------------------
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Latency summary for a list of millisecond samples."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def parse_sizes(raw: str) -> List[int]:
+    """Parse ``"1k,10k,1m"`` style catalog sizes."""
+    sizes = []
+    for part in raw.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        multiplier = 1
+        if part.endswith("k"):
+            multiplier, part = 1000, part[:-1]
+        elif part.endswith("m"):
+            multiplier, part = 1000000, part[:-1]
+        try:
+            sizes.append(int(part) * multiplier)
+        except ValueError:
+            raise ValueError(f"Invalid size: {part}")
+    return sizes
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, value
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+
+class BenchmarkContext:
+    """State shared by the cases of one catalog size."""
+
+    def __init__(self, size: int, seed: int, samples: int):
+        self.size = size
+        self.seed = seed
+        self.samples = samples
+        self.rng = random.Random(seed)
+        ids = list(
+            Product.objects.filter(sku__startswith=SKU_PREFIX, is_active=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.sample_ids = self.rng.sample(ids, min(samples, len(ids)))
+
+    def preferences_for(self, index: int) -> Dict[str, str]:
+        return BENCH_PREFERENCES[index % len(BENCH_PREFERENCES)]
+
+
+def case_candidate_query(ctx: BenchmarkContext) -> Dict[str, Any]:
+    timings = []
+    for index, product_id in enumerate(ctx.sample_ids):
+        base = Product.objects.get(id=product_id)
+        preferences = ctx.preferences_for(index)
+        for category in OUTFIT_CATEGORIES:
+            if category == base.category:
+                continue
+            # Pools are cached; time the query, not the cache.
+            cache.clear()
+            elapsed, _ = _timed(
+                RecommendationService._candidate_pools,
+                [base],
+                [category],
+                preferences,
+            )
+            timings.append(elapsed)
+    return summarize(timings)
+
+
+def case_recommend_cold(ctx: BenchmarkContext) -> Dict[str, Any]:
+    timings = []
+    for index, product_id in enumerate(ctx.sample_ids):
+        cache.clear()
+        elapsed, _ = _timed(
+            RecommendationService.generate_recommendations,
+            product_id,
+            dict(ctx.preferences_for(index)),
+            3,
+        )
+        timings.append(elapsed)
+    return summarize(timings)
+
+
+def case_recommend_warm(ctx: BenchmarkContext) -> Dict[str, Any]:
+    cache.clear()
+    for index, product_id in enumerate(ctx.sample_ids):
+        RecommendationService.generate_recommendations(
+            product_id, dict(ctx.preferences_for(index)), 3
+        )
+    timings = []
+    for index, product_id in enumerate(ctx.sample_ids):
+        elapsed, _ = _timed(
+            RecommendationService.generate_recommendations,
+            product_id,
+            dict(ctx.preferences_for(index)),
+            3,
+        )
+        timings.append(elapsed)
+    return summarize(timings)
+
+
+def case_combination_scoring(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Throughput of ranking one stream batch from fetched pools."""
+    cache.clear()
+    version = get_catalog_version()
+    prepared = []
+    for index, product_id in enumerate(ctx.sample_ids):
+        base = Product.objects.prefetch_related("occasions", "seasons").get(
+            id=product_id
+        )
+        stream = OutfitStream(base, ctx.preferences_for(index), version)
+        # Fetch the candidate pools outside the timed section.
+        stream.harmony
+        prepared.append(stream)
+
+    outfits_scored = 0
+    elapsed_ms = 0.0
+    for stream in prepared:
+        start = time.perf_counter()
+        stream.extend(BATCH_SIZE)
+        elapsed_ms += (time.perf_counter() - start) * 1000
+        outfits_scored += len(stream)
+
+    seconds = elapsed_ms / 1000
+    return {
+        "outfits": outfits_scored,
+        "total_ms": round(elapsed_ms, 3),
+        "outfits_per_sec": round(outfits_scored / seconds, 1) if seconds else 0.0,
+    }
+
+
+def case_bulk_endpoint(ctx: BenchmarkContext) -> Dict[str, Any]:
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    batch = 10
+    timings = []
+    products = 0
+    with override_settings(ALLOWED_HOSTS=["*"]):
+        cache.clear()
+        for offset in range(0, len(ctx.sample_ids), batch):
+            ids = ctx.sample_ids[offset : offset + batch]
+            elapsed, response = _timed(
+                client.post,
+                "/api/recommendations/bulk/",
+                {"product_ids": ids, "preferences": {}, "limit": 3},
+                format="json",
+            )
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"Bulk endpoint returned {response.status_code}: {response.content[:200]!r}"
+                )
+            timings.append(elapsed)
+            products += len(ids)
+    summary = summarize(timings)
+    total_seconds = sum(timings) / 1000
+    summary["requests_per_sec"] = (
+        round(len(timings) / total_seconds, 2) if total_seconds else 0.0
+    )
+    summary["products_per_sec"] = (
+        round(products / total_seconds, 2) if total_seconds else 0.0
+    )
+    return summary
+
+
+def case_import_rows(ctx: BenchmarkContext) -> Dict[str, Any]:
+    count = min(max(ctx.size // 10, 100), 2000)
+    headers, rows = synthetic_import_rows(count, seed=ctx.seed)
+    with transaction.atomic():
+        elapsed, result = _timed(import_products_from_workbook_rows, rows, headers)
+        transaction.set_rollback(True)
+    seconds = elapsed / 1000
+    return {
+        "rows": count,
+        "created": result.get("created", 0),
+        "errors": len(result.get("errors", [])),
+        "total_ms": round(elapsed, 3),
+        "rows_per_sec": round(count / seconds, 1) if seconds else 0.0,
+    }
+
+
+SEARCH_TERMS = ["linen", "navy sneakers", "slim", "leather belt", "oversized hoodie"]
+
+
+def case_search(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """First page of relevance-ordered full-text search results."""
+    timings = []
+    active = Product.objects.filter(is_active=True)
+    for index in range(ctx.samples):
+        terms = SEARCH_TERMS[index % len(SEARCH_TERMS)].split()
+        start = time.perf_counter()
+        matched = search_products(active, terms)
+        if matched is None:
+            raise RuntimeError(f"No full-text index on {connection.vendor}")
+        list(matched.order_by("-search_rank", "id")[:20])
+        elapsed = (time.perf_counter() - start) * 1000
+        timings.append(elapsed)
+    return summarize(timings)
+
+
+RENDERERS = {
+    "json": JSONRenderer,
+    "orjson": ORJSONRenderer,
+    "msgpack": MessagePackRenderer,
+}
+
+
+def _render_payloads(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Representative response bodies, as views hand them to renderers."""
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    with override_settings(ALLOWED_HOSTS=["*"]):
+        products = client.get("/api/products/", {"page_size": 100}).data
+        recommend = client.get(
+            f"/api/recommendations/{ctx.sample_ids[0]}/", {"limit": 10}
+        ).data
+        bulk = client.post(
+            "/api/recommendations/bulk/",
+            {"product_ids": ctx.sample_ids[:10], "preferences": {}, "limit": 3},
+            format="json",
+        ).data
+    return {"products": products, "recommend": recommend, "bulk": bulk}
+
+
+def case_render(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Render time and payload size per endpoint and renderer."""
+    payloads = _render_payloads(ctx)
+    repeats = max(ctx.samples, 1)
+    metrics = {}
+    for endpoint, data in payloads.items():
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            body = renderer.render(data, renderer.media_type, {})
+            start = time.perf_counter()
+            for _ in range(repeats):
+                renderer.render(data, renderer.media_type, {})
+            elapsed = (time.perf_counter() - start) * 1000 / repeats
+            metrics[f"{endpoint}_{name}_ms"] = round(elapsed, 4)
+            metrics[f"{endpoint}_{name}_bytes"] = len(body)
+    return metrics
+
+
+def case_similar_items(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Similar-items index build time and query latency, brute force vs IVF."""
+    rows = list(
+        Product.objects.filter(is_active=True).order_by().values_list(*ENCODED_FIELDS)
+    )
+    metrics: Dict[str, Any] = {"products": len(rows)}
+    results = {}
+    for mode, threshold in (("brute", len(rows) + 1), ("ivf", 0)):
+        index = SimilarityIndex(ivf_threshold=threshold)
+        elapsed, _ = _timed(index.upsert, rows)
+        metrics[f"{mode}_build_ms"] = round(elapsed, 3)
+        timings = []
+        results[mode] = []
+        for product_id in ctx.sample_ids:
+            elapsed, found = _timed(index.search, product_id, 10)
+            timings.append(elapsed)
+            results[mode].append({pk for pk, _ in found or []})
+        for key, value in summarize(timings).items():
+            metrics[f"{mode}_{key}"] = value
+    overlaps = [
+        len(brute & ivf) / len(brute)
+        for brute, ivf in zip(results["brute"], results["ivf"])
+        if brute
+    ]
+    metrics["ivf_recall_at_10"] = round(statistics.fmean(overlaps), 4) if overlaps else 1.0
+    return metrics
+
+
+def case_catalog_snapshot(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Worker start-up: encoding the catalog from the database vs mapping a snapshot."""
+    directory = tempfile.mkdtemp(prefix="catalog-snapshot-")
+    try:
+        index = CatalogSimilarityIndex()
+        sync_ms, _ = _timed(index.sync, get_catalog_version())
+        publish_ms, path = _timed(index.publish, directory)
+
+        map_timings, query_timings = [], []
+        for product_id in ctx.sample_ids:
+            elapsed, mapped = _timed(
+                lambda: CatalogSimilarityIndex.from_snapshot(CatalogSnapshot(path))
+            )
+            map_timings.append(elapsed)
+            elapsed, _ = _timed(mapped.search, product_id, 10)
+            query_timings.append(elapsed)
+
+        metrics: Dict[str, Any] = {
+            "products": len(index),
+            "sync_ms": round(sync_ms, 3),
+            "publish_ms": round(publish_ms, 3),
+            "snapshot_mb": round(os.path.getsize(path) / 1e6, 3),
+            "private_vectors_mb": round(index.vectors.nbytes / 1e6, 3),
+        }
+        for prefix, timings in (("map", map_timings), ("first_query", query_timings)):
+            for key, value in summarize(timings).items():
+                metrics[f"{prefix}_{key}"] = value
+        return metrics
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+ACQUIRE_THREADS = 8
+ACQUIRE_POOL_SIZE = 4
+
+
+def _ping(conn) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    cursor.close()
+    return True
+
+
+def _acquire_latencies(acquire, release, rounds: int) -> List[float]:
+    """Per-acquire latency with ``ACQUIRE_THREADS`` threads hammering at once."""
+    timings: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(ACQUIRE_THREADS)
+
+    def worker():
+        barrier.wait()
+        local = []
+        for _ in range(rounds):
+            elapsed, conn = _timed(acquire)
+            _ping(conn)
+            release(conn)
+            local.append(elapsed)
+        with lock:
+            timings.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(ACQUIRE_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings
+
+
+def case_connection_acquire(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """Connection acquire latency under concurrency: fresh connects vs the pool."""
+    wrapper = connections[DEFAULT_DB_ALIAS]
+    params = wrapper.get_connection_params()
+
+    def connect():
+        return wrapper.Database.connect(**params)
+
+    rounds = max(ctx.samples, 1) * 5
+    direct = _acquire_latencies(connect, lambda conn: conn.close(), rounds)
+
+    pool = ConnectionPool(
+        connect,
+        name="benchmark",
+        min_size=ACQUIRE_POOL_SIZE,
+        max_size=ACQUIRE_POOL_SIZE,
+        check=_ping,
+    )
+    try:
+        pooled = _acquire_latencies(pool.getconn, pool.putconn, rounds)
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    metrics = {"threads": ACQUIRE_THREADS, "pool_size": ACQUIRE_POOL_SIZE}
+    for prefix, timings in (("direct", direct), ("pooled", pooled)):
+        for key, value in summarize(timings).items():
+            metrics[f"{prefix}_{key}"] = value
+    metrics["pooled_connections_created"] = stats["created"]
+    metrics["pooled_wait_max_ms"] = stats["wait_ms_max"]
+    return metrics
+
+
+CASES: Dict[str, Callable[[BenchmarkContext], Dict[str, Any]]] = {
+    "candidate_query": case_candidate_query,
+    "recommend_cold": case_recommend_cold,
+    "recommend_warm": case_recommend_warm,
+    "combination_scoring": case_combination_scoring,
+    "bulk_endpoint": case_bulk_endpoint,
+    "import_rows": case_import_rows,
+    "search": case_search,
+    "render": case_render,
+    "connection_acquire": case_connection_acquire,
+    "similar_items": case_similar_items,
+    "catalog_snapshot": case_catalog_snapshot,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def run_benchmarks(
+    sizes: List[int],
+    seed: int = 42,
+    samples: int = 20,
+    cases: Optional[List[str]] = None,
+    log: Callable[[str], None] = lambda message: None,
+) -> Dict[str, Any]:
+    """
+    Run the selected cases for each catalog size on the current database.
+
+    Catalogs are grown in place, so ``sizes`` are processed in ascending
+    order and each size reuses the products created for the previous one.
+    """
+    selected = cases or list(CASES)
+    unknown = set(selected) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    report = {
+        "version": REPORT_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "platform": platform.platform(),
+            "seed": seed,
+            "samples": samples,
+        },
+        "results": {},
+    }
+
+    for size in sorted(sizes):
+        existing = Product.objects.filter(sku__startswith=SKU_PREFIX).count()
+        if existing < size:
+            log(f"Building synthetic catalog: {existing} -> {size} products")
+            elapsed, _ = _timed(build_synthetic_catalog, size, seed, existing)
+            log(f"  built in {elapsed / 1000:.1f}s")
+
+        ctx = BenchmarkContext(size, seed, samples)
+        size_results = {}
+        for name in selected:
+            log(f"[{size}] {name}")
+            size_results[name] = CASES[name](ctx)
+        report["results"][str(size)] = size_results
+
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+
+def _metric_direction(metric: str) -> Optional[str]:
+    if metric.endswith("_ms") and metric != "total_ms":
+        return "lower"
+    if metric.endswith("_per_sec"):
+        return "higher"
+    return None
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """
+    Return metrics in ``current`` that are worse than ``baseline`` by more
+    than ``tolerance`` (a fraction, 0.25 == 25%).
+
+    Latency metrics (``*_ms``) regress when they grow; throughput metrics
+    (``*_per_sec``) regress when they shrink. Sizes or cases missing from
+    either report are ignored.
+    """
+    regressions = []
+    for size, cases in current.get("results", {}).items():
+        baseline_cases = baseline.get("results", {}).get(size, {})
+        for case, metrics in cases.items():
+            baseline_metrics = baseline_cases.get(case, {})
+            for metric, value in metrics.items():
+                direction = _metric_direction(metric)
+                reference = baseline_metrics.get(metric)
+                if direction is None or not reference:
+                    continue
+                change = (value - reference) / reference
+                if direction == "lower" and change > tolerance:
+                    worse = True
+                elif direction == "higher" and -change > tolerance:
+                    worse = True
+                else:
+                    worse = False
+                if worse:
+                    regressions.append(
+                        {
+                            "size": size,
+                            "case": case,
+                            "metric": metric,
+                            "baseline": reference,
+                            "current": value,
+                            "change_pct": round(change * 100, 1),
+                        }
+                    )
+    return regressions
@@ -0,0 +1,91 @@
+"""
+Conditional GET support keyed on the catalog version.
+
+Product listings and recommendations are pure functions of the catalog and
+the request, so a validator can be computed from the catalog version and the
+request alone, without rendering anything. ``catalog_conditional`` answers
+``If-None-Match`` / ``If-Modified-Since`` with ``304`` before the view runs.
+
+The ETags are weak: bodies carry per-request fields such as
+``response_time_ms`` and ``cached``, so two responses under one tag are
+equivalent but not byte-identical.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Iterable
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from apps.products.catalog import get_catalog_modified, get_catalog_version
+
+# Cache-busting parameters that never change the response.
+IGNORED_PARAMS = frozenset({"_t"})
+
+
+def catalog_etag(request, ignored_params: Iterable[str] = IGNORED_PARAMS) -> str:
+    """Weak ETag for ``request`` against the current catalog version."""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if key not in ignored_params
+        for value in values
+    )
+    parts = [
+        str(get_catalog_version()),
+        request.path,
+        repr(params),
+        getattr(request, "accepted_media_type", "") or "",
+    ]
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return "W/" + quote_etag(digest)
+
+
+def _is_stale(response) -> bool:
+    data = getattr(response, "data", None)
+    return isinstance(data, dict) and data.get("stale") is True
+
+
+def catalog_conditional(view_method):
+    """
+    Decorate a DRF view handler with catalog-versioned ETag/Last-Modified.
+
+    Matching ``If-None-Match`` (or a fresh ``If-Modified-Since``) returns
+    ``304`` without calling the handler; successful responses get the
+    validators, ``Vary: Accept`` and ``Cache-Control: no-cache`` so caches
+    always revalidate and never mix up renderings. Stale results served
+    under load get ``Cache-Control: no-store`` and no validators.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        etag = catalog_etag(request)
+        last_modified = int(get_catalog_modified())
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            patch_vary_headers(not_modified, ["Accept"])
+            return not_modified
+
+        response = view_method(self, request, *args, **kwargs)
+        if _is_stale(response):
+            # A stale fallback predates the catalog the validators describe;
+            # tagging it would let clients revalidate it until the next write.
+            patch_cache_control(response, no_store=True)
+        elif response.status_code == 200:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # The ETag covers the negotiated media type.
+            patch_vary_headers(response, ["Accept"])
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    return wrapper
@@ -0,0 +1,96 @@
+"""
+PostgreSQL backend with pooled connections.
+
+Identical to ``django.db.backends.postgresql`` except that connections are
+taken from and returned to a per-process ``ConnectionPool`` instead of being
+opened and closed. Configure it through the ``POOL`` key of a database
+entry (``MIN_SIZE``, ``MAX_SIZE``, ``TIMEOUT``, ``MAX_IDLE``) and run it with
+``CONN_MAX_AGE = 0`` so connections go back to the pool after each request.
+"""
+
+import os
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresWrapper
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgresCreation,
+)
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from apps.core.pool import ConnectionPool, close_pools, get_pool
+
+# psycopg2 and psycopg 3 both report an idle session as 0.
+TRANSACTION_STATUS_IDLE = 0
+
+
+def _check(conn) -> bool:
+    """Checkout health check: the session is open and answers a query."""
+    if conn.closed:
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    return True
+
+
+def _reset(conn) -> bool:
+    """Make ``conn`` safe to hand out again; False if it must be discarded."""
+    if conn.closed:
+        return False
+    try:
+        if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+    except Exception:
+        return False
+    return True
+
+
+class DatabaseCreation(PostgresCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled sessions would keep the test database in use.
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgresWrapper):
+    creation_class = DatabaseCreation
+
+    def _pool(self, conn_params) -> ConnectionPool:
+        options = self.settings_dict.get("POOL") or {}
+        # Keyed by pid so forked workers never share sessions with the parent.
+        key = (os.getpid(), self.alias, repr(sorted(conn_params.items())))
+
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        return get_pool(
+            key,
+            lambda: ConnectionPool(
+                connect,
+                name=self.alias,
+                min_size=int(options.get("MIN_SIZE", 1)),
+                max_size=int(options.get("MAX_SIZE", 10)),
+                timeout=float(options.get("TIMEOUT", 10)),
+                max_idle=float(options.get("MAX_IDLE", 300)),
+                check=_check,
+            ),
+        )
+
+    def get_new_connection(self, conn_params):
+        self._connection_pool = self._pool(conn_params)
+        connection = self._connection_pool.getconn()
+        # Normally recorded by the parent when it opens a connection.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self._connection_pool.putconn(
+                self.connection, discard=not _reset(self.connection)
+            )
@@ -0,0 +1,170 @@
+"""
+Read-replica routing.
+
+Replicas are configured with ``DATABASE_REPLICA_URLS`` and show up as the
+``replica_<n>`` aliases listed in ``settings.DATABASE_REPLICAS``. Reads are
+only sent to a replica inside a request that ``ReplicaRoutingMiddleware``
+marked as read-only (safe methods, or views with ``replica_reads = True``);
+everything else - writes, management commands, reads inside a transaction
+or after a write - uses ``default``.
+
+A request reads from one replica: it is chosen on the request's first read
+and kept for the rest, so every query of a response (a page and its count,
+the change log and the rows it names) sees the same replication lag.
+
+A client that wrote is pinned to the primary for ``REPLICA_PIN_SECONDS``
+with a cookie, so it reads its own writes while replicas catch up. Replicas
+are health-checked at most every ``REPLICA_HEALTH_INTERVAL`` seconds and an
+unhealthy one is skipped until it passes a check again.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _RoutingState:
+    __slots__ = ("use_replica", "wrote", "replica", "chosen")
+
+    def __init__(self, use_replica: bool):
+        self.use_replica = use_replica
+        self.wrote = False
+        self.replica: Optional[str] = None
+        self.chosen = False
+
+
+_state: contextvars.ContextVar[Optional[_RoutingState]] = contextvars.ContextVar(
+    "db_routing_state", default=None
+)
+
+_health_lock = threading.Lock()
+_health: Dict[str, Tuple[float, bool]] = {}
+
+
+def replica_aliases() -> List[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def _check(alias: str) -> bool:
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except Exception:
+        logger.warning("Database replica %s failed its health check", alias)
+        connections[alias].close()
+        return False
+
+
+def replica_is_healthy(alias: str) -> bool:
+    """Cached health of ``alias``, re-checked every ``REPLICA_HEALTH_INTERVAL``."""
+    interval = getattr(settings, "REPLICA_HEALTH_INTERVAL", 10)
+    now = time.monotonic()
+    with _health_lock:
+        checked_at, healthy = _health.get(alias, (None, True))
+    if checked_at is not None and now - checked_at < interval:
+        return healthy
+    healthy = _check(alias)
+    with _health_lock:
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+def reset_health() -> None:
+    with _health_lock:
+        _health.clear()
+
+
+def choose_replica() -> Optional[str]:
+    """A random healthy replica, or None when there is none."""
+    candidates = replica_aliases()
+    random.shuffle(candidates)
+    for alias in candidates:
+        if replica_is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Sends read-only request traffic to healthy replicas."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if not state.chosen:
+            state.replica = choose_replica()
+            state.chosen = True
+        return state.replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+def _pinned(request) -> bool:
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """Marks read-only requests for replica reads and pins writers to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RoutingState(use_replica=False)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote and replica_aliases():
+            pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+            response.set_cookie(
+                PIN_COOKIE,
+                f"{time.time() + pin_seconds:.3f}",
+                max_age=pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None:
+            return None
+        view_class = getattr(view_func, "cls", None) or getattr(
+            view_func, "view_class", None
+        )
+        read_only = request.method in SAFE_METHODS or getattr(
+            view_class, "replica_reads", False
+        )
+        state.use_replica = read_only and not _pinned(request)
+        return None
@@ -0,0 +1,338 @@
+"""
+HTTP load generation against the API.
+
+Drives the recommendation, bulk recommendation and product list endpoints
+with a configurable request mix, concurrency and Zipfian product popularity,
+and reports throughput, latency percentiles, error rate and cache hit ratio.
+See the ``loadtest`` management command for the offline, self-booting mode.
+"""
+
+import bisect
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from .benchmark import LOCAL_CACHE, percentile
+
+DEFAULT_MIX = {"recommend": 70, "bulk": 10, "products": 20}
+ENDPOINTS = tuple(DEFAULT_MIX)
+
+
+def parse_mix(raw: Optional[str]) -> Dict[str, int]:
+    """Parse ``recommend=70,bulk=10,products=20`` into integer weights."""
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name}: {weight!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("Request mix needs at least one positive weight")
+    return mix
+
+
+class ZipfSampler:
+    """
+    Sample items with Zipfian popularity: the item at rank ``k`` is drawn
+    with probability proportional to ``1 / k ** exponent``.
+    """
+
+    def __init__(self, items: List[Any], exponent: float = 1.1, seed: int = 42):
+        if not items:
+            raise ValueError("ZipfSampler needs at least one item")
+        self.rng = random.Random(seed)
+        self.items = list(items)
+        # Shuffle so popularity is not correlated with insertion order.
+        self.rng.shuffle(self.items)
+        total = 0.0
+        self.cumulative = []
+        for rank in range(1, len(self.items) + 1):
+            total += 1.0 / rank**exponent
+            self.cumulative.append(total)
+        self.total = total
+        self._lock = threading.Lock()
+
+    def sample(self) -> Any:
+        with self._lock:
+            point = self.rng.random() * self.total
+        return self.items[bisect.bisect_left(self.cumulative, point)]
+
+    def sample_many(self, count: int) -> List[Any]:
+        return [self.sample() for _ in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# In-process server
+# ---------------------------------------------------------------------------
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_application(host: str = "127.0.0.1", port: int = 0):
+    """Serve the project's WSGI application on a background thread."""
+    server = ThreadedWSGIServer((host, port), _QuietRequestHandler)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def offline_cache_settings(backend: str = "locmem") -> Dict[str, Any]:
+    """
+    CACHES settings that need no Redis server.
+
+    ``fakeredis`` exercises the real django-redis client code paths against an
+    in-process Redis emulation; ``locmem`` needs no extra packages.
+    """
+    if backend == "locmem":
+        return LOCAL_CACHE
+    if backend == "fakeredis":
+        try:
+            from fakeredis import FakeConnection, FakeServer
+        except ImportError:
+            raise ValueError("fakeredis is not installed; use --cache locmem")
+        return {
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": "redis://fakeredis:6379/0",
+                "OPTIONS": {
+                    "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                    "CONNECTION_POOL_KWARGS": {
+                        "connection_class": FakeConnection,
+                        "server": FakeServer(),
+                    },
+                },
+            }
+        }
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+@contextmanager
+def offline_environment(cache_backend: str = "locmem"):
+    """Settings overrides for a self-contained load test run."""
+    with override_settings(
+        CACHES=offline_cache_settings(cache_backend),
+        ALLOWED_HOSTS=["*"],
+        DEBUG=False,
+    ):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+
+class _Client:
+    """One persistent HTTP connection per worker thread."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conn = cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: Optional[dict] = None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Accept": "application/json"}
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            if self.conn is None:
+                self._connect()
+            try:
+                self.conn.request(method, self.prefix + path, payload, headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self.close()
+                if attempt:
+                    raise
+        raise RuntimeError("unreachable")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _cache_outcomes(kind: str, status: int, data: bytes) -> List[bool]:
+    """Extract per-recommendation ``cached`` flags from a response body."""
+    if kind == "products" or status != 200:
+        return []
+    try:
+        body = json.loads(data)
+    except ValueError:
+        return []
+    if kind == "recommend":
+        return [bool(body.get("cached"))] if "cached" in body else []
+    return [
+        bool(result.get("cached"))
+        for result in body.get("results", [])
+        if result.get("success") and "cached" in result
+    ]
+
+
+def run_load(
+    base_url: str,
+    product_ids: List[int],
+    concurrency: int = 8,
+    duration: Optional[float] = 10.0,
+    requests: Optional[int] = None,
+    mix: Optional[Dict[str, int]] = None,
+    zipf_exponent: float = 1.1,
+    bulk_size: int = 5,
+    seed: int = 42,
+    timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """
+    Generate load against ``base_url`` and return a report.
+
+    Stops after ``duration`` seconds or ``requests`` total requests,
+    whichever comes first.
+    """
+    if not product_ids:
+        raise ValueError("No product ids to request")
+    mix = mix or dict(DEFAULT_MIX)
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    popularity = ZipfSampler(product_ids, zipf_exponent, seed)
+    product_pages = max(1, min(50, len(product_ids) // 20))
+
+    records = []
+    records_lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_ticket() -> bool:
+        with records_lock:
+            if requests is not None and issued[0] >= requests:
+                return False
+            issued[0] += 1
+        return deadline is None or time.perf_counter() < deadline
+
+    def worker(worker_id: int):
+        rng = random.Random(seed * 7919 + worker_id)
+        client = _Client(base_url, timeout)
+        local = []
+        try:
+            while next_ticket():
+                kind = rng.choices(kinds, weights=weights)[0]
+                if kind == "recommend":
+                    method, path, body = (
+                        "GET",
+                        f"/api/recommendations/{popularity.sample()}/",
+                        None,
+                    )
+                elif kind == "bulk":
+                    ids = list(dict.fromkeys(popularity.sample_many(bulk_size)))
+                    method, path, body = (
+                        "POST",
+                        "/api/recommendations/bulk/",
+                        {"product_ids": ids, "preferences": {}, "limit": 3},
+                    )
+                else:
+                    page = rng.randint(1, product_pages)
+                    method, path, body = "GET", f"/api/products/?page={page}", None
+
+                start = time.perf_counter()
+                try:
+                    status, data = client.request(method, path, body)
+                except Exception:
+                    status, data = 0, b""
+                elapsed = (time.perf_counter() - start) * 1000
+                local.append((kind, status, elapsed, _cache_outcomes(kind, status, data)))
+        finally:
+            client.close()
+            with records_lock:
+                records.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for worker_id in range(concurrency):
+            pool.submit(worker, worker_id)
+    wall_seconds = time.perf_counter() - started
+
+    report = {
+        "config": {
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "duration": duration,
+            "requests": requests,
+            "mix": mix,
+            "zipf_exponent": zipf_exponent,
+            "bulk_size": bulk_size,
+            "products": len(product_ids),
+            "seed": seed,
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "overall": _summarize_records(records, wall_seconds),
+        "endpoints": {
+            kind: _summarize_records(
+                [record for record in records if record[0] == kind], wall_seconds
+            )
+            for kind in kinds
+        },
+    }
+    return report
+
+
+def _summarize_records(records, wall_seconds: float) -> Dict[str, Any]:
+    total = len(records)
+    if not total:
+        return {"requests": 0}
+    latencies = sorted(record[2] for record in records)
+    errors = sum(1 for record in records if not 200 <= record[1] < 400)
+    outcomes = [hit for record in records for hit in record[3]]
+    status_counts = {}
+    for record in records:
+        status_counts[str(record[1])] = status_counts.get(str(record[1]), 0) + 1
+    return {
+        "requests": total,
+        "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "error_rate": round(errors / total, 4),
+        "cache_hit_ratio": (
+            round(sum(outcomes) / len(outcomes), 4) if outcomes else None
+        ),
+        "status_codes": status_counts,
+    }
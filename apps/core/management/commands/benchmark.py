@@ -0,0 +1,135 @@
+"""
+Run the recommendation pipeline benchmark suite.
+
+Usage:
+    python manage.py benchmark
+    python manage.py benchmark --sizes 1000,10000,100000 --output bench.json
+    python manage.py benchmark --baseline benchmarks/baseline.json --fail-on-regression
+
+The suite always runs against a throwaway test database created for the
+configured ``DATABASE_URL`` (SQLite or Postgres), so real data is untouched.
+To benchmark Postgres, point ``DATABASE_URL`` at a server where the user may
+create databases.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import (
+    CASES,
+    DEFAULT_SIZES,
+    DEFAULT_TOLERANCE,
+    benchmark_database,
+    compare_reports,
+    local_cache,
+    parse_sizes,
+    run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the recommendation pipeline on seeded synthetic catalogs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default=",".join(str(size) for size in DEFAULT_SIZES),
+            help="Comma-separated catalog sizes, e.g. 1k,10k,100k,1m.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=20,
+            help="Base products sampled per case and size.",
+        )
+        parser.add_argument(
+            "--cases",
+            help=f"Comma-separated subset of cases ({', '.join(CASES)}).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+        parser.add_argument(
+            "--baseline", help="Compare against a previously stored JSON report."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Allowed slowdown as a fraction before a metric is flagged.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when regressions are found.",
+        )
+        parser.add_argument(
+            "--use-configured-cache",
+            action="store_true",
+            help="Use CACHES from settings (e.g. Redis) instead of LocMemCache.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = parse_sizes(options["sizes"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not sizes:
+            raise CommandError("No catalog sizes given")
+        cases = None
+        if options.get("cases"):
+            cases = [c.strip() for c in options["cases"].split(",") if c.strip()]
+
+        baseline = None
+        if options.get("baseline"):
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read baseline: {exc}")
+
+        def log(message):
+            self.stdout.write(message)
+
+        if options["verbosity"] < 2:
+            # Per-request INFO lines from the service drown out the progress log.
+            logging.getLogger("apps.recommendations").setLevel(logging.WARNING)
+
+        try:
+            with benchmark_database(verbosity=options["verbosity"] - 1):
+                if options["use_configured_cache"]:
+                    report = run_benchmarks(
+                        sizes, options["seed"], options["samples"], cases, log
+                    )
+                else:
+                    with local_cache():
+                        report = run_benchmarks(
+                            sizes, options["seed"], options["samples"], cases, log
+                        )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options.get("output"):
+            Path(options["output"]).write_text(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if baseline is None:
+            return
+
+        regressions = compare_reports(report, baseline, options["tolerance"])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(regressions)} regressions found"))
+        for item in regressions:
+            self.stdout.write(
+                f"  [{item['size']}] {item['case']}.{item['metric']}: "
+                f"{item['baseline']} -> {item['current']} ({item['change_pct']:+}%)"
+            )
+        if options["fail_on_regression"]:
+            raise CommandError("Benchmark regressions exceed tolerance")
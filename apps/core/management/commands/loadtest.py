@@ -0,0 +1,158 @@
+"""
+Generate HTTP load against the recommendation and product endpoints.
+
+Usage:
+    # Self-contained: seed a synthetic catalog, serve the app in-process with a
+    # local cache, and drive it
+    python manage.py loadtest --products 10k --concurrency 16 --duration 30
+
+    # Against an already running server (product ids come from its catalog)
+    python manage.py loadtest --url http://localhost:8000 --concurrency 32
+
+The offline mode runs against a throwaway test database and never needs
+Redis: ``--cache locmem`` (default) or ``--cache fakeredis``.
+"""
+
+import json
+import logging
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import benchmark_database, parse_sizes
+from apps.core.loadtest import (
+    offline_environment,
+    parse_mix,
+    run_load,
+    serve_application,
+)
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+class Command(BaseCommand):
+    help = "Drive the API with concurrent HTTP load and report latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", help="Target an existing server instead of booting one."
+        )
+        parser.add_argument(
+            "--products",
+            default="5000",
+            help="Synthetic catalog size for the offline mode (e.g. 10k).",
+        )
+        parser.add_argument(
+            "--cache",
+            choices=["locmem", "fakeredis"],
+            default="locmem",
+            help="Cache backend for the offline mode.",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--duration", type=float, default=10.0, help="Seconds to run."
+        )
+        parser.add_argument(
+            "--requests", type=int, help="Stop after this many requests."
+        )
+        parser.add_argument(
+            "--mix",
+            help="Request mix weights, e.g. recommend=70,bulk=10,products=20.",
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Zipf exponent for product popularity (higher = more skewed).",
+        )
+        parser.add_argument("--bulk-size", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options.get("mix"))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        load_options = {
+            "concurrency": options["concurrency"],
+            "duration": options["duration"],
+            "requests": options.get("requests"),
+            "mix": mix,
+            "zipf_exponent": options["zipf"],
+            "bulk_size": options["bulk_size"],
+            "seed": options["seed"],
+        }
+
+        try:
+            if options.get("url"):
+                ids = self._harvest_ids(options["url"])
+                report = run_load(options["url"], ids, **load_options)
+            else:
+                report = self._run_offline(options, load_options)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self._print_report(report)
+        if options.get("output"):
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def _run_offline(self, options, load_options):
+        sizes = parse_sizes(options["products"])
+        if len(sizes) != 1:
+            raise CommandError("--products takes a single size")
+        with benchmark_database(verbosity=options["verbosity"] - 1):
+            with offline_environment(options["cache"]):
+                self.stdout.write(f"Seeding {sizes[0]} synthetic products...")
+                build_synthetic_catalog(sizes[0], seed=options["seed"])
+                ids = list(
+                    Product.objects.filter(is_active=True).values_list("id", flat=True)
+                )
+                with serve_application() as base_url:
+                    # Booting the WSGI app reconfigures logging, so quiet the
+                    # per-request INFO lines only once the server is up.
+                    if options["verbosity"] < 2:
+                        logging.getLogger("apps.recommendations").setLevel(
+                            logging.WARNING
+                        )
+                    self.stdout.write(f"Serving on {base_url}")
+                    return run_load(base_url, ids, **load_options)
+
+    def _harvest_ids(self, base_url, max_pages=50):
+        ids = []
+        url = base_url.rstrip("/") + "/api/products/"
+        for _ in range(max_pages):
+            try:
+                with urlopen(url) as resp:
+                    body = json.loads(resp.read())
+            except Exception as exc:
+                raise CommandError(f"Failed to list products from {url}: {exc}")
+            ids.extend(item["id"] for item in body.get("results", []))
+            url = body.get("next")
+            if not url:
+                break
+        if not ids:
+            raise CommandError("Target server returned no products")
+        return ids
+
+    def _print_report(self, report):
+        rows = [("overall", report["overall"])] + list(report["endpoints"].items())
+        self.stdout.write(
+            f"{'endpoint':<10} {'reqs':>7} {'rps':>9} {'p50':>9} {'p95':>9} "
+            f"{'p99':>9} {'errors':>8} {'hit':>6}"
+        )
+        for name, stats in rows:
+            if not stats.get("requests"):
+                continue
+            hit = stats["cache_hit_ratio"]
+            self.stdout.write(
+                f"{name:<10} {stats['requests']:>7} {stats['throughput_rps']:>9} "
+                f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} "
+                f"{stats['error_rate']:>8.2%} "
+                f"{'-' if hit is None else format(hit, '.0%'):>6}"
+            )
@@ -0,0 +1,88 @@
+"""
+Profile worker start-up: import time per module and time to first request.
+
+Usage:
+    python manage.py profile_startup
+    python manage.py profile_startup --path /api/products/ --top 40
+    python manage.py profile_startup --json > startup.json
+
+The application is booted in a fresh interpreter with ``-X importtime``.
+Exits with an error when boot exceeds ``--budget`` (default
+``STARTUP_BUDGET_MS``) or an optional dependency listed in
+``apps.core.startup.LAZY_MODULES`` was imported during boot.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.startup import profile_startup
+
+
+class Command(BaseCommand):
+    help = "Report import time per module and time to first request for a cold worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/health/",
+            help="Path of the first request (empty to only boot). Default: /api/health/",
+        )
+        parser.add_argument(
+            "--top", type=int, default=20, help="Modules and packages to list."
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=None,
+            help="Boot budget in ms. Defaults to STARTUP_BUDGET_MS.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the full report as JSON."
+        )
+
+    def handle(self, *args, **options):
+        budget = options["budget"]
+        if budget is None:
+            budget = settings.STARTUP_BUDGET_MS
+        try:
+            report = profile_startup(path=options["path"] or None)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report, options["top"])
+
+        problems = []
+        if report["boot_ms"] > budget:
+            problems.append(f"boot took {report['boot_ms']:.0f} ms (budget {budget:.0f} ms)")
+        if report["lazy_modules_loaded"]:
+            problems.append(
+                "optional modules imported at boot: "
+                + ", ".join(report["lazy_modules_loaded"])
+            )
+        if problems:
+            raise CommandError("; ".join(problems))
+
+    def _print(self, report, top):
+        self.stdout.write(self.style.SUCCESS(f"Boot: {report['boot_ms']:.1f} ms"))
+        if "first_request_ms" in report:
+            self.stdout.write(
+                f"First request: {report['first_request_ms']:.1f} ms "
+                f"(status {report['status']})"
+            )
+        self.stdout.write(f"Modules imported: {len(report['modules'])}")
+
+        self.stdout.write("\nImport time by package (self, ms):")
+        for name, total in list(report["packages"].items())[:top]:
+            self.stdout.write(f"  {total:9.1f}  {name}")
+
+        self.stdout.write("\nSlowest imports (cumulative, ms):")
+        slowest = sorted(report["imports"], key=lambda row: -row["cumulative_ms"])
+        for row in slowest[:top]:
+            self.stdout.write(
+                f"  {row['cumulative_ms']:9.1f}  {'  ' * row['depth']}{row['module']}"
+            )
@@ -0,0 +1,266 @@
+"""
+Memory diagnostics for long-running workers.
+
+Built on ``tracemalloc``, which is off unless started: set
+``PYTHONTRACEMALLOC=<frames>`` to trace from interpreter start, or start it
+at runtime through the diagnostics endpoint (allocations made before that
+are not attributed). While tracing:
+
+* ``take_snapshot`` keeps the last ``MAX_SNAPSHOTS`` snapshots of this
+  process and, with ``MEMORY_SNAPSHOT_DIR`` set, dumps each one to disk
+  (``tracemalloc.Snapshot.load`` reads them back);
+* ``snapshot_stats`` lists the largest allocation sites of a snapshot, or
+  what grew between two snapshots, grouped by file or by line;
+* ``track_memory`` records the peak allocation of each request to a view.
+
+``object_counts`` works without tracing. Everything is per process: with
+several workers each one answers for itself, identified by ``pid``.
+"""
+
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+MAX_SNAPSHOTS = 4
+DEFAULT_LIMIT = 25
+GROUP_BY = ("lineno", "filename")
+RECENT_REQUESTS = 20
+
+# Bookkeeping of the import system and of tracemalloc itself is noise.
+_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+_lock = threading.Lock()
+_snapshots: Dict[int, Dict[str, Any]] = {}
+_next_id = 1
+_views: Dict[str, Dict[str, Any]] = {}
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def memory_status() -> Dict[str, Any]:
+    """Process RSS, tracing state, stored snapshots and per-view peaks."""
+    status = {
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "max_rss_bytes": _max_rss_bytes(),
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "snapshot_dir": settings.MEMORY_SNAPSHOT_DIR or None,
+    }
+    if status["tracing"]:
+        current, peak = tracemalloc.get_traced_memory()
+        status["traced_bytes"] = current
+        status["traced_peak_bytes"] = peak
+        status["tracemalloc_overhead_bytes"] = tracemalloc.get_tracemalloc_memory()
+    with _lock:
+        status["snapshots"] = [_describe(entry) for entry in _snapshots.values()]
+        status["views"] = {
+            name: {**stats, "recent": list(stats["recent"])}
+            for name, stats in _views.items()
+        }
+    return status
+
+
+def start_tracing(frames: int = 1) -> None:
+    """Start tracing with ``frames`` frames per traceback (restarts if needed)."""
+    if not 1 <= frames <= 100:
+        raise ValueError("frames must be between 1 and 100")
+    if tracemalloc.is_tracing():
+        if tracemalloc.get_traceback_limit() == frames:
+            return
+        tracemalloc.stop()
+    tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    """Stop tracing and free its memory; stored snapshots are kept."""
+    tracemalloc.stop()
+
+
+def _describe(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in entry.items() if key != "snapshot"}
+
+
+def take_snapshot() -> Dict[str, Any]:
+    """Snapshot current allocations and store it, evicting the oldest."""
+    global _next_id
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not tracing; start it first")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _lock:
+        snapshot_id = _next_id
+        _next_id += 1
+    entry = {
+        "id": snapshot_id,
+        "taken_at": time.time(),
+        "traced_bytes": sum(trace.size for trace in snapshot.traces),
+        "rss_bytes": _rss_bytes(),
+        "path": None,
+        "snapshot": snapshot,
+    }
+    directory = settings.MEMORY_SNAPSHOT_DIR
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        entry["path"] = os.path.join(
+            directory, f"memory-{os.getpid()}-{snapshot_id}.tracemalloc"
+        )
+        snapshot.dump(entry["path"])
+
+    with _lock:
+        _snapshots[snapshot_id] = entry
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            del _snapshots[min(_snapshots)]
+    return _describe(entry)
+
+
+def _get(snapshot_id: int) -> Dict[str, Any]:
+    with _lock:
+        entry = _snapshots.get(snapshot_id)
+    if entry is None:
+        raise LookupError(f"Snapshot {snapshot_id} not found in process {os.getpid()}")
+    return entry
+
+
+def _site(traceback: tracemalloc.Traceback, group_by: str) -> Dict[str, Any]:
+    frame = traceback[0]
+    site = {"file": frame.filename}
+    if group_by == "lineno":
+        site["line"] = frame.lineno
+    return site
+
+
+def snapshot_stats(
+    snapshot_id: int,
+    compare_to: Optional[int] = None,
+    group_by: str = "lineno",
+    limit: int = DEFAULT_LIMIT,
+) -> Dict[str, Any]:
+    """
+    Largest allocation sites of a snapshot, or with ``compare_to`` the sites
+    that grew most since that (earlier) snapshot.
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+    entry = _get(snapshot_id)
+    result = {"snapshot": _describe(entry), "group_by": group_by}
+
+    if compare_to is None:
+        stats = entry["snapshot"].statistics(group_by)
+        result["stats"] = [
+            {**_site(stat.traceback, group_by), "size_bytes": stat.size, "count": stat.count}
+            for stat in stats[:limit]
+        ]
+        return result
+
+    base = _get(compare_to)
+    diff = entry["snapshot"].compare_to(base["snapshot"], group_by)
+    result["compared_to"] = _describe(base)
+    result["size_diff_bytes"] = entry["traced_bytes"] - base["traced_bytes"]
+    result["stats"] = [
+        {
+            **_site(stat.traceback, group_by),
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in diff[:limit]
+    ]
+    return result
+
+
+def object_counts(limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Live objects tracked by the garbage collector, counted by type.
+
+    Only containers are tracked (dicts, lists, class instances, ...), not
+    atomic objects such as strings and numbers.
+    """
+    gc.collect()
+    counts = Counter(
+        f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects()
+    )
+    return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
+
+
+def _record(name: str, path: str, peak: int, retained: int) -> None:
+    with _lock:
+        stats = _views.get(name)
+        if stats is None:
+            stats = _views[name] = {
+                "requests": 0,
+                "max_peak_bytes": 0,
+                "total_peak_bytes": 0,
+                "recent": deque(maxlen=RECENT_REQUESTS),
+            }
+        stats["requests"] += 1
+        stats["total_peak_bytes"] += peak
+        stats["max_peak_bytes"] = max(stats["max_peak_bytes"], peak)
+        stats["recent"].append(
+            {"path": path, "peak_bytes": peak, "retained_bytes": retained, "at": time.time()}
+        )
+
+
+def track_memory(name: str):
+    """
+    Decorate a view handler to record its peak allocation while tracing.
+
+    The peak is measured against the allocations live when the request
+    started. tracemalloc keeps one process-wide peak, so requests running
+    concurrently in other threads are counted too; figures are exact with
+    one thread per worker and an upper bound otherwise.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return view_method(self, request, *args, **kwargs)
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                return view_method(self, request, *args, **kwargs)
+            finally:
+                if tracemalloc.is_tracing():
+                    current, peak = tracemalloc.get_traced_memory()
+                    _record(name, request.path, max(peak - start, 0), current - start)
+
+        return wrapper
+
+    return decorator
+
+
+def reset_memory_diagnostics() -> None:
+    """Drop stored snapshots and per-view figures (tests)."""
+    global _next_id
+    with _lock:
+        _snapshots.clear()
+        _views.clear()
+        _next_id = 1
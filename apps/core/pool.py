@@ -0,0 +1,256 @@
+"""
+In-process database connection pool.
+
+``ConnectionPool`` is driver-agnostic: it hands out connections made by a
+``connect`` callable, health-checks idle connections on checkout, opens
+``min_size`` of them on first use (and again whenever discards leave fewer)
+without ever expiring those, and blocks for up to ``timeout`` seconds
+when ``max_size`` connections are in use. Pools are per process; see
+``apps.core.db_backends.postgresql`` for how Django connections use them.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections made by ``connect``."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        name: str = "default",
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 10.0,
+        max_idle: float = 300.0,
+        check: Optional[Callable[[Any], bool]] = None,
+        close: Callable[[Any], None] = lambda conn: conn.close(),
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size >= 1")
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._connect = connect
+        self._check = check
+        self._close = close
+
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = {
+            "acquired": 0,
+            "created": 0,
+            "discarded": 0,
+            "failed_checks": 0,
+            "timeouts": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # -- checkout / checkin ---------------------------------------------------
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Take a healthy connection, waiting up to ``timeout`` seconds."""
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        while True:
+            conn, fresh = self._reserve(deadline)
+            if fresh:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+                self._count("created")
+            elif self._check is not None and not self._healthy(conn):
+                self._count("failed_checks")
+                self._discard(conn)
+                continue
+            self._record_wait(time.monotonic() - start)
+            self._fill()
+            return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return ``conn``; ``discard`` closes it instead of keeping it idle."""
+        if discard or self._closed:
+            self._discard(conn)
+            self._fill()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            expired = self._expire_idle()
+            self._cond.notify()
+        for stale in expired:
+            self._safe_close(stale)
+
+    def close(self) -> None:
+        """Close idle connections and refuse to keep returned ones."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._safe_close(conn)
+
+    # -- metrics --------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            acquired = self._counters["acquired"]
+            return {
+                "name": self.name,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                **self._counters,
+                "wait_ms_avg": round(self._wait_total * 1000 / acquired, 3)
+                if acquired
+                else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
+
+    # -- internals ------------------------------------------------------------
+
+    def _reserve(self, deadline: float):
+        """An idle connection, or a free slot to open one in (``fresh``)."""
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout(f"Connection pool {self.name!r} is closed")
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        # Most recently returned first: it is the least likely
+                        # to have been dropped by the server.
+                        conn, _ = self._idle.pop()
+                        return conn, False
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None, True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection available in pool {self.name!r} "
+                            f"({self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def _fill(self) -> None:
+        """Open idle connections until the pool holds ``min_size``."""
+        with self._cond:
+            if self._closed:
+                return
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except Exception:
+                # Best effort: the caller already has its connection and the
+                # next checkout tries again.
+                self._release_slot()
+                continue
+            self._count("created")
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._idle.appendleft((conn, time.monotonic()))
+                    self._cond.notify()
+            if closed:
+                self._discard(conn)
+
+    def _expire_idle(self):
+        # Close connections idle for longer than max_idle, oldest first, but
+        # keep min_size connections open.
+        expired = []
+        cutoff = time.monotonic() - self.max_idle
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._counters["discarded"] += 1
+            expired.append(conn)
+        return expired
+
+    def _healthy(self, conn) -> bool:
+        try:
+            return bool(self._check(conn))
+        except Exception:
+            return False
+
+    def _discard(self, conn) -> None:
+        self._safe_close(conn)
+        self._count("discarded")
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _safe_close(self, conn) -> None:
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._counters[name] += 1
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._cond:
+            self._counters["acquired"] += 1
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+
+
+_registry_lock = threading.Lock()
+_registry: Dict[Tuple, ConnectionPool] = {}
+
+
+def get_pool(key: Tuple, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """The process-wide pool for ``key``, created by ``factory`` on first use."""
+    pool = _registry.get(key)
+    if pool is None:
+        with _registry_lock:
+            pool = _registry.get(key)
+            if pool is None:
+                pool = _registry[key] = factory()
+    return pool
+
+
+def close_pools(name: Optional[str] = None) -> None:
+    """Close every registered pool, or only those called ``name``."""
+    with _registry_lock:
+        keys = [key for key, pool in _registry.items() if name in (None, pool.name)]
+        pools = [_registry.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """Stats for every pool in this process."""
+    with _registry_lock:
+        pools = list(_registry.values())
+    return [pool.stats() for pool in pools]
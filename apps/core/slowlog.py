@@ -0,0 +1,330 @@
+"""
+Slow-request log.
+
+``SlowRequestMiddleware`` traces every request under ``SLOW_REQUEST_PATHS``:
+the wall time of each stage the code marks with ``stage()``, every SQL
+statement with its duration (via ``execute_wrapper``), and whatever the code
+reports with ``annotate()`` - cache outcome, candidate pool sizes,
+combinations scored. Requests slower than ``SLOW_REQUEST_THRESHOLD_MS`` are
+kept, plus a ``SLOW_REQUEST_SAMPLE_RATE`` fraction of the others as a
+baseline to compare against; the rest of the traces are dropped.
+
+Kept traces go to a per-process ring buffer of ``SLOW_REQUEST_BUFFER_SIZE``
+entries and, with ``SLOW_REQUEST_DB`` set, to a local SQLite file shared by
+the workers of a host and capped at ``SLOW_REQUEST_DB_MAX_ROWS`` rows.
+Outside a traced request ``stage()`` and ``annotate()`` do nothing.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENTS = 100
+MAX_SQL_LENGTH = 2000
+
+_current: contextvars.ContextVar[Optional["RequestTrace"]] = contextvars.ContextVar(
+    "slow_request_trace", default=None
+)
+
+
+class RequestTrace:
+    """Timings, SQL and annotations collected during one request."""
+
+    __slots__ = ("started", "stages", "statements", "query_count", "query_ms", "annotations")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self.statements: List[Dict[str, Any]] = []
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.annotations: Dict[str, Any] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def add_query(self, sql: str, ms: float, alias: str) -> None:
+        self.query_count += 1
+        self.query_ms += ms
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append(
+                {
+                    "sql": sql[:MAX_SQL_LENGTH],
+                    "ms": round(ms, 3),
+                    "at_ms": round(self.elapsed_ms() - ms, 3),
+                    "db": alias,
+                }
+            )
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as stage ``name`` of the current trace."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start_ms = trace.elapsed_ms()
+    queries = trace.query_count
+    try:
+        yield
+    finally:
+        trace.stages.append(
+            {
+                "name": name,
+                "at_ms": round(start_ms, 3),
+                "ms": round(trace.elapsed_ms() - start_ms, 3),
+                "queries": trace.query_count - queries,
+            }
+        )
+
+
+def annotate(**values) -> None:
+    """Attach ``values`` to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.annotations.update(values)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace = _current.get()
+        if trace is not None:
+            trace.add_query(
+                sql, (time.perf_counter() - start) * 1000, context["connection"].alias
+            )
+
+
+# ---------------------------------------------------------------- storage
+
+_lock = threading.Lock()
+_buffer: Optional[deque] = None
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS slow_requests (
+        id TEXT PRIMARY KEY,
+        recorded_at REAL NOT NULL,
+        duration_ms REAL NOT NULL,
+        reason TEXT NOT NULL,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        trace TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS slow_requests_duration ON slow_requests (duration_ms)",
+)
+_schema_ready = set()
+
+
+def _ring() -> deque:
+    global _buffer
+    size = settings.SLOW_REQUEST_BUFFER_SIZE
+    with _lock:
+        if _buffer is None or _buffer.maxlen != size:
+            _buffer = deque(_buffer or (), maxlen=size)
+        return _buffer
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=5)
+    if path not in _schema_ready:
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        _schema_ready.add(path)
+    return connection
+
+
+def _persist(entry: Dict[str, Any]) -> None:
+    path = settings.SLOW_REQUEST_DB
+    try:
+        connection = _connect(path)
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO slow_requests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry["id"],
+                        entry["recorded_at"],
+                        entry["duration_ms"],
+                        entry["reason"],
+                        entry["method"],
+                        entry["path"],
+                        json.dumps(entry, default=str),
+                    ),
+                )
+                connection.execute(
+                    "DELETE FROM slow_requests WHERE rowid <= "
+                    "(SELECT rowid FROM slow_requests ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+                    (settings.SLOW_REQUEST_DB_MAX_ROWS,),
+                )
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        logger.warning("Could not write slow request log %s", path, exc_info=True)
+
+
+def record(entry: Dict[str, Any]) -> None:
+    """Keep a finished trace."""
+    _ring().append(entry)
+    if settings.SLOW_REQUEST_DB:
+        _persist(entry)
+
+
+def _summary(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value
+        for key, value in entry.items()
+        if key not in ("stages", "statements")
+    }
+
+
+def slow_requests(
+    limit: int = 50,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    min_ms: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Kept traces, slowest first, without their stages and statements.
+
+    Read from ``SLOW_REQUEST_DB`` when configured (every worker of the host),
+    otherwise from this process's buffer.
+    """
+    if settings.SLOW_REQUEST_DB and os.path.exists(settings.SLOW_REQUEST_DB):
+        clauses, params = [], []
+        if reason:
+            clauses.append("reason = ?")
+            params.append(reason)
+        if path:
+            clauses.append("instr(path, ?) > 0")
+            params.append(path)
+        if min_ms is not None:
+            clauses.append("duration_ms >= ?")
+            params.append(min_ms)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        connection = _connect(settings.SLOW_REQUEST_DB)
+        try:
+            rows = connection.execute(
+                f"SELECT trace FROM slow_requests {where} "
+                "ORDER BY duration_ms DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        finally:
+            connection.close()
+        return [_summary(json.loads(row[0])) for row in rows]
+
+    with _lock:
+        entries = list(_buffer or ())
+    entries = [
+        entry
+        for entry in entries
+        if (not reason or entry["reason"] == reason)
+        and (not path or path in entry["path"])
+        and (min_ms is None or entry["duration_ms"] >= min_ms)
+    ]
+    entries.sort(key=lambda entry: -entry["duration_ms"])
+    return [_summary(entry) for entry in entries[:limit]]
+
+
+def get_slow_request(trace_id: str) -> Dict[str, Any]:
+    """The full trace ``trace_id``; raises ``LookupError`` when unknown."""
+    with _lock:
+        for entry in _buffer or ():
+            if entry["id"] == trace_id:
+                return entry
+    if settings.SLOW_REQUEST_DB and os.path.exists(settings.SLOW_REQUEST_DB):
+        connection = _connect(settings.SLOW_REQUEST_DB)
+        try:
+            row = connection.execute(
+                "SELECT trace FROM slow_requests WHERE id = ?", (trace_id,)
+            ).fetchone()
+        finally:
+            connection.close()
+        if row:
+            return json.loads(row[0])
+    raise LookupError(f"Slow request {trace_id} not found")
+
+
+def reset_slow_log() -> None:
+    """Empty this process's buffer (tests)."""
+    global _buffer
+    with _lock:
+        _buffer = None
+    _schema_ready.clear()
+
+
+# ------------------------------------------------------------- middleware
+
+
+class SlowRequestMiddleware:
+    """Trace requests under ``SLOW_REQUEST_PATHS`` and keep the slow ones."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_REQUEST_LOG or not request.path.startswith(
+            tuple(settings.SLOW_REQUEST_PATHS)
+        ):
+            return self.get_response(request)
+
+        trace = RequestTrace()
+        token = _current.set(trace)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        duration_ms = trace.elapsed_ms()
+        if duration_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            reason = "slow"
+        elif random.random() < settings.SLOW_REQUEST_SAMPLE_RATE:
+            reason = "sample"
+        else:
+            return response
+
+        record(
+            {
+                "id": uuid.uuid4().hex,
+                "recorded_at": time.time(),
+                "pid": os.getpid(),
+                "method": request.method,
+                "path": request.path,
+                "query_string": request.META.get("QUERY_STRING", ""),
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 3),
+                "reason": reason,
+                "sql_count": trace.query_count,
+                "sql_ms": round(trace.query_ms, 3),
+                "annotations": trace.annotations,
+                "stages": trace.stages,
+                "statements": trace.statements,
+            }
+        )
+        return response
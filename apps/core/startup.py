@@ -0,0 +1,150 @@
+"""
+Cold-start profiling for web workers.
+
+``profile_startup`` boots the WSGI application in a fresh interpreter - the
+only way to see real import costs, since everything is already imported in
+the calling process - and reports how long boot and the first request took,
+which modules were loaded, and (with ``-X importtime``) the import time of
+each module. The ``profile_startup`` management command prints the report
+and the test suite checks boot against ``STARTUP_BUDGET_MS``.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+# Optional dependencies only some requests need; none of them may be imported
+# while booting a worker.
+LAZY_MODULES = ("openpyxl", "numpy", "msgpack", "rest_framework_simplejwt")
+
+_MARKER = "STARTUP_REPORT "
+
+# Runs in the child interpreter. The WSGI environ is built by hand so that
+# Django's test client is not imported.
+_PROBE = r"""
+import io, json, sys, time
+start = time.perf_counter()
+from backend.wsgi import application
+booted = time.perf_counter()
+report = {"boot_ms": (booted - start) * 1000}
+path = sys.argv[1]
+if path:
+    path, _, query = path.partition("?")
+    status = {}
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    def start_response(line, headers, exc_info=None):
+        status["code"] = int(line.split()[0])
+    b"".join(application(environ, start_response))
+    done = time.perf_counter()
+    report["first_request_ms"] = (done - booted) * 1000
+    report["status"] = status.get("code")
+report["modules"] = sorted(sys.modules)
+print("STARTUP_REPORT " + json.dumps(report), flush=True)
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of ``-X importtime`` output as ``{module, self_ms, cumulative_ms, depth}``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # The header line ("self [us] | cumulative | imported package").
+            continue
+        stripped = name.rstrip().lstrip(" ")
+        rows.append(
+            {
+                "module": stripped,
+                "self_ms": round(self_us / 1000, 3),
+                "cumulative_ms": round(cumulative_us / 1000, 3),
+                "depth": (len(name.rstrip()) - len(stripped) - 1) // 2,
+            }
+        )
+    return rows
+
+
+def by_package(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Import self-time summed per top-level package, slowest first."""
+    totals = defaultdict(float)
+    for row in rows:
+        totals[row["module"].split(".")[0]] += row["self_ms"]
+    return {
+        name: round(total, 3)
+        for name, total in sorted(totals.items(), key=lambda item: -item[1])
+    }
+
+
+def profile_startup(
+    path: Optional[str] = "/api/health/",
+    importtime: bool = True,
+    env: Optional[Dict[str, str]] = None,
+    timeout: float = 120,
+) -> Dict[str, Any]:
+    """
+    Boot the WSGI app in a new interpreter and serve ``path`` once.
+
+    Returns ``boot_ms``, ``first_request_ms`` and ``status`` (when ``path``
+    is given), ``modules`` (everything imported) and, with ``importtime``,
+    per-module ``imports`` and ``packages`` totals. Import timing adds some
+    overhead, so measure budgets with ``importtime=False``.
+    """
+    child_env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", "backend.settings"
+        ),
+        **(env or {}),
+    }
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE, path or ""]
+
+    result = subprocess.run(
+        command,
+        cwd=str(settings.BASE_DIR),
+        env=child_env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith(_MARKER)]
+    if result.returncode or not lines:
+        tail = "\n".join(result.stderr.splitlines()[-20:])
+        raise RuntimeError(f"Startup probe failed ({result.returncode}):\n{tail}")
+
+    report = json.loads(lines[-1][len(_MARKER) :])
+    report["boot_ms"] = round(report["boot_ms"], 3)
+    if "first_request_ms" in report:
+        report["first_request_ms"] = round(report["first_request_ms"], 3)
+    report["lazy_modules_loaded"] = [
+        name for name in LAZY_MODULES if name in set(report["modules"])
+    ]
+    if importtime:
+        report["imports"] = parse_importtime(result.stderr)
+        report["packages"] = by_package(report["imports"])
+    return report
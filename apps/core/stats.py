@@ -0,0 +1,184 @@
+"""
+Aggregates behind the system stats endpoint.
+
+Catalog figures come from one grouped query cached per catalog version; cache
+telemetry comes from Redis ``INFO`` plus a bounded ``SCAN`` and is itself
+cached for a few seconds, so polling dashboards cost next to nothing.
+"""
+
+import time
+from collections import Counter
+from typing import Any, Dict
+
+from django.core.cache import cache, caches
+from django.db.models import Count
+
+from apps.products.catalog import catalog_cache_key
+from apps.products.models import (
+    OCCASION_BITS,
+    SEASON_BITS,
+    Product,
+)
+
+CATALOG_STATS_TTL = 3600
+TELEMETRY_TTL = 10
+TELEMETRY_KEY = "system_cache_telemetry"
+
+RECOMMENDATION_KEY_PATTERN = "*outfit_rec_*"
+SCAN_LIMIT = 10000
+SCAN_BATCH = 1000
+MEMORY_SAMPLE = 200
+
+# Response keys predate the grouped query and are kept for API clients.
+CATEGORY_LABELS = {
+    "top": "tops",
+    "bottom": "bottoms",
+    "footwear": "footwear",
+    "accessory": "accessories",
+}
+
+
+def compute_catalog_stats() -> Dict[str, Any]:
+    """
+    Product totals, per-category active/inactive counts and the occasion and
+    season distribution of active products, from a single grouped query.
+    """
+    rows = (
+        Product.objects.order_by()
+        .values("category", "is_active", "occasion_mask", "season_mask")
+        .annotate(count=Count("id"))
+    )
+
+    total = active = 0
+    by_category = Counter()
+    by_category_active = Counter()
+    occasions = Counter()
+    seasons = Counter()
+    for row in rows:
+        count = row["count"]
+        total += count
+        by_category[row["category"]] += count
+        if not row["is_active"]:
+            continue
+        active += count
+        by_category_active[row["category"]] += count
+        for occasion, bit in OCCASION_BITS.items():
+            if row["occasion_mask"] & bit:
+                occasions[occasion] += count
+        for season, bit in SEASON_BITS.items():
+            if row["season_mask"] & bit:
+                seasons[season] += count
+
+    return {
+        "total": total,
+        "active": active,
+        "inactive": total - active,
+        "by_category": {
+            label: by_category[category] for category, label in CATEGORY_LABELS.items()
+        },
+        "active_by_category": {
+            label: by_category_active[category]
+            for category, label in CATEGORY_LABELS.items()
+        },
+        "occasions": {occasion: occasions[occasion] for occasion in OCCASION_BITS},
+        "seasons": {season: seasons[season] for season in SEASON_BITS},
+    }
+
+
+def get_catalog_stats() -> Dict[str, Any]:
+    """``compute_catalog_stats`` cached against the catalog version."""
+    key = catalog_cache_key("catalog_stats")
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_catalog_stats()
+        cache.set(key, stats, CATALOG_STATS_TTL)
+    return stats
+
+
+def _redis_connection():
+    """Raw client behind the default cache, or ``None`` for non-Redis caches."""
+    backend = caches["default"]
+    if not hasattr(backend, "client") or not hasattr(backend.client, "get_client"):
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def collect_redis_telemetry(client) -> Dict[str, Any]:
+    """Memory, eviction and hit-rate figures plus recommendation key usage."""
+    info = client.info()
+    hits = info.get("keyspace_hits", 0)
+    misses = info.get("keyspace_misses", 0)
+    lookups = hits + misses
+    telemetry = {
+        "backend": "Redis",
+        "status": "connected",
+        "redis_version": info.get("redis_version"),
+        "used_memory": info.get("used_memory"),
+        "used_memory_human": info.get("used_memory_human"),
+        "maxmemory": info.get("maxmemory"),
+        "evicted_keys": info.get("evicted_keys", 0),
+        "expired_keys": info.get("expired_keys", 0),
+        "keyspace_hits": hits,
+        "keyspace_misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "total_keys": client.dbsize(),
+    }
+    telemetry["recommendation_keys"] = _scan_recommendation_keys(client)
+    return telemetry
+
+
+def _scan_recommendation_keys(client) -> Dict[str, Any]:
+    """
+    Count ``outfit_rec_*`` keys with an incremental ``SCAN`` (capped at
+    ``SCAN_LIMIT``) and estimate their size from a ``MEMORY USAGE`` sample.
+    """
+    keys = []
+    complete = True
+    for key in client.scan_iter(match=RECOMMENDATION_KEY_PATTERN, count=SCAN_BATCH):
+        if len(keys) >= SCAN_LIMIT:
+            complete = False
+            break
+        keys.append(key)
+
+    sample = keys[:MEMORY_SAMPLE]
+    sizes = []
+    for key in sample:
+        try:
+            size = client.memory_usage(key)
+        except Exception:
+            break
+        if size is not None:
+            sizes.append(size)
+
+    average = sum(sizes) / len(sizes) if sizes else None
+    return {
+        "count": len(keys),
+        "count_is_exact": complete,
+        "sampled": len(sizes),
+        "avg_bytes": round(average) if average is not None else None,
+        "estimated_bytes": round(average * len(keys)) if average is not None else None,
+    }
+
+
+def get_cache_telemetry() -> Dict[str, Any]:
+    """Cache telemetry, refreshed at most every ``TELEMETRY_TTL`` seconds."""
+    backend = caches["default"].__class__.__name__
+    try:
+        telemetry = cache.get(TELEMETRY_KEY)
+        if telemetry is not None:
+            return telemetry
+
+        started = time.perf_counter()
+        client = _redis_connection()
+        if client is None:
+            telemetry = {"backend": backend, "status": "connected"}
+        else:
+            telemetry = collect_redis_telemetry(client)
+        telemetry["collected_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        telemetry["collection_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        cache.set(TELEMETRY_KEY, telemetry, TELEMETRY_TTL)
+        return telemetry
+    except Exception as exc:
+        return {"backend": backend, "status": "disconnected", "error": str(exc)}
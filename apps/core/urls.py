@@ -3,9 +3,32 @@ Core URL patterns.
 """
 
 from django.urls import path
-from .views import HealthCheckView, SystemStatsView
+from .views import (
+    HealthCheckView,
+    MemoryObjectsView,
+    MemorySnapshotDetailView,
+    MemorySnapshotListView,
+    MemoryStatusView,
+    SlowRequestDetailView,
+    SlowRequestListView,
+    SystemStatsView,
+)
 
 urlpatterns = [
     path('health/', HealthCheckView.as_view(), name='health-check'),
     path('stats/', SystemStatsView.as_view(), name='system-stats'),
+    path('diagnostics/memory/', MemoryStatusView.as_view(), name='memory-status'),
+    path('diagnostics/memory/snapshots/', MemorySnapshotListView.as_view(), name='memory-snapshots'),
+    path(
+        'diagnostics/memory/snapshots/<int:snapshot_id>/',
+        MemorySnapshotDetailView.as_view(),
+        name='memory-snapshot-detail',
+    ),
+    path('diagnostics/memory/objects/', MemoryObjectsView.as_view(), name='memory-objects'),
+    path('diagnostics/slow-requests/', SlowRequestListView.as_view(), name='slow-requests'),
+    path(
+        'diagnostics/slow-requests/<str:trace_id>/',
+        SlowRequestDetailView.as_view(),
+        name='slow-request-detail',
+    ),
 ]
\ No newline at end of file
@@ -5,12 +5,28 @@ Core views - Health check and system stats.
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from django.http import Http404
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+import os
 import time
 
-from apps.products.models import Product
+from .admission import admission_stats
+from .memory import (
+    DEFAULT_LIMIT as MEMORY_DEFAULT_LIMIT,
+    memory_status,
+    object_counts,
+    snapshot_stats,
+    start_tracing,
+    stop_tracing,
+    take_snapshot,
+)
+from .pool import pool_stats
+from .slowlog import get_slow_request, slow_requests
+from .stats import get_cache_telemetry, get_catalog_stats
 
 
 class HealthCheckView(APIView):
@@ -67,39 +83,206 @@ class SystemStatsView(APIView):
     @extend_schema(
         tags=['Health'],
         summary='System Statistics',
-        description='Get system statistics including product counts and cache info.',
+        description='Get product counts, occasion/season distribution, cache telemetry, database pool metrics and concurrency limiter state.',
         responses={
             200: OpenApiResponse(description='Statistics retrieved successfully'),
         }
     )
     def get(self, request):
-        # Get product statistics
-        total_products = Product.objects.count()
-        products_by_category = {
-            'tops': Product.objects.filter(category='top').count(),
-            'bottoms': Product.objects.filter(category='bottom').count(),
-            'footwear': Product.objects.filter(category='footwear').count(),
-            'accessories': Product.objects.filter(category='accessory').count(),
-        }
-        
-        # Get cache statistics
-        try:
-            cache_info = {
-                'backend': 'Redis',
-                'status': 'connected'
-            }
-        except Exception:
-            cache_info = {
-                'backend': 'Redis',
-                'status': 'disconnected'
-            }
-        
+        # Catalog figures are cached per catalog version and cache telemetry
+        # for a few seconds, so polling this endpoint rarely touches either.
+        catalog = get_catalog_stats()
+
         return Response({
             'success': True,
-            'products': {
-                'total': total_products,
-                'by_category': products_by_category
-            },
-            'cache': cache_info,
+            'products': catalog,
+            'cache': get_cache_telemetry(),
+            'database_pools': pool_stats(),
+            'admission': admission_stats(),
             'api_version': '1.0.0'
-        })
\ No newline at end of file
+        })
+
+
+class StaffDiagnosticsView(APIView):
+    """
+    Base for staff-only diagnostics endpoints.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def _int_param(params, name, default=None):
+        value = params.get(name, default)
+        if value is None or value == '':
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} must be an integer')
+
+    @staticmethod
+    def _error(exc, status_code=status.HTTP_400_BAD_REQUEST):
+        return Response({'success': False, 'error': str(exc)}, status=status_code)
+
+
+class MemoryDiagnosticsView(StaffDiagnosticsView):
+    """
+    Base for the memory diagnostics endpoints: 404 unless
+    ``MEMORY_DIAGNOSTICS`` is enabled.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        if not settings.MEMORY_DIAGNOSTICS:
+            raise Http404
+        super().initial(request, *args, **kwargs)
+
+
+class MemoryStatusView(MemoryDiagnosticsView):
+    """
+    Process memory status; POST starts or stops tracemalloc.
+    """
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Memory status',
+        description='RSS, tracemalloc state, stored snapshots and per-view peak allocations of the worker serving the request. Staff only.',
+    )
+    def get(self, request):
+        return Response({'success': True, **memory_status()})
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Start or stop tracemalloc',
+        description='Body: {"tracing": true|false, "frames": 1}. Only allocations made after tracing starts are attributed.',
+    )
+    def post(self, request):
+        try:
+            if request.data.get('tracing', True):
+                start_tracing(self._int_param(request.data, 'frames', 1))
+            else:
+                stop_tracing()
+        except ValueError as exc:
+            return self._error(exc)
+        return Response({'success': True, **memory_status()})
+
+
+class MemorySnapshotListView(MemoryDiagnosticsView):
+    """
+    Stored tracemalloc snapshots; POST takes a new one.
+    """
+
+    @extend_schema(tags=['Diagnostics'], summary='List memory snapshots')
+    def get(self, request):
+        return Response({'success': True, 'snapshots': memory_status()['snapshots']})
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Take a memory snapshot',
+        description='Snapshot current allocations. Written to MEMORY_SNAPSHOT_DIR when configured.',
+    )
+    def post(self, request):
+        try:
+            snapshot = take_snapshot()
+        except ValueError as exc:
+            return self._error(exc)
+        return Response({'success': True, 'snapshot': snapshot}, status=status.HTTP_201_CREATED)
+
+
+class MemorySnapshotDetailView(MemoryDiagnosticsView):
+    """
+    Top allocation sites of a snapshot, or growth since another snapshot.
+    """
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Memory snapshot statistics',
+        description='Largest allocation sites, grouped by file or line. With compare_to, the sites that grew most since that snapshot.',
+        parameters=[
+            OpenApiParameter(name='group_by', description='lineno (default) or filename'),
+            OpenApiParameter(name='compare_to', type=int, description='Id of an earlier snapshot'),
+            OpenApiParameter(name='limit', type=int, description='Sites to return (default 25)'),
+        ],
+    )
+    def get(self, request, snapshot_id):
+        params = request.query_params
+        try:
+            result = snapshot_stats(
+                snapshot_id,
+                compare_to=self._int_param(params, 'compare_to'),
+                group_by=params.get('group_by', 'lineno'),
+                limit=self._int_param(params, 'limit', MEMORY_DEFAULT_LIMIT),
+            )
+        except LookupError as exc:
+            return self._error(exc, status.HTTP_404_NOT_FOUND)
+        except ValueError as exc:
+            return self._error(exc)
+        return Response({'success': True, **result})
+
+
+class MemoryObjectsView(MemoryDiagnosticsView):
+    """
+    Live object counts by type.
+    """
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Live objects by type',
+        description='Counts of objects tracked by the garbage collector, largest first. Runs a full collection first.',
+        parameters=[OpenApiParameter(name='limit', type=int, description='Types to return (default 25)')],
+    )
+    def get(self, request):
+        try:
+            limit = self._int_param(request.query_params, 'limit', MEMORY_DEFAULT_LIMIT)
+        except ValueError as exc:
+            return self._error(exc)
+        return Response({'success': True, 'pid': os.getpid(), 'objects': object_counts(limit)})
+
+
+class SlowRequestListView(StaffDiagnosticsView):
+    """
+    Slowest traced requests.
+    """
+
+    @extend_schema(
+        tags=['Diagnostics'],
+        summary='Slow requests',
+        description='Kept request traces, slowest first: requests over SLOW_REQUEST_THRESHOLD_MS and a random sample of the rest. Staff only.',
+        parameters=[
+            OpenApiParameter(name='limit', type=int, description='Traces to return (default 50, max 500)'),
+            OpenApiParameter(name='reason', description='slow or sample'),
+            OpenApiParameter(name='path', description='Only paths containing this'),
+            OpenApiParameter(name='min_ms', type=int, description='Only requests at least this slow'),
+        ],
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = self._int_param(params, 'limit', 50)
+            min_ms = self._int_param(params, 'min_ms')
+            if not 1 <= limit <= 500:
+                raise ValueError('limit must be between 1 and 500')
+        except ValueError as exc:
+            return self._error(exc)
+        traces = slow_requests(
+            limit=limit, reason=params.get('reason'), path=params.get('path'), min_ms=min_ms
+        )
+        return Response({
+            'success': True,
+            'threshold_ms': settings.SLOW_REQUEST_THRESHOLD_MS,
+            'sample_rate': settings.SLOW_REQUEST_SAMPLE_RATE,
+            'requests': traces,
+        })
+
+
+class SlowRequestDetailView(StaffDiagnosticsView):
+    """
+    One request trace with its stages and SQL statements.
+    """
+
+    @extend_schema(tags=['Diagnostics'], summary='Slow request trace')
+    def get(self, request, trace_id):
+        try:
+            trace = get_slow_request(trace_id)
+        except LookupError as exc:
+            return self._error(exc, status.HTTP_404_NOT_FOUND)
+        return Response({'success': True, 'request': trace})
@@ -8,7 +8,6 @@ from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from io import BytesIO
-import openpyxl
 from .utils import import_products_from_workbook_rows
 
 
@@ -78,6 +77,8 @@ class ProductAdmin(admin.ModelAdmin):
                 messages.error(request, "No file uploaded")
                 return redirect("..")
             try:
+                import openpyxl  # Lazy import: only the upload view needs it
+
                 wb = openpyxl.load_workbook(filename=BytesIO(f.read()), read_only=True)
                 ws = wb[wb.sheetnames[0]]
                 rows = list(ws.iter_rows(values_only=True))
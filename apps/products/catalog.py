@@ -0,0 +1,71 @@
+"""
+Catalog version counter.
+
+A single integer stored in the cache and bumped on every product, occasion or
+season write. Anything derived from the catalog (counts, facets, cached
+responses) can key on it and never needs explicit invalidation.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "catalog_version"
+CATALOG_MODIFIED_KEY = "catalog_modified"
+
+
+def _seed_version() -> int:
+    # Seeding from the clock keeps versions unique even if the cache is
+    # flushed, so stale keys built on an older counter can never collide.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version() -> int:
+    """Current catalog version, initialised on first use."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _seed_version(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def get_catalog_modified() -> float:
+    """Unix timestamp of the last catalog write (or of first use)."""
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        cache.add(CATALOG_MODIFIED_KEY, time.time(), None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def bump_catalog_version() -> int:
+    """Advance the catalog version after a write and return the new value."""
+    try:
+        version = cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, _seed_version(), None)
+        version = cache.incr(CATALOG_VERSION_KEY)
+    cache.set(CATALOG_MODIFIED_KEY, time.time(), None)
+    return version
+
+
+def bump_catalog_version_on_commit(using=None) -> None:
+    """
+    Bump the catalog version once the current transaction commits.
+
+    Repeated calls inside one transaction schedule a single bump, so a write
+    touching many rows invalidates catalog caches once rather than per row.
+    """
+    connection = transaction.get_connection(using)
+    # Callbacks registered in a savepoint that rolls back are dropped from
+    # run_on_commit, so a later write in the same transaction re-registers.
+    if any(entry[1] is bump_catalog_version for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(bump_catalog_version, using=using)
+
+
+def catalog_cache_key(prefix: str, *parts) -> str:
+    """Cache key namespaced by the current catalog version."""
+    suffix = "_".join(str(part) for part in parts)
+    return f"{prefix}_{get_catalog_version()}_{suffix}"
@@ -0,0 +1,169 @@
+"""
+Streaming catalog export as CSV, NDJSON or XLSX.
+
+Rows are read with ``values().iterator(chunk_size=...)`` and occasions and
+seasons are fetched once per chunk, so memory stays bounded by the chunk
+size whatever the catalog size. Each format is a generator of byte strings,
+suitable for ``StreamingHttpResponse`` or for writing to a file.
+
+Columns follow the importer (``utils.import_products_from_workbook_rows``)
+plus a leading ``id`` it ignores, so an export can be imported again; list
+values (tags, occasions, seasons) are comma-separated in CSV and XLSX.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator
+
+import orjson
+
+from .fastpath import relation_values
+
+COLUMNS = (
+    "id",
+    "name",
+    "sku",
+    "category",
+    "sub_category",
+    "color",
+    "style",
+    "gender",
+    "price",
+    "price_range",
+    "image_url",
+    "tags",
+    "occasions",
+    "seasons",
+    "description",
+)
+_VALUE_FIELDS = tuple(c for c in COLUMNS if c not in ("occasions", "seasons"))
+_LIST_COLUMNS = ("tags", "occasions", "seasons")
+
+CHUNK_SIZE = 2000
+# Bytes buffered before a text format yields.
+FLUSH_BYTES = 64 * 1024
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+FORMATS = tuple(CONTENT_TYPES)
+
+
+def export_rows(queryset, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Product dicts with ``COLUMNS`` keys, in ``queryset`` order."""
+    using = queryset.db
+    rows = queryset.prefetch_related(None).values(*_VALUE_FIELDS).iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        relations = relation_values([row["id"] for row in chunk], using=using)
+        for row in chunk:
+            row["occasions"] = [
+                item["occasion"] for item in relations["occasions"][row["id"]]
+            ]
+            row["seasons"] = [item["season"] for item in relations["seasons"][row["id"]]]
+            row["price"] = str(row["price"])
+            if not isinstance(row["tags"], list):
+                row["tags"] = [row["tags"]] if row["tags"] else []
+            yield row
+
+
+def _flat(row: Dict[str, Any]) -> list:
+    return [
+        ", ".join(str(v) for v in row[c]) if c in _LIST_COLUMNS else row[c]
+        for c in COLUMNS
+    ]
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow(_flat(row))
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def stream_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    parts, size = [], 0
+    for row in rows:
+        line = orjson.dumps(row) + b"\n"
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+def stream_xlsx(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    XLSX is a zip archive written once the last row is in, so rows go to a
+    write-only workbook (which spools them to disk) and the finished file is
+    streamed from a temporary file.
+    """
+    import openpyxl  # Lazy import: only XLSX exports need it
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("products")
+    sheet.append(COLUMNS)
+    for row in rows:
+        sheet.append(_flat(row))
+
+    with tempfile.TemporaryFile() as handle:
+        workbook.save(handle)
+        handle.seek(0)
+        while True:
+            data = handle.read(FLUSH_BYTES)
+            if not data:
+                break
+            yield data
+
+
+_WRITERS = {"csv": stream_csv, "ndjson": stream_ndjson, "xlsx": stream_xlsx}
+
+
+def stream_export(
+    queryset, file_format: str, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Bytes of ``queryset`` exported as ``file_format``."""
+    if file_format not in _WRITERS:
+        raise ValueError(
+            f"Unknown export format {file_format!r}; choose one of {', '.join(FORMATS)}"
+        )
+    return _WRITERS[file_format](export_rows(queryset, chunk_size))
+
+
+def export_filename(file_format: str) -> str:
+    return f"products.{file_format}"
+
+
+def write_export(queryset, file_format: str, path, chunk_size: int = CHUNK_SIZE) -> int:
+    """Export to ``path`` atomically; returns the bytes written."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            for data in stream_export(queryset, file_format, chunk_size):
+                handle.write(data)
+                written += len(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return written
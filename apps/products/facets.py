@@ -0,0 +1,74 @@
+"""
+Faceted counts for the product filters.
+
+All facets are computed from one ``GROUP BY`` over the filtered catalog and
+cached per catalog version, so repeated calls with the same filters never
+reach the database.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .catalog import catalog_cache_key
+
+FACET_FIELDS = ["category", "style", "color", "price_range", "gender"]
+FACET_CACHE_TTL = 300
+
+
+def compute_facets(queryset, fields: List[str] = FACET_FIELDS) -> Dict:
+    """
+    Value counts for each of ``fields`` over ``queryset``.
+
+    Returns ``{"total": n, "facets": {field: [{"value", "count"}, ...]}}``
+    with each facet ordered by descending count, then value.
+    """
+    rows = (
+        queryset.order_by()
+        .prefetch_related(None)
+        .values(*fields)
+        .annotate(count=Count("id"))
+    )
+    counters = {field: Counter() for field in fields}
+    total = 0
+    for row in rows:
+        total += row["count"]
+        for field in fields:
+            counters[field][row[field]] += row["count"]
+
+    return {
+        "total": total,
+        "facets": {
+            field: [
+                {"value": value, "count": count}
+                for value, count in sorted(
+                    counter.items(), key=lambda item: (-item[1], str(item[0]))
+                )
+            ]
+            for field, counter in counters.items()
+        },
+    }
+
+
+def facet_cache_key(params: Dict[str, List[str]]) -> str:
+    """Cache key for a set of applied filters, namespaced by catalog version."""
+    normalized = {key: sorted(values) for key, values in params.items() if values}
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return catalog_cache_key("product_facets", digest)
+
+
+def get_facets(queryset, params: Dict[str, List[str]]) -> Dict:
+    """
+    Cached ``compute_facets``. ``params`` are the filters that produced
+    ``queryset`` and only serve as the cache key.
+    """
+    key = facet_cache_key(params)
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(queryset)
+        cache.set(key, result, FACET_CACHE_TTL)
+    return result
@@ -0,0 +1,159 @@
+"""
+Serializer-free read path for product list and detail responses.
+
+Rows come straight from ``values()`` with only the serializer's columns and
+are turned into response dicts without instantiating a serializer per row.
+Output is identical to ``ProductListSerializer`` / ``ProductSerializer``:
+fields are taken in the serializers' order and any field that does more than
+pass the value through (decimals, datetimes) is formatted with the
+serializer's own field instance. Writes keep using the serializers.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Aggregate, CharField, OuterRef, Subquery
+from rest_framework import serializers
+
+from .models import Product, ProductOccasion, ProductSeason
+from .serializers import ProductListSerializer, ProductSerializer
+
+RELATION_FIELDS = ("occasions", "seasons")
+
+# Field types whose representation of a database value is the value itself.
+_PASSTHROUGH = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.JSONField,
+)
+
+
+class RowFormatter:
+    """Builds serializer-shaped dicts from ``values()`` rows."""
+
+    def __init__(self, serializer_class, exclude: Iterable[str] = ()):
+        fields = serializer_class().fields
+        self.columns = [name for name in fields if name not in exclude]
+        self.formatters: Dict[str, Callable[[Any], Any]] = {
+            name: fields[name].to_representation
+            for name in self.columns
+            if not isinstance(fields[name], _PASSTHROUGH)
+        }
+
+    def __call__(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        data = {name: row[name] for name in self.columns}
+        for name, formatter in self.formatters.items():
+            if data[name] is not None:
+                data[name] = formatter(data[name])
+        return data
+
+
+@lru_cache(maxsize=None)
+def _formatter(kind: str) -> RowFormatter:
+    # Built on first use: serializers cannot be instantiated at import time,
+    # before the app registry is ready.
+    if kind == "list":
+        return RowFormatter(ProductListSerializer)
+    return RowFormatter(ProductSerializer, exclude=RELATION_FIELDS)
+
+
+def list_values(queryset):
+    """``values()`` queryset with exactly the list serializer's columns."""
+    return queryset.prefetch_related(None).values(*_formatter("list").columns)
+
+
+def serialize_list(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """``ProductListSerializer(..., many=True).data`` for ``list_values`` rows."""
+    formatter = _formatter("list")
+    return [formatter(row) for row in rows]
+
+
+class _GroupConcat(Aggregate):
+    """Comma-joined values: ``GROUP_CONCAT`` on SQLite, ``STRING_AGG`` on Postgres."""
+
+    function = "GROUP_CONCAT"
+    template = "%(function)s(%(expressions)s, ',')"
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="STRING_AGG", **extra_context
+        )
+
+
+def _joined(model, column: str) -> Subquery:
+    """A product's ``column`` values in ``model``, joined by ``_GroupConcat``."""
+    return Subquery(
+        model.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(joined=_GroupConcat(column))
+        .values("joined")
+    )
+
+
+def relation_values(
+    product_ids: List[int], using: Optional[str] = None
+) -> Dict[str, Dict[int, List[Dict]]]:
+    """
+    Occasions and seasons for ``product_ids``, aggregated per product in one
+    query and sorted by value like ``ProductViewSet``'s prefetches. ``using``
+    pins the database, e.g. to the one the products were read from.
+    """
+    relations = {
+        "occasions": (ProductOccasion, "occasion"),
+        "seasons": (ProductSeason, "season"),
+    }
+    rows = (
+        Product.objects.using(using)
+        .filter(pk__in=product_ids)
+        .annotate(
+            **{
+                f"{name}_joined": _joined(model, column)
+                for name, (model, column) in relations.items()
+            }
+        )
+        .values_list("pk", *(f"{name}_joined" for name in relations))
+    )
+    grouped = {name: {pk: [] for pk in product_ids} for name in relations}
+    for product_id, *joined in rows:
+        for (name, (_, column)), values in zip(relations.items(), joined):
+            values = sorted(values.split(",")) if values else []
+            grouped[name][product_id] = [{column: value} for value in values]
+    return grouped
+
+
+def serialize_details(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """``ProductSerializer(..., many=True).data`` for ``detail_values`` rows."""
+    formatter = _formatter("detail")
+    rows = list(rows)
+    relations = relation_values([row["id"] for row in rows])
+    results = []
+    for row in rows:
+        data = formatter(row)
+        for name in RELATION_FIELDS:
+            data[name] = relations[name][row["id"]]
+        results.append(data)
+    return results
+
+
+def detail_values(queryset):
+    """``values()`` queryset with the detail serializer's own columns."""
+    return queryset.prefetch_related(None).values(*_formatter("detail").columns)
+
+
+def get_product_detail(queryset, pk) -> Optional[Dict[str, Any]]:
+    """
+    ``ProductSerializer(product).data`` for ``pk`` in ``queryset``, or None -
+    also for a ``pk`` that is not a valid id, like ``get_object_or_404``.
+    """
+    try:
+        queryset = queryset.filter(pk=pk)
+    except (TypeError, ValueError, ValidationError):
+        return None
+    rows = list(detail_values(queryset)[:1])
+    if not rows:
+        return None
+    return serialize_details(rows)[0]
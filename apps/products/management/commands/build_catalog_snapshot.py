@@ -0,0 +1,60 @@
+"""
+Build the shared catalog snapshot that worker processes memory-map.
+
+Usage:
+    python manage.py build_catalog_snapshot
+    python manage.py build_catalog_snapshot --dir /var/run/outfits/snapshots
+
+Run it before starting the workers (e.g. on deploy) so they map the catalog
+instead of each encoding it; workers publish newer snapshots themselves
+after catalog changes. Defaults to ``settings.CATALOG_SNAPSHOT_DIR``.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.catalog import get_catalog_version
+from apps.products.similarity import CatalogSimilarityIndex
+from apps.products.snapshot import CatalogSnapshot
+
+
+class Command(BaseCommand):
+    help = "Write the memory-mapped catalog snapshot shared by worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            dest="directory",
+            help="Snapshot directory. Defaults to CATALOG_SNAPSHOT_DIR.",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"] or getattr(settings, "CATALOG_SNAPSHOT_DIR", "")
+        if not directory:
+            raise CommandError("Set CATALOG_SNAPSHOT_DIR or pass --dir.")
+
+        start = time.perf_counter()
+        index = CatalogSimilarityIndex()
+        index.sync(get_catalog_version())
+        built = time.perf_counter() - start
+
+        path = index.publish(directory)
+        if path is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Snapshot not written: it is already current or another "
+                    "process is publishing one."
+                )
+            )
+            return
+
+        snapshot = CatalogSnapshot(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {path}: {len(index)} products, "
+                f"{snapshot.nbytes / 1e6:.1f} MB, version {snapshot.version} "
+                f"(encoded in {built:.2f}s, total {time.perf_counter() - start:.2f}s)"
+            )
+        )
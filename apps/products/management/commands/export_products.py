@@ -0,0 +1,64 @@
+"""
+Export the catalog as CSV, NDJSON or XLSX.
+
+Usage:
+    python manage.py export_products --format csv --output products.csv
+    python manage.py export_products --format ndjson --category top > tops.ndjson
+    python manage.py export_products --format xlsx --output products.xlsx
+
+Rows are streamed in chunks, so memory use does not grow with the catalog.
+CSV and XLSX use the column layout ``import_products`` accepts. Only active
+products are exported unless ``--include-inactive`` is given.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.export import CHUNK_SIZE, FORMATS, stream_export, write_export
+from apps.products.models import Product
+
+FILTERS = ("category", "style", "color", "price_range", "gender")
+
+
+class Command(BaseCommand):
+    help = "Stream the product catalog to a CSV, NDJSON or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="file_format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--output", help="File to write (atomically). Defaults to stdout."
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--include-inactive", action="store_true", help="Export inactive products too."
+        )
+        for name in FILTERS:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+
+    def handle(self, *args, **options):
+        file_format = options["file_format"]
+        if file_format == "xlsx" and not options["output"]:
+            raise CommandError("XLSX is binary; pass --output.")
+
+        queryset = Product.objects.order_by("category", "name", "id")
+        if not options["include_inactive"]:
+            queryset = queryset.filter(is_active=True)
+        filters = {name: options[name] for name in FILTERS if options[name]}
+        queryset = queryset.filter(**filters)
+
+        start = time.perf_counter()
+        if options["output"]:
+            written = write_export(
+                queryset, file_format, options["output"], options["chunk_size"]
+            )
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote {options['output']} ({written / 1e6:.1f} MB) in {elapsed:.2f}s"
+                )
+            )
+            return
+
+        for data in stream_export(queryset, file_format, options["chunk_size"]):
+            self.stdout.write(data.decode(), ending="")
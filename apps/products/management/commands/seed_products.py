@@ -9,7 +9,14 @@ from pathlib import Path
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from apps.products.models import Product, ProductOccasion, ProductSeason
+from apps.products.catalog import bump_catalog_version
+from apps.products.models import (
+    Product,
+    ProductOccasion,
+    ProductSeason,
+    occasion_mask,
+    season_mask,
+)
 
 
 class Command(BaseCommand):
@@ -114,8 +121,7 @@ class Command(BaseCommand):
         self.stdout.write(f"Importing {len(products_data)} products (skipped {skipped})...")
 
         with transaction.atomic():
-            ProductOccasion.objects.all().delete()
-            ProductSeason.objects.all().delete()
+            # Relation rows go with their products (fast-deleted by cascade).
             Product.objects.all().delete()
 
             occasion_relations = []
@@ -125,7 +131,11 @@ class Command(BaseCommand):
                 occasions = product_data.pop("occasions", [])
                 seasons = product_data.pop("seasons", [])
 
-                product = Product.objects.create(**product_data)
+                product = Product.objects.create(
+                    **product_data,
+                    occasion_mask=occasion_mask(occasions),
+                    season_mask=season_mask(seasons),
+                )
 
                 for occasion in occasions:
                     occasion_relations.append(ProductOccasion(product=product, occasion=occasion))
@@ -138,6 +148,8 @@ class Command(BaseCommand):
             if season_relations:
                 ProductSeason.objects.bulk_create(season_relations, ignore_conflicts=True)
 
+        bump_catalog_version()
+
         self.stdout.write(self.style.SUCCESS(f"Seeded {len(products_data)} products (skipped {skipped})"))
 
     def parse_tags(self, raw):
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0002_product_description_product_sku"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["category", "style", "gender", "color"],
+                name="products_active_candidate_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productoccasion",
+            index=models.Index(
+                fields=["occasion", "product"], name="product_occ_occasion_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productseason",
+            index=models.Index(
+                fields=["season", "product"], name="product_sea_season_idx"
+            ),
+        ),
+    ]
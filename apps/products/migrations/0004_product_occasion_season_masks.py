@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:45
+
+from django.db import migrations, models
+
+# Frozen copies of the bit order in apps.products.models at the time of this
+# migration; the backfill must not change if choices are appended later.
+OCCASIONS = [
+    "office",
+    "casual",
+    "party",
+    "wedding",
+    "date",
+    "interview",
+    "beach",
+    "vacation",
+    "weekend",
+    "outdoor",
+    "formal",
+    "brunch",
+]
+SEASONS = ["summer", "winter", "spring", "fall", "all"]
+
+
+def backfill_masks(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductOccasion = apps.get_model("products", "ProductOccasion")
+    ProductSeason = apps.get_model("products", "ProductSeason")
+
+    occasion_bits = {value: 1 << index for index, value in enumerate(OCCASIONS)}
+    season_bits = {value: 1 << index for index, value in enumerate(SEASONS)}
+
+    masks = {}
+    for product_id, occasion in ProductOccasion.objects.values_list(
+        "product_id", "occasion"
+    ).iterator():
+        entry = masks.setdefault(product_id, [0, 0])
+        entry[0] |= occasion_bits.get(occasion, 0)
+    for product_id, season in ProductSeason.objects.values_list(
+        "product_id", "season"
+    ).iterator():
+        entry = masks.setdefault(product_id, [0, 0])
+        entry[1] |= season_bits.get(season, 0)
+
+    batch = []
+    for product_id, (occasion_mask, season_mask) in masks.items():
+        batch.append(
+            Product(id=product_id, occasion_mask=occasion_mask, season_mask=season_mask)
+        )
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ["occasion_mask", "season_mask"])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ["occasion_mask", "season_mask"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0003_candidate_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="occasion_mask",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="season_mask",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+"""
+Full-text search index for products.
+
+Postgres gets a generated ``search_vector`` column with a GIN index plus a
+trigram index on ``name``; SQLite gets an external-content FTS5 table kept in
+sync by triggers. Both update themselves on every insert and update,
+including ``bulk_create``. Other backends are left untouched and fall back to
+``icontains`` search.
+
+SQLite drops triggers when a migration rebuilds the ``products`` table, so
+such migrations must recreate the ``products_fts_*`` triggers.
+"""
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE products ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(sub_category, '')), 'B')
+        || setweight(jsonb_to_tsvector('simple', coalesce(tags, '[]'::jsonb), '["string"]'), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX products_search_vector_idx ON products USING gin (search_vector)",
+    "CREATE INDEX products_name_trgm_idx ON products USING gin (name gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS products_name_trgm_idx",
+    "DROP INDEX IF EXISTS products_search_vector_idx",
+    "ALTER TABLE products DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, sub_category, tags,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, sub_category, tags)
+        VALUES (new.id, new.name, new.sub_category, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, sub_category, tags)
+        VALUES ('delete', old.id, old.name, old.sub_category, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF name, sub_category, tags
+    ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, sub_category, tags)
+        VALUES ('delete', old.id, old.name, old.sub_category, old.tags);
+        INSERT INTO products_fts(rowid, name, sub_category, tags)
+        VALUES (new.id, new.name, new.sub_category, new.tags);
+    END
+    """,
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS products_fts_update",
+    "DROP TRIGGER IF EXISTS products_fts_delete",
+    "DROP TRIGGER IF EXISTS products_fts_insert",
+    "DROP TABLE IF EXISTS products_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_FORWARD, POSTGRES_REVERSE),
+    "sqlite": (SQLITE_FORWARD, SQLITE_REVERSE),
+}
+
+
+def _run(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[index]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0005_listing_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,46 @@
+"""
+Product change log, seeded with one entry per existing product so a consumer
+starting from ``since=0`` receives the whole catalog.
+
+Only adds a table and an index: ``products`` is not rebuilt, so the SQLite
+``products_fts_*`` triggers from 0006 survive.
+"""
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    schema_editor.execute(
+        "INSERT INTO product_changes (product_id, changed_at) "
+        "SELECT id, updated_at FROM products ORDER BY id"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0006_product_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductChange",
+            fields=[
+                ("seq", models.BigAutoField(primary_key=True, serialize=False)),
+                ("product_id", models.BigIntegerField()),
+                ("changed_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "product_changes",
+                "ordering": ["seq"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["updated_at", "id"],
+                name="products_active_updated_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,9 @@
 Product models for the outfit recommendation system.
 """
 
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Case, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -65,6 +67,13 @@ class Product(models.Model):
     sku = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     description = models.TextField(blank=True, null=True)
     tags = models.JSONField(default=list, blank=True)
+
+    # Denormalized bitsets of the related occasions/seasons (see
+    # OCCASION_BITS/SEASON_BITS) so candidate filtering and scoring need no
+    # joins. Kept in sync by the serializers, importers and signals.
+    occasion_mask = models.PositiveIntegerField(default=0)
+    season_mask = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -76,13 +85,83 @@ class Product(models.Model):
             models.Index(fields=["category", "style"]),
             models.Index(fields=["category", "color"]),
             models.Index(fields=["style", "color"]),
+            # Covers the recommendation candidate query, which only ever
+            # looks at active products.
+            models.Index(
+                fields=["category", "style", "gender", "color"],
+                name="products_active_candidate_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Keyset pagination seeks on these orderings; ``id`` makes each
+            # position unique.
+            models.Index(
+                fields=["category", "name", "id"],
+                name="products_active_listing_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["name", "id"],
+                name="products_active_name_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["price", "id"],
+                name="products_active_price_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                name="products_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["updated_at", "id"],
+                name="products_active_updated_idx",
+                condition=models.Q(is_active=True),
+            ),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.category})"
 
 
-class ProductOccasion(models.Model):
+class ProductRelationQuerySet(models.QuerySet):
+    """
+    Occasion/season rows; deleting them resyncs the owning products.
+
+    Handled here rather than with ``post_delete`` receivers, whose mere
+    presence stops Django from fast-deleting these rows when a product is
+    deleted.
+    """
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            product_ids = set(self.values_list("product_id", flat=True))
+            result = super().delete()
+            relations_changed(product_ids, using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class ProductRelation(models.Model):
+    """Common behaviour of the occasion/season relation rows."""
+
+    objects = ProductRelationQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            relations_changed([self.product_id], using=using)
+        return result
+
+
+class ProductOccasion(ProductRelation):
     """
     Many-to-many relationship for product occasions.
     """
@@ -110,12 +189,17 @@ class ProductOccasion(models.Model):
     class Meta:
         db_table = "product_occasions"
         unique_together = ["product", "occasion"]
+        indexes = [
+            models.Index(
+                fields=["occasion", "product"], name="product_occ_occasion_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.occasion}"
 
 
-class ProductSeason(models.Model):
+class ProductSeason(ProductRelation):
     """
     Many-to-many relationship for product seasons.
     """
@@ -136,6 +220,146 @@ class ProductSeason(models.Model):
     class Meta:
         db_table = "product_seasons"
         unique_together = ["product", "season"]
+        indexes = [
+            models.Index(fields=["season", "product"], name="product_sea_season_idx"),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.season}"
+
+
+class ProductSearchEntry(models.Model):
+    """
+    A row of the SQLite ``products_fts`` full-text index (see
+    ``apps.products.search``).
+
+    Unmanaged: migration 0006 creates the FTS5 table on SQLite only. The
+    model exists so search can join the index through the ORM.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_entry",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "products_fts"
+
+
+class ProductChange(models.Model):
+    """
+    Append-only log of product writes (see ``apps.products.changes``).
+
+    ``product_id`` is a plain integer rather than a foreign key so entries
+    outlive the product they record the deletion of.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    product_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "product_changes"
+        ordering = ["seq"]
+
+    def __str__(self):
+        return f"#{self.seq} product {self.product_id}"
+
+
+# Bit positions follow the order of the choices. Only ever append new values:
+# reordering would silently change the meaning of stored masks.
+OCCASION_BITS = {
+    value: 1 << index
+    for index, (value, _) in enumerate(ProductOccasion.OCCASION_CHOICES)
+}
+SEASON_BITS = {
+    value: 1 << index for index, (value, _) in enumerate(ProductSeason.SEASON_CHOICES)
+}
+
+
+def occasion_mask(occasions) -> int:
+    """Bitmask for an iterable of occasion values; unknown values are ignored."""
+    mask = 0
+    for occasion in occasions:
+        mask |= OCCASION_BITS.get(occasion, 0)
+    return mask
+
+
+def season_mask(seasons) -> int:
+    """Bitmask for an iterable of season values; unknown values are ignored."""
+    mask = 0
+    for season in seasons:
+        mask |= SEASON_BITS.get(season, 0)
+    return mask
+
+
+def occasions_from_mask(mask: int) -> list:
+    """Occasion values set in ``mask``, in choice order."""
+    return [value for value, bit in OCCASION_BITS.items() if mask & bit]
+
+
+def seasons_from_mask(mask: int) -> list:
+    """Season values set in ``mask``, in choice order."""
+    return [value for value, bit in SEASON_BITS.items() if mask & bit]
+
+
+def _mask_subquery(model, field: str, bits: dict) -> Coalesce:
+    # (product, value) is unique, so summing the distinct bits is their OR.
+    mask = Sum(
+        Case(
+            *(When(**{field: value}, then=Value(bit)) for value, bit in bits.items()),
+            default=Value(0),
+            output_field=models.PositiveIntegerField(),
+        )
+    )
+    rows = (
+        model.objects.filter(product_id=OuterRef("pk"))
+        .order_by()
+        .values("product_id")
+        .annotate(mask=mask)
+        .values("mask")
+    )
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def sync_product_masks(product_ids, using=None) -> None:
+    """
+    Recompute ``occasion_mask``/``season_mask`` for ``product_ids`` from the
+    relation tables in a single ``UPDATE``.
+    """
+    from django.utils import timezone
+
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+
+    Product.objects.using(using or router.db_for_write(Product)).filter(
+        pk__in=product_ids
+    ).update(
+        occasion_mask=_mask_subquery(ProductOccasion, "occasion", OCCASION_BITS),
+        season_mask=_mask_subquery(ProductSeason, "season", SEASON_BITS),
+        updated_at=timezone.now(),
+    )
+
+
+def relations_changed(product_ids, using=None) -> None:
+    """
+    Resync masks, log the change and schedule one catalog version bump after
+    occasion/season rows of ``product_ids`` were written or deleted.
+    """
+    from .catalog import bump_catalog_version_on_commit
+    from .changes import record_changes
+
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+
+    using = using or router.db_for_write(Product)
+    sync_product_masks(product_ids, using=using)
+    record_changes(product_ids, using=using)
+    bump_catalog_version_on_commit(using=using)
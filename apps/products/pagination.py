@@ -0,0 +1,375 @@
+"""
+Pagination for the product catalog.
+
+``ProductPagination`` keeps the page-number interface the frontend uses, with
+the ``COUNT(*)`` cached per catalog version, and switches to keyset (cursor)
+pagination when a ``cursor`` parameter is present. Keyset pages are found by
+seeking on the ordering columns instead of ``OFFSET``, so page latency does
+not depend on how deep the client has paged.
+"""
+
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .catalog import catalog_cache_key
+
+COUNT_CACHE_TTL = 300
+MAX_PAGE_SIZE = 100
+
+
+def cached_count(queryset) -> int:
+    """``queryset.count()`` memoized per catalog version and query."""
+    sql_hash = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    key = catalog_cache_key("product_count", sql_hash)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+def estimated_count(queryset) -> int:
+    """
+    Planner row estimate for ``queryset`` on Postgres; exact (cached) count
+    on other backends.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return cached_count(queryset)
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CachedCountPaginator(Paginator):
+    """Django paginator whose total count is served from the cache."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            return cached_count(self.object_list)
+        return len(self.object_list)
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """Page-number pagination backed by ``CachedCountPaginator``."""
+
+    django_paginator_class = CachedCountPaginator
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(category, name, id)``, or over the fields in
+    the ``ordering`` parameter followed by ``id``.
+
+    Cursors are opaque base64 tokens holding the boundary row's ordering
+    values. The total is only computed on request: ``count=exact`` (cached
+    per catalog version) or ``count=approx`` (planner estimate on Postgres).
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    count_query_param = "count"
+    default_ordering = ("category", "name")
+    allowed_ordering = ("price", "name", "created_at", "updated_at", "category")
+    page_size = 20
+    max_page_size = MAX_PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.fields = [field.lstrip("-") for field in self.ordering]
+        self.model = queryset.model
+        self.db = queryset.db
+
+        position, reverse = self.decode_cursor(request)
+        self.count = self.get_count(queryset, request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        selected = getattr(queryset, "_fields", None)
+        if selected:
+            # values() rows must carry the ordering columns to build cursors.
+            missing = [field for field in self.fields if field not in selected]
+            if missing:
+                queryset = queryset.values(*selected, *missing)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    # -- request parsing -----------------------------------------------------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        raw = request.query_params.get(self.ordering_query_param)
+        fields = []
+        if raw:
+            for term in raw.split(","):
+                term = term.strip()
+                if term.lstrip("-") in self.allowed_ordering:
+                    fields.append(term)
+        if not fields:
+            fields = list(self.default_ordering)
+        if fields in (["category"], ["-category"]):
+            # Only the listing index orders by category; seek along it.
+            fields.append(fields[0].replace("category", "name"))
+        # ``id`` breaks ties so every row has a unique position; it follows
+        # the direction of the leading field.
+        descending = fields[0].startswith("-")
+        fields.append("-id" if descending else "id")
+        return fields
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in ("exact", "true", "1"):
+            return cached_count(queryset)
+        if mode == "approx":
+            return estimated_count(queryset)
+        return None
+
+    # -- cursors -------------------------------------------------------------
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload["o"] != ",".join(self.ordering):
+                raise ValueError("ordering changed")
+            values = payload["v"]
+            if len(values) != len(self.fields):
+                raise ValueError("wrong arity")
+            position = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get("r"))
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            AttributeError,
+            FieldDoesNotExist,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = [
+            self._json_value(self._row_value(row, field)) for field in self.fields
+        ]
+        payload = {"o": ",".join(self.ordering), "v": values}
+        if reverse:
+            payload["r"] = 1
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        )
+        return token.decode().rstrip("=")
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last_row, False)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.first_row, True)
+        )
+
+    # -- helpers -------------------------------------------------------------
+
+    def _seek_filter(self, position, reverse):
+        """
+        Rows strictly after ``position`` in the (possibly reversed) ordering.
+
+        When every term runs the same way this is a row-value comparison,
+        ``(a, b, id) > (x, y, z)``, which the planner answers with a range
+        seek on the matching ``(a, b, id)`` index. Mixed directions have no
+        row-value form; they expand to ``(a > x) OR (a = x AND b > y) OR ...``
+        with a redundant ``a >= x`` bound so the seek still starts on the
+        leading column.
+        """
+        directions = [term.startswith("-") != reverse for term in self.ordering]
+        if len(set(directions)) == 1:
+            quote = connections[self.db].ops.quote_name
+            table = quote(self.model._meta.db_table)
+            columns = ", ".join(
+                f"{table}.{quote(self.model._meta.get_field(field).column)}"
+                for field in self.fields
+            )
+            placeholders = ", ".join(["%s"] * len(self.fields))
+            operator = "<" if directions[0] else ">"
+            return RawSQL(
+                f"({columns}) {operator} ({placeholders})",
+                [
+                    self.model._meta.get_field(field).get_db_prep_value(
+                        value, connections[self.db]
+                    )
+                    for field, value in zip(self.fields, position)
+                ],
+                output_field=BooleanField(),
+            )
+
+        condition = Q()
+        equal = Q()
+        for field, value, descending in zip(self.fields, position, directions):
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        leading = "lte" if directions[0] else "gte"
+        return Q(**{f"{self.fields[0]}__{leading}": position[0]}) & condition
+
+    @staticmethod
+    def _flip(term):
+        return term[1:] if term.startswith("-") else f"-{term}"
+
+    @staticmethod
+    def _row_value(row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
+
+    @staticmethod
+    def _json_value(value):
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Keyset pagination cursor; pass an empty value for the "
+                    "first page."
+                ),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include a total in cursor mode: exact or approx.",
+                "schema": {"type": "string", "enum": ["exact", "approx"]},
+            },
+        ]
+
+
+class ProductPagination(BasePagination):
+    """
+    Page-number pagination by default; keyset pagination when the request
+    carries a ``cursor`` parameter (``?cursor=`` for the first page).
+    """
+
+    def __init__(self):
+        self.page_number = CachedCountPageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.active = self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset.cursor_query_param in request.query_params:
+            self.active = self.keyset
+        else:
+            self.active = self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(
+            view
+        ) + self.keyset.get_schema_operation_parameters(view)
+
+    def to_html(self):
+        return self.active.to_html() if self.active is self.page_number else ""
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.active, "display_page_controls", False)
@@ -0,0 +1,124 @@
+"""
+Full-text product search.
+
+Postgres matches against the generated ``search_vector`` column (GIN
+indexed) with a ``pg_trgm`` similarity fallback on ``name`` for typos;
+SQLite matches against the ``products_fts`` FTS5 table. Both are maintained
+by the database itself (generated column / triggers, see migration 0006), so
+``save()``, ``bulk_create`` and the spreadsheet importer need no extra work.
+Other backends fall back to DRF's ``icontains`` search.
+"""
+
+import re
+from typing import List
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .models import Product
+
+FTS_TABLE = "products_fts"
+TRIGRAM_THRESHOLD = 0.3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_tokens(terms: List[str]) -> List[str]:
+    """Lower-cased word tokens of the search terms, in order, de-duplicated."""
+    tokens = []
+    for term in terms:
+        for token in _TOKEN_RE.findall(term.lower()):
+            if token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def fts5_query(tokens: List[str]) -> str:
+    """FTS5 ``MATCH`` expression requiring every token as a prefix."""
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def tsquery(tokens: List[str]) -> str:
+    """``to_tsquery`` expression requiring every token as a prefix."""
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def search_products(queryset, terms: List[str]):
+    """
+    Restrict ``queryset`` to products matching ``terms`` and annotate a
+    ``search_rank`` (higher is more relevant).
+
+    Returns ``None`` when the database has no full-text index, so callers can
+    fall back to a plain scan.
+    """
+    tokens = search_tokens(terms)
+    if not tokens:
+        return None
+
+    vendor = connections[queryset.db].vendor
+    table = Product._meta.db_table
+    if vendor == "postgresql":
+        query = tsquery(tokens)
+        raw = " ".join(terms)
+        match = RawSQL(
+            f'("{table}"."search_vector" @@ to_tsquery(\'simple\', %s) '
+            f'OR "{table}"."name" %% %s)',
+            [query, raw],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f'ts_rank_cd("{table}"."search_vector", to_tsquery(\'simple\', %s)) '
+            f'+ similarity("{table}"."name", %s)',
+            [query, raw],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.alias(search_match=match)
+            .filter(search_match=True)
+            .annotate(search_rank=rank)
+        )
+
+    if vendor == "sqlite":
+        # Join the FTS table (ProductSearchEntry) instead of matching or
+        # ranking in a subquery: FTS5 then evaluates MATCH once and drives the
+        # join by rowid. bm25() is lower-is-better, so negate it to sort like
+        # Postgres; column weights favour the name over sub-category and tags.
+        match = RawSQL(
+            f'"{FTS_TABLE}" MATCH %s', [fts5_query(tokens)], output_field=BooleanField()
+        )
+        rank = RawSQL(
+            f'-bm25("{FTS_TABLE}", 10.0, 4.0, 2.0)', [], output_field=FloatField()
+        )
+        return (
+            queryset.filter(search_entry__isnull=False)
+            .filter(match)
+            .annotate(search_rank=rank)
+        )
+
+    return None
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ``SearchFilter`` backed by the full-text index.
+
+    Results are ordered by relevance unless the request passes an explicit
+    ``ordering``; keyset pagination applies its own ordering on top. Place
+    it after ``OrderingFilter`` so the default ordering does not win.
+    """
+
+    ordering_param = "ordering"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        matched = search_products(queryset, terms)
+        if matched is None:
+            return super().filter_queryset(request, queryset, view)
+        if not request.query_params.get(self.ordering_param):
+            matched = matched.order_by("-search_rank", "id")
+        return matched
@@ -1,8 +1,15 @@
 """DRF serializers for products."""
 
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import Product, ProductOccasion, ProductSeason
+from .models import (
+    Product,
+    ProductOccasion,
+    ProductSeason,
+    occasion_mask,
+    season_mask,
+)
 
 
 class ProductOccasionSerializer(serializers.ModelSerializer):
@@ -88,12 +95,22 @@ class ProductCreateSerializer(serializers.ModelSerializer):
             "seasons",
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
-        occasions = validated_data.pop("occasions", [])
-        seasons = validated_data.pop("seasons", [])
-        product = Product.objects.create(**validated_data)
-        for occ in occasions:
-            ProductOccasion.objects.create(product=product, occasion=occ)
-        for sea in seasons:
-            ProductSeason.objects.create(product=product, season=sea)
+        occasions = list(dict.fromkeys(validated_data.pop("occasions", [])))
+        seasons = list(dict.fromkeys(validated_data.pop("seasons", [])))
+        product = Product.objects.create(
+            **validated_data,
+            occasion_mask=occasion_mask(occasions),
+            season_mask=season_mask(seasons),
+        )
+        # bulk_create skips the mask-sync signals; the masks are set above.
+        # The change log entry from the product's save commits together with
+        # these rows, so no consumer sees the product without them.
+        ProductOccasion.objects.bulk_create(
+            [ProductOccasion(product=product, occasion=occ) for occ in occasions]
+        )
+        ProductSeason.objects.bulk_create(
+            [ProductSeason(product=product, season=sea) for sea in seasons]
+        )
         return product
@@ -0,0 +1,29 @@
+"""
+Signal handlers keeping denormalized product data and the change log in sync.
+
+Deleting occasion/season rows is handled by ``ProductRelation`` itself: a
+``post_delete`` receiver on those models would stop product deletes from
+fast-deleting their relation rows.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version_on_commit
+from .changes import record_changes
+from .models import Product, ProductOccasion, ProductSeason, relations_changed
+
+
+@receiver(post_save, sender=ProductOccasion)
+@receiver(post_save, sender=ProductSeason)
+def relation_saved(sender, instance, using, **kwargs):
+    """Refresh the owning product's occasion/season masks."""
+    relations_changed([instance.product_id], using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, using, **kwargs):
+    """Log the write and invalidate catalog-derived caches once committed."""
+    record_changes([instance.pk], using=using)
+    bump_catalog_version_on_commit(using=using)
@@ -0,0 +1,599 @@
+"""
+"More like this" nearest-neighbour search over product feature vectors.
+
+Every active product is encoded as a fixed-length, L2-normalised vector:
+
+- one-hot ``category``, ``style``, ``gender`` and ``price_range``;
+- a color embedding: membership in each ``COLOR_GROUPS`` family plus the
+  exact color hashed into a few buckets;
+- the ``occasion_mask`` / ``season_mask`` bits;
+- ``sub_category`` and ``tags`` tokens hashed into a fixed number of buckets.
+
+Each block is normalised and weighted before the row is normalised, so the
+dot product of two rows is their cosine similarity. ``SimilarityIndex``
+keeps the vectors in one NumPy matrix and answers queries with a brute-force
+matrix-vector product for small catalogs, or an IVF index (spherical k-means
+partitions, probing the closest few) once the catalog outgrows
+``IVF_THRESHOLD``. The process-wide index is refreshed incrementally when the
+catalog version changes: it follows the product change log
+(``apps.products.changes``) from the last ``seq`` it applied and re-encodes
+only the products logged since.
+
+With ``CATALOG_SNAPSHOT_DIR`` set, the index is shared between the worker
+processes of a host through a memory-mapped snapshot (``.snapshot``): workers
+map the current snapshot instead of encoding the catalog, apply any newer
+changes on top (copying the arrays only then), and swap to a new snapshot as
+soon as one is published. After a catalog change the first worker to catch
+up publishes the next snapshot in the background.
+"""
+
+import logging
+import re
+import threading
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from apps.recommendations.services.constants import COLOR_GROUPS
+
+from .catalog import get_catalog_version
+from .changes import latest_seq
+from .models import OCCASION_BITS, SEASON_BITS, Product, ProductChange
+from .snapshot import CatalogSnapshot, SnapshotWatcher, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ENCODED_FIELDS = (
+    "id",
+    "category",
+    "style",
+    "gender",
+    "price_range",
+    "color",
+    "sub_category",
+    "tags",
+    "occasion_mask",
+    "season_mask",
+)
+
+COLOR_HASH_DIMS = 8
+TOKEN_HASH_DIMS = 64
+
+# Above this many products queries go through the IVF index.
+IVF_THRESHOLD = 20000
+# Partitions probed per IVF query.
+IVF_NPROBE = 8
+# Change log entries applied per query during an incremental sync.
+SYNC_BATCH_SIZE = 5000
+KMEANS_ITERATIONS = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _choices(field: str) -> Dict[str, int]:
+    return {
+        value: index
+        for index, (value, _) in enumerate(Product._meta.get_field(field).choices)
+    }
+
+
+CATEGORY_CODES = _choices("category")
+_ONE_HOT = {
+    "category": CATEGORY_CODES,
+    "style": _choices("style"),
+    "gender": _choices("gender"),
+    "price_range": _choices("price_range"),
+}
+_COLOR_GROUP_NAMES = list(COLOR_GROUPS)
+
+# (block, size, weight)
+_BLOCKS = (
+    ("category", len(_ONE_HOT["category"]), 2.0),
+    ("style", len(_ONE_HOT["style"]), 1.0),
+    ("gender", len(_ONE_HOT["gender"]), 0.75),
+    ("price_range", len(_ONE_HOT["price_range"]), 0.75),
+    ("color_group", len(_COLOR_GROUP_NAMES), 0.75),
+    ("color", COLOR_HASH_DIMS, 0.75),
+    ("occasion", len(OCCASION_BITS), 0.5),
+    ("season", len(SEASON_BITS), 0.5),
+    ("tokens", TOKEN_HASH_DIMS, 1.0),
+)
+DIMENSIONS = sum(size for _, size, _ in _BLOCKS)
+# Snapshots made by a different encoder are ignored.
+ENCODER_FINGERPRINT = zlib.crc32(
+    repr((_BLOCKS, _ONE_HOT, COLOR_GROUPS, OCCASION_BITS, SEASON_BITS)).encode()
+)
+
+
+def _bucket(token: str, dims: int) -> int:
+    # crc32 rather than hash(): buckets must agree across processes.
+    return zlib.crc32(token.encode()) % dims
+
+
+def _tokens(sub_category: Optional[str], tags: Any) -> List[str]:
+    parts = [sub_category or ""]
+    if isinstance(tags, (list, tuple)):
+        parts.extend(str(tag) for tag in tags)
+    elif tags:
+        parts.append(str(tags))
+    return _TOKEN_RE.findall(" ".join(parts).lower())
+
+
+def _bits(masks: np.ndarray, count: int) -> np.ndarray:
+    return ((masks[:, None] >> np.arange(count)) & 1).astype(np.float32)
+
+
+def encode_products(rows: Sequence[Tuple]) -> np.ndarray:
+    """Encode ``ENCODED_FIELDS`` tuples into a ``(len(rows), DIMENSIONS)`` matrix."""
+    n = len(rows)
+    blocks = {name: np.zeros((n, size), np.float32) for name, size, _ in _BLOCKS}
+    if not n:
+        return np.zeros((0, DIMENSIONS), np.float32)
+
+    columns = dict(zip(ENCODED_FIELDS, zip(*rows)))
+    row_index = np.arange(n)
+    for field, codes in _ONE_HOT.items():
+        values = np.array([codes.get(value, -1) for value in columns[field]])
+        known = values >= 0
+        blocks[field][row_index[known], values[known]] = 1.0
+
+    colors = [str(color or "").lower() for color in columns["color"]]
+    for group_index, group in enumerate(_COLOR_GROUP_NAMES):
+        members = set(COLOR_GROUPS[group])
+        blocks["color_group"][:, group_index] = [color in members for color in colors]
+    blocks["color"][row_index, [_bucket(color, COLOR_HASH_DIMS) for color in colors]] = 1.0
+
+    blocks["occasion"] = _bits(
+        np.array(columns["occasion_mask"], np.int64), len(OCCASION_BITS)
+    )
+    blocks["season"] = _bits(np.array(columns["season_mask"], np.int64), len(SEASON_BITS))
+
+    token_rows, token_cols = [], []
+    for index, (sub_category, tags) in enumerate(
+        zip(columns["sub_category"], columns["tags"])
+    ):
+        for token in _tokens(sub_category, tags):
+            token_rows.append(index)
+            token_cols.append(_bucket(token, TOKEN_HASH_DIMS))
+    np.add.at(blocks["tokens"], (token_rows, token_cols), 1.0)
+
+    weighted = []
+    for name, _, weight in _BLOCKS:
+        block = blocks[name]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        weighted.append(block * (weight / np.maximum(norms, 1e-12)))
+    matrix = np.hstack(weighted)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix.astype(np.float32, copy=False)
+
+
+class SortedPositions(Mapping):
+    """Read-only ``id -> row`` mapping over a sorted id array, without a dict."""
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+
+    def __getitem__(self, product_id: int) -> int:
+        row = int(np.searchsorted(self.ids, product_id))
+        if row < len(self.ids) and self.ids[row] == product_id:
+            return row
+        raise KeyError(product_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+
+class SimilarityIndex:
+    """Product vectors in one matrix, searchable by cosine similarity."""
+
+    def __init__(
+        self,
+        ivf_threshold: int = IVF_THRESHOLD,
+        nprobe: int = IVF_NPROBE,
+        seed: int = 0,
+    ):
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.seed = seed
+        self._lock = threading.RLock()
+        self.ids = np.zeros(0, np.int64)
+        self.vectors = np.zeros((0, DIMENSIONS), np.float32)
+        self.categories = np.zeros(0, np.int8)
+        self.alive = np.zeros(0, bool)
+        self.positions: Dict[int, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, np.int32)
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        # The snapshot whose arrays this index reads, until the first update.
+        self.snapshot: Optional[CatalogSnapshot] = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def uses_ivf(self) -> bool:
+        return self.centroids is not None
+
+    # -- updates --------------------------------------------------------------
+
+    def upsert(self, rows: Sequence[Tuple]) -> None:
+        """Add or re-encode products from ``ENCODED_FIELDS`` tuples."""
+        if not rows:
+            return
+        vectors = encode_products(rows)
+        categories = np.array(
+            [CATEGORY_CODES.get(row[1], -1) for row in rows], np.int8
+        )
+        with self._lock:
+            self._make_private()
+            existing = [self.positions.get(row[0]) for row in rows]
+            old = np.array([pos for pos in existing if pos is not None], np.int64)
+            old_mask = np.array([pos is not None for pos in existing], bool)
+            if len(old):
+                self.vectors[old] = vectors[old_mask]
+                self.categories[old] = categories[old_mask]
+                self.alive[old] = True
+
+            new_mask = ~old_mask
+            if new_mask.any():
+                start = len(self.ids)
+                new_ids = np.array([row[0] for row in rows], np.int64)[new_mask]
+                self.ids = np.concatenate([self.ids, new_ids])
+                self.vectors = np.vstack([self.vectors, vectors[new_mask]])
+                self.categories = np.concatenate([self.categories, categories[new_mask]])
+                self.alive = np.concatenate([self.alive, np.ones(len(new_ids), bool)])
+                self.assignments = np.concatenate(
+                    [self.assignments, np.full(len(new_ids), -1, np.int32)]
+                )
+                for offset, product_id in enumerate(new_ids.tolist()):
+                    self.positions[product_id] = start + offset
+
+            self._reindex([self.positions[row[0]] for row in rows])
+
+    def remove(self, product_ids: Iterable[int]) -> None:
+        with self._lock:
+            product_ids = [pk for pk in product_ids if pk in self.positions]
+            if not product_ids:
+                return
+            self._make_private()
+            rows = [self.positions.pop(pk) for pk in product_ids]
+            self.alive[rows] = False
+            self.assignments[rows] = -1
+            if len(self.positions) < len(self.ids) // 2:
+                self._compact()
+            self._reindex([])
+
+    def _make_private(self) -> None:
+        """Copy snapshot-backed arrays before the first in-place update."""
+        if self.snapshot is None:
+            return
+        self.ids = self.ids.copy()
+        self.vectors = self.vectors.copy()
+        self.categories = self.categories.copy()
+        self.assignments = self.assignments.copy()
+        self.positions = dict(self.positions.items())
+        self.snapshot = None
+
+    # -- snapshots ------------------------------------------------------------
+
+    def snapshot_arrays(self) -> Dict[str, np.ndarray]:
+        """Live rows ordered by id, plus the IVF partitions if there are any."""
+        with self._lock:
+            alive = np.flatnonzero(self.alive)
+            order = alive[np.argsort(self.ids[alive], kind="stable")]
+            arrays = {
+                "ids": self.ids[order],
+                "vectors": self.vectors[order],
+                "categories": self.categories[order],
+            }
+            if self.centroids is not None:
+                assignments = self.assignments[order]
+                arrays["centroids"] = self.centroids
+                arrays["assignments"] = assignments
+                arrays["ivf_rows"] = np.argsort(assignments, kind="stable")
+                arrays["ivf_counts"] = np.bincount(
+                    assignments, minlength=len(self.centroids)
+                )
+            return arrays
+
+    def load_snapshot(self, snapshot: CatalogSnapshot) -> None:
+        """Serve queries from ``snapshot``'s arrays without copying them."""
+        ids = snapshot["ids"]
+        categories = snapshot["categories"]
+        table = snapshot.strings.get("category")
+        if table is not None and table != list(CATEGORY_CODES):
+            # Category choices changed since the snapshot was written.
+            recode = np.array([CATEGORY_CODES.get(name, -1) for name in table], np.int8)
+            categories = recode[categories]
+        with self._lock:
+            self.ids = ids
+            self.vectors = snapshot["vectors"]
+            self.categories = categories
+            self.alive = np.ones(len(ids), bool)
+            self.positions = SortedPositions(ids)
+            if "centroids" in snapshot:
+                self.centroids = snapshot["centroids"]
+                self.assignments = snapshot["assignments"]
+                counts = snapshot["ivf_counts"]
+                self._lists = np.split(snapshot["ivf_rows"], np.cumsum(counts)[:-1])
+                self._trained_size = len(ids)
+            else:
+                self.centroids = None
+                self.assignments = np.full(len(ids), -1, np.int32)
+                self._lists = []
+                self._trained_size = 0
+            self.snapshot = snapshot
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self.alive)
+        self.ids = self.ids[keep]
+        self.vectors = self.vectors[keep]
+        self.categories = self.categories[keep]
+        self.alive = self.alive[keep]
+        self.assignments = self.assignments[keep]
+        self.positions = {pk: row for row, pk in enumerate(self.ids.tolist())}
+
+    def _reindex(self, changed_rows: List[int]) -> None:
+        """Keep the IVF partitions in line with the rows after an update."""
+        size = len(self.positions)
+        if size < self.ivf_threshold:
+            self.centroids = None
+            self._lists = []
+            return
+        if self.centroids is None or size > 2 * self._trained_size:
+            self._train()
+            return
+        if changed_rows:
+            rows = np.array(changed_rows, np.int64)
+            self.assignments[rows] = np.argmax(
+                self.vectors[rows] @ self.centroids.T, axis=1
+            )
+        self._build_lists()
+
+    def _train(self) -> None:
+        alive = np.flatnonzero(self.alive)
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, int(np.sqrt(len(alive))))
+        sample = self.vectors[rng.choice(alive, min(len(alive), nlist * 32), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty partitions keep their previous centroid.
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        self.assignments = np.full(len(self.ids), -1, np.int32)
+        for start in range(0, len(alive), 20000):
+            rows = alive[start : start + 20000]
+            self.assignments[rows] = np.argmax(self.vectors[rows] @ self.centroids.T, axis=1)
+        self._trained_size = len(alive)
+        self._build_lists()
+
+    def _build_lists(self) -> None:
+        order = np.argsort(self.assignments, kind="stable")
+        counts = np.bincount(
+            self.assignments[self.assignments >= 0], minlength=len(self.centroids)
+        )
+        order = order[len(order) - counts.sum() :]
+        self._lists = np.split(order, np.cumsum(counts)[:-1])
+
+    # -- queries --------------------------------------------------------------
+
+    def search(
+        self, product_id: int, limit: int = 10, same_category: bool = True
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        The ``limit`` products most similar to ``product_id`` as
+        ``(id, similarity)`` pairs, best first; None if it is not indexed.
+        """
+        with self._lock:
+            row = self.positions.get(product_id)
+            if row is None:
+                return None
+            query = self.vectors[row]
+            category = self.categories[row] if same_category else None
+
+            if self.centroids is None:
+                return self._top(np.flatnonzero(self.alive), query, row, category, limit)
+
+            closeness = self.centroids @ query
+            nprobe = self.nprobe
+            while True:
+                probe = np.argsort(-closeness)[:nprobe]
+                candidates = np.concatenate([self._lists[p] for p in probe])
+                results = self._top(candidates, query, row, category, limit)
+                if len(results) >= limit or nprobe >= len(self.centroids):
+                    return results
+                nprobe *= 2
+
+    def _top(self, candidates, query, row, category, limit) -> List[Tuple[int, float]]:
+        candidates = candidates[candidates != row]
+        if category is not None:
+            candidates = candidates[self.categories[candidates] == category]
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ query
+        if len(candidates) > limit:
+            # Keep everything tied with the cut-off so ties resolve by id.
+            cutoff = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores >= cutoff
+            candidates, scores = candidates[keep], scores[keep]
+        ids = self.ids[candidates]
+        order = np.lexsort((ids, -scores))[:limit]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+class CatalogSimilarityIndex(SimilarityIndex):
+    """A ``SimilarityIndex`` kept in sync with the active catalog."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.version = None
+        self.seq = None
+
+    @classmethod
+    def from_snapshot(
+        cls, snapshot: CatalogSnapshot, **kwargs
+    ) -> Optional["CatalogSimilarityIndex"]:
+        """An index over ``snapshot``, or None if another encoder wrote it."""
+        if snapshot.meta.get("encoder") != ENCODER_FINGERPRINT:
+            return None
+        index = cls(**kwargs)
+        index.load_snapshot(snapshot)
+        index.version = snapshot.version
+        index.seq = snapshot.seq
+        return index
+
+    def publish(self, directory) -> Optional[str]:
+        """
+        Write this index as the current snapshot in ``directory``.
+
+        Only one process writes at a time; returns the new snapshot's path,
+        or None when another process holds the lock or the current snapshot
+        is already at this version.
+        """
+        directory = _snapshot_dir(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "publish.lock", "w") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return None
+            current = SnapshotWatcher(directory).load()
+            if current is not None and current.version == self.version:
+                return None
+            path = write_snapshot(
+                directory,
+                self.version,
+                self.seq,
+                self.snapshot_arrays(),
+                strings={"category": list(CATEGORY_CODES)},
+                meta={"encoder": ENCODER_FINGERPRINT},
+            )
+        return str(path)
+
+    def sync(self, version) -> None:
+        """Apply every product change logged since the last sync."""
+        if self.seq is None:
+            # Read the cursor first: changes committed while the rows are read
+            # are replayed by the next sync, which is harmless.
+            self.seq = latest_seq()
+            self._apply(Product.objects.order_by())
+        else:
+            while True:
+                entries = list(
+                    ProductChange.objects.filter(seq__gt=self.seq)
+                    .order_by("seq")
+                    .values_list("seq", "product_id")[:SYNC_BATCH_SIZE]
+                )
+                if not entries:
+                    break
+                product_ids = {product_id for _, product_id in entries}
+                found = self._apply(Product.objects.filter(pk__in=product_ids).order_by())
+                # Logged products that no longer exist were deleted.
+                self.remove(product_ids - found)
+                self.seq = entries[-1][0]
+
+        # Writes that bypass the log (raw update() calls) can still
+        # deactivate or delete rows; catch those by count.
+        active = Product.objects.filter(is_active=True)
+        if len(self) != active.count():
+            current = set(active.values_list("id", flat=True))
+            self.remove(set(self.positions) - current)
+        self.version = version
+
+    def _apply(self, products) -> set:
+        """Upsert active and drop inactive ``products``; returns the ids read."""
+        rows = list(products.values_list(*ENCODED_FIELDS, "is_active"))
+        self.upsert([row[:-1] for row in rows if row[-1]])
+        self.remove(row[0] for row in rows if not row[-1])
+        return {row[0] for row in rows}
+
+
+_index: Optional[CatalogSimilarityIndex] = None
+_index_lock = threading.Lock()
+_watcher: Optional[SnapshotWatcher] = None
+_publisher: Optional[threading.Thread] = None
+
+
+def _snapshot_dir(directory=None) -> Optional[Path]:
+    directory = directory or getattr(settings, "CATALOG_SNAPSHOT_DIR", "")
+    return Path(directory) if directory else None
+
+
+def _snapshot_watcher() -> Optional[SnapshotWatcher]:
+    global _watcher
+    directory = _snapshot_dir()
+    if directory is None:
+        return None
+    if _watcher is None or _watcher.directory != directory:
+        _watcher = SnapshotWatcher(
+            directory, getattr(settings, "CATALOG_SNAPSHOT_CHECK_INTERVAL", 1.0)
+        )
+    return _watcher
+
+
+def _publish_in_background(index: CatalogSimilarityIndex) -> None:
+    global _publisher
+    if _publisher is not None and _publisher.is_alive():
+        return
+
+    def publish():
+        try:
+            index.publish(_snapshot_dir())
+        except Exception:
+            logger.exception("Publishing the catalog snapshot failed")
+
+    _publisher = threading.Thread(target=publish, name="catalog-snapshot", daemon=True)
+    _publisher.start()
+
+
+def get_similarity_index() -> CatalogSimilarityIndex:
+    """The process-wide index, synced with the current catalog version."""
+    global _index
+    version = get_catalog_version()
+    watcher = _snapshot_watcher()
+    new_snapshot = watcher is not None and watcher.changed()
+    index = _index
+    if index is not None and index.version == version and not new_snapshot:
+        return index
+    with _index_lock:
+        if new_snapshot or (_index is None and watcher is not None):
+            snapshot = watcher.load()
+            # A snapshot older than this worker's own index is only worth
+            # taking when the index needs a sync anyway.
+            if snapshot is not None and (
+                _index is None or snapshot.version == version or _index.version != version
+            ):
+                _index = CatalogSimilarityIndex.from_snapshot(snapshot) or _index
+        if _index is None:
+            _index = CatalogSimilarityIndex()
+        if _index.version != version:
+            _index.sync(version)
+        if watcher is not None and _index.snapshot is None:
+            _publish_in_background(_index)
+        return _index
+
+
+def reset_similarity_index() -> None:
+    global _index, _watcher
+    with _index_lock:
+        _index = None
+        _watcher = None
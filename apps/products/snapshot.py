@@ -0,0 +1,227 @@
+"""
+Memory-mapped catalog snapshots shared by every worker on a host.
+
+A snapshot is one file holding named NumPy arrays and string tables for one
+catalog version. Layout::
+
+    b"CATSNAP1" | header length (uint32, little-endian) | JSON header | arrays
+
+The header records the catalog version, the change log ``seq`` the rows
+reflect (see ``apps.products.changes``), each array's dtype, shape and
+offset (64-byte aligned), the string tables and free-form metadata. Readers
+``mmap`` the file read-only and wrap each array with ``np.frombuffer``, so
+the arrays are views onto the page cache: any number of processes share one
+physical copy and opening a snapshot costs no parsing.
+
+Snapshots are written to a temporary file and renamed into place, then the
+``current`` pointer file is replaced to name the new one, so readers only
+ever see complete files. ``SnapshotWatcher`` notices a new pointer with one
+``stat`` call.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"CATSNAP1"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+POINTER_NAME = "current"
+# Snapshots kept besides the current one, for workers still mapping them.
+KEEP_PREVIOUS = 2
+
+
+class SnapshotError(Exception):
+    """A snapshot file is missing, truncated or of an unknown format."""
+
+
+class CatalogSnapshot:
+    """A read-only, memory-mapped catalog snapshot."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as handle:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map snapshot {self.path}: {e}")
+
+        prefix = len(MAGIC) + 4
+        if self._mmap[: len(MAGIC)] != MAGIC or len(self._mmap) < prefix:
+            raise SnapshotError(f"{self.path} is not a catalog snapshot")
+        (header_length,) = struct.unpack("<I", self._mmap[len(MAGIC) : prefix])
+        try:
+            header = json.loads(self._mmap[prefix : prefix + header_length])
+        except ValueError:
+            raise SnapshotError(f"{self.path} has a corrupt header")
+        if header.get("format") != FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} has unsupported format {header.get('format')}")
+
+        self.version = header["version"]
+        self.seq: Optional[int] = header["seq"]
+        self.strings: Dict[str, List[str]] = header["strings"]
+        self.meta: Dict = header["meta"]
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            count = int(np.prod(shape, dtype=np.int64))
+            if not count:
+                self.arrays[name] = np.zeros(shape, dtype)
+                continue
+            if spec["offset"] + count * dtype.itemsize > len(self._mmap):
+                raise SnapshotError(f"{self.path} is truncated")
+            self.arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=spec["offset"]
+            ).reshape(shape)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+
+def _layout(arrays: Dict[str, np.ndarray], start: int) -> Dict[str, Dict]:
+    specs, offset = {}, start
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        specs[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes
+    return specs
+
+
+def write_snapshot(
+    directory,
+    version: int,
+    seq: Optional[int],
+    arrays: Dict[str, np.ndarray],
+    strings: Optional[Dict[str, List[str]]] = None,
+    meta: Optional[Dict] = None,
+) -> Path:
+    """Write a snapshot, make it current and prune old ones; returns its path."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # Array offsets depend on the header length, which depends on the
+    # offsets; the header is padded to a fixed size once it is long enough.
+    header = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "seq": seq,
+        "strings": strings or {},
+        "meta": meta or {},
+        "arrays": _layout(arrays, 0),
+    }
+    reserved = len(json.dumps(header)) + 64 * (len(arrays) + 1)
+    start = len(MAGIC) + 4 + reserved
+    header["arrays"] = _layout(arrays, start)
+    encoded = json.dumps(header).encode().ljust(reserved)
+
+    path = directory / f"catalog-{version}-{time.time_ns()}.snap"
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+            for name, array in arrays.items():
+                handle.write(b"\0" * (header["arrays"][name]["offset"] - handle.tell()))
+                handle.write(memoryview(array).cast("B"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+        _point_to(directory, path.name)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    _prune(directory, keep=path.name)
+    return path
+
+
+def _point_to(directory: Path, name: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        handle.write(name)
+    os.replace(tmp, directory / POINTER_NAME)
+
+
+def _prune(directory: Path, keep: str) -> None:
+    # Unlinking a mapped file is safe: workers keep their mapping until they
+    # swap, and the space is freed when the last one lets go.
+    snapshots = sorted(
+        (p for p in directory.glob("catalog-*.snap") if p.name != keep),
+        key=lambda p: p.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for stale in snapshots[KEEP_PREVIOUS:]:
+        try:
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def current_snapshot_path(directory) -> Optional[Path]:
+    """The snapshot the pointer file names, or None if there is none."""
+    directory = Path(directory)
+    try:
+        name = (directory / POINTER_NAME).read_text().strip()
+    except FileNotFoundError:
+        return None
+    path = directory / name
+    return path if name and path.exists() else None
+
+
+class SnapshotWatcher:
+    """
+    Detects a new current snapshot in ``directory``.
+
+    The pointer file is checked at most every ``interval`` seconds.
+    """
+
+    def __init__(self, directory, interval: float = 1.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._checked_at = float("-inf")
+        self._seen: Optional[Tuple[int, int]] = None
+
+    def changed(self) -> bool:
+        """True when the pointer file changed since the last call that returned True."""
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return False
+        self._checked_at = now
+        try:
+            stat = os.stat(self.directory / POINTER_NAME)
+        except FileNotFoundError:
+            return False
+        seen = (stat.st_ino, stat.st_mtime_ns)
+        if seen == self._seen:
+            return False
+        self._seen = seen
+        return True
+
+    def load(self) -> Optional[CatalogSnapshot]:
+        """The current snapshot, or None if there is none or it is unreadable."""
+        path = current_snapshot_path(self.directory)
+        if path is None:
+            return None
+        try:
+            return CatalogSnapshot(path)
+        except (SnapshotError, FileNotFoundError):
+            return None
@@ -0,0 +1,264 @@
+"""
+Seeded synthetic catalog generation.
+
+Used by the benchmark and load-test tooling to build catalogs of arbitrary
+size without depending on ``Sample_Products.xlsx``. Product ``n`` is always
+generated from the same random stream for a given seed, so a catalog grown
+from 1k to 10k rows is identical to one built at 10k directly.
+"""
+
+import random
+from decimal import Decimal
+from typing import Dict, Iterator, List, Tuple
+
+from django.db import transaction
+
+from .catalog import bump_catalog_version
+from .changes import record_changes
+from .models import (
+    Product,
+    ProductOccasion,
+    ProductSeason,
+    occasion_mask,
+    season_mask,
+)
+
+SKU_PREFIX = "SYN-"
+CHUNK_SIZE = 1000
+
+CATEGORIES = [choice for choice, _ in Product.CATEGORY_CHOICES]
+STYLES = [choice for choice, _ in Product.STYLE_CHOICES]
+GENDERS = ["male", "female", "unisex"]
+GENDER_WEIGHTS = [4, 4, 2]
+
+# Neutrals dominate real catalogs; weights roughly follow Sample_Products.xlsx.
+COLORS = [
+    ("black", 14),
+    ("white", 12),
+    ("gray", 8),
+    ("navy", 8),
+    ("beige", 6),
+    ("brown", 6),
+    ("blue", 6),
+    ("khaki", 4),
+    ("olive", 4),
+    ("tan", 4),
+    ("burgundy", 3),
+    ("red", 3),
+    ("green", 3),
+    ("pink", 2),
+    ("light_blue", 2),
+    ("cream", 2),
+    ("silver", 1),
+    ("gold", 1),
+    ("multi", 2),
+]
+
+SUB_CATEGORIES = {
+    "top": ["shirt", "t-shirt", "polo", "hoodie", "sweater", "blazer", "jacket"],
+    "bottom": ["jeans", "chinos", "trousers", "shorts", "joggers", "skirt"],
+    "footwear": ["sneakers", "loafers", "boots", "oxfords", "sandals"],
+    "accessory": ["belt", "watch", "cap", "scarf", "bag", "sunglasses", "tie"],
+}
+
+STYLE_OCCASIONS = {
+    "formal": ["office", "interview", "wedding", "formal"],
+    "smart_casual": ["office", "casual", "date", "brunch", "party"],
+    "casual": ["casual", "weekend", "beach", "vacation", "brunch"],
+    "sporty": ["casual", "weekend", "outdoor"],
+}
+
+SEASON_SETS = [
+    ["all"],
+    ["all"],
+    ["spring", "summer"],
+    ["fall", "winter"],
+    ["fall", "winter", "spring"],
+    ["summer"],
+]
+
+PRICE_BANDS = [
+    ("budget", Decimal("5"), Decimal("49")),
+    ("mid", Decimal("50"), Decimal("149")),
+    ("premium", Decimal("150"), Decimal("299")),
+    ("luxury", Decimal("300"), Decimal("900")),
+]
+
+TAG_POOL = [
+    "cotton",
+    "linen",
+    "wool",
+    "denim",
+    "leather",
+    "slim-fit",
+    "regular-fit",
+    "oversized",
+    "classic",
+    "modern",
+    "minimal",
+    "printed",
+    "striped",
+    "solid",
+    "stretch",
+    "breathable",
+]
+
+_COLOR_NAMES = [color for color, _ in COLORS]
+_COLOR_WEIGHTS = [weight for _, weight in COLORS]
+
+
+def _chunk_rng(seed: int, chunk: int) -> random.Random:
+    return random.Random(seed * 1_000_003 + chunk)
+
+
+def iter_synthetic_products(
+    start: int, stop: int, seed: int = 42
+) -> Iterator[Tuple[Dict, List[str], List[str]]]:
+    """
+    Yield ``(product_fields, occasions, seasons)`` for product indexes
+    ``start <= n < stop``.
+    """
+    chunk = start // CHUNK_SIZE
+    n = chunk * CHUNK_SIZE
+    while n < stop:
+        rng = _chunk_rng(seed, chunk)
+        chunk_end = min((chunk + 1) * CHUNK_SIZE, stop)
+        for index in range(chunk * CHUNK_SIZE, chunk_end):
+            item = _generate_product(rng, index, seed)
+            if index >= start:
+                yield item
+        chunk += 1
+        n = chunk * CHUNK_SIZE
+
+
+def _generate_product(rng: random.Random, index: int, seed: int):
+    category = rng.choice(CATEGORIES)
+    style = rng.choice(STYLES)
+    gender = rng.choices(GENDERS, weights=GENDER_WEIGHTS)[0]
+    color = rng.choices(_COLOR_NAMES, weights=_COLOR_WEIGHTS)[0]
+    sub_category = rng.choice(SUB_CATEGORIES[category])
+    price_range, low, high = rng.choice(PRICE_BANDS)
+    price = (low + (high - low) * Decimal(rng.random())).quantize(Decimal("0.01"))
+    tags = rng.sample(TAG_POOL, rng.randint(1, 4))
+
+    style_occasions = STYLE_OCCASIONS[style]
+    occasions = rng.sample(style_occasions, rng.randint(1, len(style_occasions)))
+    seasons = rng.choice(SEASON_SETS)
+
+    fields = {
+        "name": f"{color.replace('_', ' ').title()} {sub_category.title()} {index}",
+        "category": category,
+        "sub_category": sub_category,
+        "color": color,
+        "style": style,
+        "gender": gender,
+        "price": price,
+        "price_range": price_range,
+        "image_url": f"https://example.com/synthetic/{seed}/{index}.jpg",
+        "tags": tags,
+        "sku": f"{SKU_PREFIX}{seed}-{index}",
+        "description": "",
+    }
+    return fields, occasions, seasons
+
+
+def build_synthetic_catalog(
+    size: int, seed: int = 42, start: int = 0, batch_size: int = 5000
+) -> int:
+    """
+    Insert synthetic products ``start..size`` and their occasion/season rows.
+
+    Returns the number of products created.
+    """
+    created = 0
+    batch = []
+
+    for item in iter_synthetic_products(start, size, seed):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            created += _insert_batch(batch)
+            batch = []
+    if batch:
+        created += _insert_batch(batch)
+    # bulk_create sends no signals, so invalidate catalog caches explicitly.
+    bump_catalog_version()
+    return created
+
+
+@transaction.atomic
+def _insert_batch(batch) -> int:
+    products = Product.objects.bulk_create(
+        [
+            Product(
+                **fields,
+                occasion_mask=occasion_mask(occasions),
+                season_mask=season_mask(seasons),
+            )
+            for fields, occasions, seasons in batch
+        ]
+    )
+    if any(product.pk is None for product in products):
+        # Backends without RETURNING support: resolve ids through the SKU.
+        ids = dict(
+            Product.objects.filter(
+                sku__in=[product.sku for product in products]
+            ).values_list("sku", "id")
+        )
+        for product in products:
+            product.pk = ids[product.sku]
+
+    occasion_rows = []
+    season_rows = []
+    for product, (_, occasions, seasons) in zip(products, batch):
+        occasion_rows.extend(
+            ProductOccasion(product_id=product.pk, occasion=occ) for occ in occasions
+        )
+        season_rows.extend(
+            ProductSeason(product_id=product.pk, season=sea) for sea in seasons
+        )
+    ProductOccasion.objects.bulk_create(occasion_rows, batch_size=10000)
+    ProductSeason.objects.bulk_create(season_rows, batch_size=10000)
+    record_changes(product.pk for product in products)
+    return len(products)
+
+
+def synthetic_import_rows(count: int, seed: int = 42) -> Tuple[List[str], List[List]]:
+    """
+    Build ``(headers, rows)`` in the layout accepted by
+    ``import_products_from_workbook_rows``.
+    """
+    headers = [
+        "name",
+        "category",
+        "sub_category",
+        "color",
+        "image_url",
+        "style",
+        "gender",
+        "price",
+        "price_range",
+        "tags",
+        "occasions",
+        "seasons",
+        "sku",
+    ]
+    rows = []
+    for fields, occasions, seasons in iter_synthetic_products(0, count, seed + 1):
+        rows.append(
+            [
+                fields["name"],
+                fields["category"],
+                fields["sub_category"],
+                fields["color"],
+                fields["image_url"],
+                fields["style"],
+                fields["gender"],
+                str(fields["price"]),
+                fields["price_range"],
+                ", ".join(fields["tags"]),
+                ", ".join(occasions),
+                ", ".join(seasons),
+                f"IMP-{fields['sku']}",
+            ]
+        )
+    return headers, rows
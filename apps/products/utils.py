@@ -50,10 +50,11 @@ def _map_gender(value: str):
     if not value:
         return "unisex"
     v = str(value).lower()
-    if "male" in v or v == "m":
-        return "male"
+    # "female" contains "male", so it is checked first.
     if "female" in v or v == "f":
         return "female"
+    if "male" in v or v == "m":
+        return "male"
     return "unisex"
 
 
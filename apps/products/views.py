@@ -2,20 +2,32 @@
 Product views.
 """
 
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
-from .models import Product
+from apps.core.conditional import catalog_conditional
+from apps.core.memory import track_memory
+
+from .changes import DEFAULT_LIMIT, MAX_LIMIT, changes_since, latest_seq
+from .export import CONTENT_TYPES, FORMATS, export_filename, stream_export
+from .facets import get_facets
+from .fastpath import get_product_detail, list_values, serialize_list
+from .models import Product, ProductOccasion, ProductSeason
+from .pagination import ProductPagination
+from .search import ProductSearchFilter
 from .serializers import (
     ProductSerializer,
     ProductListSerializer,
     ProductCreateSerializer,
 )
-import openpyxl
 from io import BytesIO
 import csv
 import io
@@ -71,14 +83,39 @@ class ProductViewSet(viewsets.ModelViewSet):
     ViewSet for Product CRUD operations.
     """
 
+    # Relations are ordered explicitly so serializer output (used by writes)
+    # and the values() fast path (used by reads) agree.
     queryset = Product.objects.filter(is_active=True).prefetch_related(
-        "occasions", "seasons"
+        Prefetch("occasions", queryset=ProductOccasion.objects.order_by("occasion")),
+        Prefetch("seasons", queryset=ProductSeason.objects.order_by("season")),
     )
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # Search runs after ordering so its relevance order wins by default.
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ProductSearchFilter]
     filterset_fields = ["category", "style", "color", "price_range", "gender"]
     search_fields = ["name", "sub_category", "tags"]
-    ordering_fields = ["price", "name", "created_at"]
+    ordering_fields = ["price", "name", "created_at", "updated_at"]
     ordering = ["category", "name"]
+    pagination_class = ProductPagination
+
+    @catalog_conditional
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: values() rows shaped like ProductListSerializer.
+        queryset = list_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_list(page))
+        return Response(serialize_list(queryset))
+
+    @catalog_conditional
+    def retrieve(self, request, *args, **kwargs):
+        # Read-only fast path: values() row shaped like ProductSerializer.
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        data = get_product_detail(
+            self.filter_queryset(self.get_queryset()), kwargs[lookup_url_kwarg]
+        )
+        if data is None:
+            raise Http404
+        return Response(data)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -106,56 +143,220 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Get products by category.
         """
-        products = self.queryset.filter(category=category)
-        serializer = ProductListSerializer(products, many=True)
+        products = serialize_list(list_values(self.queryset.filter(category=category)))
         return Response(
             {
                 "success": True,
                 "category": category,
-                "count": products.count(),
-                "products": serializer.data,
+                "count": len(products),
+                "products": products,
+            }
+        )
+
+    @extend_schema(
+        tags=["Products"],
+        summary="Get similar products",
+        description=(
+            "Products most like this one by category, style, gender, price "
+            "range, color, occasions, seasons and tags, best match first."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="limit", type=int, description="Number of products (1-50, default 10)"
+            ),
+            OpenApiParameter(
+                name="same_category",
+                type=bool,
+                description="Only return products of the same category (default true)",
+            ),
+        ],
+    )
+    @action(detail=True, methods=["get"])
+    @catalog_conditional
+    def similar(self, request, pk=None):
+        """
+        Get the products most similar to this one.
+        """
+        try:
+            product_id = int(pk)
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            return Response(
+                {"success": False, "error": "Invalid product id or limit"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        same_category = request.query_params.get("same_category", "true").lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+
+        # Imported here so numpy is only loaded by workers that serve it.
+        from .similarity import get_similarity_index
+
+        matches = get_similarity_index().search(product_id, limit, same_category)
+        if matches is None:
+            raise Http404
+        scores = dict(matches)
+        rows = {
+            row["id"]: row
+            for row in serialize_list(list_values(self.queryset.filter(id__in=scores)))
+        }
+        products = [
+            {**rows[product_id], "similarity": round(score, 4)}
+            for product_id, score in matches
+            if product_id in rows
+        ]
+        return Response(
+            {
+                "success": True,
+                "product_id": product_id,
+                "count": len(products),
+                "products": products,
             }
         )
 
     @extend_schema(
         tags=["Products"],
         summary="Get available filters",
-        description="Get all available filter options for products.",
+        description=(
+            "Get the available filter options with product counts. Accepts the "
+            "same filter and search parameters as the list endpoint."
+        ),
     )
     @action(detail=False, methods=["get"])
+    @catalog_conditional
     def filters(self, request):
         """
-        Get available filter options.
+        Get available filter options and their counts for the applied filters.
         """
+        queryset = self.filter_queryset(self.get_queryset())
+        params = {
+            key: request.query_params.getlist(key)
+            for key in [*self.filterset_fields, api_settings.SEARCH_PARAM]
+        }
+        result = get_facets(queryset, params)
+        facets = result["facets"]
         return Response(
             {
                 "success": True,
                 "filters": {
-                    "categories": list(
-                        Product.objects.values_list("category", flat=True).distinct()
-                    ),
-                    "styles": list(
-                        Product.objects.values_list("style", flat=True).distinct()
-                    ),
-                    "colors": list(
-                        Product.objects.values_list("color", flat=True).distinct()
-                    ),
-                    "price_ranges": list(
-                        Product.objects.values_list("price_range", flat=True).distinct()
-                    ),
-                    "genders": list(
-                        Product.objects.values_list("gender", flat=True).distinct()
-                    ),
+                    "categories": [f["value"] for f in facets["category"]],
+                    "styles": [f["value"] for f in facets["style"]],
+                    "colors": [f["value"] for f in facets["color"]],
+                    "price_ranges": [f["value"] for f in facets["price_range"]],
+                    "genders": [f["value"] for f in facets["gender"]],
                 },
+                "facets": facets,
+                "total": result["total"],
             }
         )
 
+    @extend_schema(
+        tags=["Products"],
+        summary="Catalog change feed",
+        description=(
+            "Products changed after the change-log sequence number `since`, "
+            "one entry per product in sequence order: `upsert` with the "
+            "product's current data (export layout) or `delete` for products "
+            "that were deleted or deactivated. Pass `next_since` back as "
+            "`since` until `has_more` is false. `since=0` replays the whole "
+            "catalog."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="since", type=int, description="Last sequence number applied"
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description=f"Log entries per batch (default {DEFAULT_LIMIT}, max {MAX_LIMIT})",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    @catalog_conditional
+    def changes(self, request):
+        """
+        Incremental sync: compacted product deltas after a sequence number.
+        """
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+            if since < 0 or not 1 <= limit <= MAX_LIMIT:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {
+                    "success": False,
+                    "error": (
+                        "since must be a non-negative integer and limit an "
+                        f"integer between 1 and {MAX_LIMIT}"
+                    ),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"success": True, **changes_since(since, limit)})
+
+    @extend_schema(
+        tags=["Products"],
+        summary="Export the catalog",
+        description=(
+            "Stream every product matching the list endpoint's filter, search "
+            "and ordering parameters as CSV, NDJSON or XLSX. CSV and XLSX use "
+            "the column layout the upload endpoint accepts."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="csv (default), ndjson or xlsx",
+                enum=FORMATS,
+            ),
+        ],
+        responses={
+            (200, content_type): OpenApiTypes.BINARY
+            for content_type in CONTENT_TYPES.values()
+        },
+    )
+    @action(detail=False, methods=["get"])
+    @catalog_conditional
+    def export(self, request):
+        """
+        Stream the filtered catalog; memory use does not grow with its size.
+        """
+        file_format = request.query_params.get("file_format", "csv").lower()
+        if file_format not in FORMATS:
+            return Response(
+                {
+                    "success": False,
+                    "error": f"file_format must be one of: {', '.join(FORMATS)}",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        # Rows are read while the response streams, after the request has
+        # left the replica router's scope, so the database is fixed now.
+        queryset = queryset.using(queryset.db).order_by(*queryset.query.order_by, "id")
+
+        # Read before the rows: following the change feed from here replays
+        # anything written during the export, which upserts tolerate.
+        change_seq = latest_seq()
+        response = StreamingHttpResponse(
+            stream_export(queryset, file_format), content_type=CONTENT_TYPES[file_format]
+        )
+        response["X-Change-Seq"] = str(change_seq)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{export_filename(file_format)}"'
+        )
+        return response
+
     @extend_schema(
         tags=["Products"],
         summary="Upload products spreadsheet",
         description="Accepts an Excel (.xlsx) or CSV file and imports products in bulk.",
     )
     @action(detail=False, methods=["post"], url_path="upload")
+    @track_memory("upload")
     def upload(self, request):
         """
         Upload a spreadsheet (`.xlsx` or `.csv`) with product rows. First row must be headers.
@@ -186,6 +387,8 @@ class ProductViewSet(viewsets.ModelViewSet):
                 ]
                 result = import_products_from_workbook_rows(rows[1:], headers)
             else:
+                import openpyxl  # Lazy import: openpyxl (and numpy) cost ~150ms at boot
+
                 wb = openpyxl.load_workbook(
                     filename=BytesIO(file_obj.read()), read_only=True
                 )
@@ -2,8 +2,18 @@
 Color service for handling color matching logic.
 """
 
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
 from .constants import COLOR_HARMONY, COLOR_GROUPS
 
+# Every color the harmony rules know about.
+KNOWN_COLORS = frozenset(
+    [color for group in COLOR_GROUPS.values() for color in group]
+    + list(COLOR_HARMONY)
+    + [color for colors in COLOR_HARMONY.values() for color in colors if color != 'all']
+)
+
 
 class ColorService:
     """
@@ -93,4 +103,29 @@ class ColorService:
                 total_score += cls.get_color_harmony_score(color1, color2)
                 comparisons += 1
         
-        return total_score / comparisons if comparisons > 0 else 1.0
\ No newline at end of file
+        return total_score / comparisons if comparisons > 0 else 1.0
+    
+    @classmethod
+    def compatible_color_scores(cls, color: str) -> Tuple[Dict[str, float], Optional[float]]:
+        """
+        Harmony rules compiled for one base color.
+        
+        Returns ``(scores, default)``: ``scores`` maps every compatible known
+        color to its harmony score with ``color``, and ``default`` is the
+        score for any color outside ``scores`` - ``None`` when such colors
+        are incompatible. Lets callers filter and rank candidates in SQL.
+        """
+        return _compile_color_scores(color.lower())
+
+
+@lru_cache(maxsize=None)
+def _compile_color_scores(color: str) -> Tuple[Dict[str, float], Optional[float]]:
+    scores = {
+        other: ColorService.get_color_harmony_score(color, other)
+        for other in KNOWN_COLORS | {color}
+        if ColorService.are_colors_compatible(color, other)
+    }
+    # A color the rules have never heard of only matches a base color that
+    # goes with everything.
+    default = 0.9 if 'all' in COLOR_HARMONY.get(color, []) else None
+    return scores, default
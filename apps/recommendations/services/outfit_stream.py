@@ -0,0 +1,312 @@
+"""
+Ranked outfit streams for "show more outfits".
+
+A stream holds the outfits around one base product, best first, and is paged
+with a cursor. Candidate lists per category come from the cached candidate
+pools, each sorted by color harmony with the base product, and combinations
+are drawn from them in order of summed harmony by a heap over the grid of
+list positions. The stream is ranked lazily, ``BATCH_SIZE`` combinations at
+a time: each batch is scored with ``ScoringService`` and appended in score
+order, so scores never rise within a batch, while batches follow one another
+in harmony order. Regular recommendations are the head of the first batch.
+
+Only compact state is cached - the ranked outfits as tuples of product ids
+and the search frontier - so a page that is already ranked costs a cache
+read, and a page past the ranked part resumes the search where it stopped.
+Streams end after ``MAX_STREAM_LENGTH`` outfits.
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from apps.core.admission import admit
+from apps.core.slowlog import annotate, stage
+from apps.products.catalog import get_catalog_version
+from apps.products.models import Product
+
+from .constants import OUTFIT_CATEGORIES
+from .projection import FULL, Projection
+from .recommendation_service import ProductNotFoundError, RecommendationService
+from .scoring_service import ScoringService
+
+SLOTS = ("top", "bottom", "footwear", "accessory")
+# Combinations drawn from the frontier, scored and sorted per extension.
+BATCH_SIZE = 32
+MAX_PAGE_SIZE = 50
+# Streams stop after this many outfits.
+MAX_STREAM_LENGTH = 500
+# Accessory pairs are only formed from the best few accessories.
+PAIR_CANDIDATES = 8
+
+
+def encode_cursor(version: int, offset: int) -> str:
+    raw = json.dumps({"v": version, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """``(catalog version, offset)`` from a cursor; ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        version, offset = int(data["v"]), int(data["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return version, offset
+
+
+def _accessory_combos(pool: List[Dict]) -> List[List[Dict]]:
+    """Single accessories and pairs of different sub-categories, best first."""
+    combos = [[acc] for acc in pool]
+    head = pool[:PAIR_CANDIDATES]
+    for i in range(len(head)):
+        for j in range(i + 1, len(head)):
+            if head[i].get("sub_category") != head[j].get("sub_category"):
+                combos.append([head[i], head[j]])
+    # Stable sort keeps singles ahead of pairs with the same mean score.
+    combos.sort(key=lambda combo: -_harmony(combo))
+    return combos
+
+
+def _harmony(items: List[Dict]) -> float:
+    if not items:
+        return 0.0
+    return sum(item.get("compatibility_score", 0.0) for item in items) / len(items)
+
+
+class OutfitStream:
+    """The ranked outfit stream for one base product and set of preferences."""
+
+    def __init__(self, base_product: Product, preferences: Dict[str, str], version: int):
+        self.base_product = base_product
+        self.preferences = preferences
+        self.version = version
+        prefs_hash = hashlib.md5(
+            json.dumps(preferences, sort_keys=True).encode()
+        ).hexdigest()
+        self.key = f"outfit_stream_{version}_{base_product.id}_{prefs_hash}"
+        self._options: Optional[Dict[str, List[List[Dict]]]] = None
+        self._harmony: Optional[List[List[float]]] = None
+        self.state = cache.get(self.key)
+        if self.state is None:
+            self.state = self._initial_state()
+
+    # -- candidate lists --------------------------------------------------------
+
+    @property
+    def options(self) -> Dict[str, List[List[Dict]]]:
+        """Per slot, the choices in harmony order; each choice is a list of items."""
+        if self._options is None:
+            base = RecommendationService._serialize_product(self.base_product)
+            missing = [c for c in OUTFIT_CATEGORIES if c != self.base_product.category]
+            pools = RecommendationService._candidate_pools(
+                [self.base_product], missing, self.preferences
+            )
+            annotate(
+                candidate_pools={
+                    category: len(pools[(self.base_product.id, category)])
+                    for category in missing
+                }
+            )
+            options = {}
+            for slot in SLOTS:
+                if slot == self.base_product.category:
+                    options[slot] = [[base]]
+                elif slot == "accessory":
+                    options[slot] = _accessory_combos(
+                        pools[(self.base_product.id, slot)]
+                    ) or [[]]
+                else:
+                    options[slot] = [[item] for item in pools[(self.base_product.id, slot)]]
+            self._options = options
+        return self._options
+
+    @property
+    def harmony(self) -> List[List[float]]:
+        """Per slot, the harmony of each choice with the base product."""
+        if self._harmony is None:
+            self._harmony = [
+                [_harmony(choice) for choice in self.options[slot]] for slot in SLOTS
+            ]
+        return self._harmony
+
+    def _priority(self, position: Tuple[int, ...]) -> float:
+        return -sum(scores[index] for scores, index in zip(self.harmony, position))
+
+    def _initial_state(self) -> Dict[str, Any]:
+        start = (0, 0, 0, 0)
+        if not all(self.harmony):
+            return {"outfits": [], "frontier": [], "seen": []}
+        return {
+            "outfits": [],
+            "frontier": [(self._priority(start), start)],
+            "seen": [start],
+        }
+
+    # -- generation -------------------------------------------------------------
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.state["frontier"] or len(self.state["outfits"]) >= MAX_STREAM_LENGTH
+
+    def extend(self, length: int) -> None:
+        """Rank batches of outfits until the stream holds ``length`` or runs out."""
+        length = min(length, MAX_STREAM_LENGTH)
+        if len(self.state["outfits"]) >= length or self.exhausted:
+            return
+
+        # Ranking is the expensive part; pages already ranked only read the
+        # cache and are never limited.
+        with admit():
+            frontier = list(self.state["frontier"])
+            seen = {tuple(position) for position in self.state["seen"]}
+            outfits = list(self.state["outfits"])
+            scored = 0
+            while len(outfits) < length and frontier:
+                with stage("combine"):
+                    batch = []
+                    while frontier and len(batch) < BATCH_SIZE:
+                        _, position = heapq.heappop(frontier)
+                        position = tuple(position)
+                        batch.append(self._outfit_at(position))
+                        for axis, scores in enumerate(self.harmony):
+                            if position[axis] + 1 >= len(scores):
+                                continue
+                            neighbour = (
+                                position[:axis] + (position[axis] + 1,) + position[axis + 1 :]
+                            )
+                            if neighbour not in seen:
+                                seen.add(neighbour)
+                                heapq.heappush(
+                                    frontier, (self._priority(neighbour), neighbour)
+                                )
+                with stage("score"):
+                    ranked = [
+                        (
+                            ScoringService.calculate_outfit_score(
+                                outfit, self.preferences
+                            )["overall"],
+                            outfit,
+                        )
+                        for outfit in batch
+                    ]
+                    ranked.sort(key=lambda pair: (-pair[0], pair[1]["id"]))
+                outfits.extend(self._ids(outfit) for _, outfit in ranked)
+                scored += len(batch)
+        annotate(combinations_scored=scored)
+
+        self.state = {
+            "outfits": outfits[:MAX_STREAM_LENGTH],
+            "frontier": frontier,
+            "seen": sorted(seen),
+        }
+        cache.set(self.key, self.state, RecommendationService.CACHE_TTL)
+
+    def _outfit_at(self, position: Tuple[int, ...]) -> Dict[str, Any]:
+        top, bottom, footwear, accessories = (
+            self.options[slot][index] for slot, index in zip(SLOTS, position)
+        )
+        return RecommendationService._make_outfit(top[0], bottom[0], footwear[0], accessories)
+
+    @staticmethod
+    def _ids(outfit: Dict[str, Any]) -> Tuple[int, ...]:
+        return (
+            outfit["top"]["id"],
+            outfit["bottom"]["id"],
+            outfit["footwear"]["id"],
+            *[acc["id"] for acc in outfit["accessories"]],
+        )
+
+    # -- pages ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Outfits ranked so far."""
+        return len(self.state["outfits"])
+
+    def page(self, offset: int, size: int) -> List[Dict[str, Any]]:
+        """Scored outfits ``offset`` to ``offset + size``, ranking as needed."""
+        self.extend(offset + size + 1)
+        items = {
+            item["id"]: item
+            for choices in self.options.values()
+            for choice in choices
+            for item in choice
+        }
+        outfits = []
+        for ids in self.state["outfits"][offset : offset + size]:
+            top, bottom, footwear, *accessories = (items[pk] for pk in ids)
+            outfit = RecommendationService._make_outfit(top, bottom, footwear, accessories)
+            score_data = ScoringService.calculate_outfit_score(outfit, self.preferences)
+            outfit["score"] = score_data["overall"]
+            outfit["score_breakdown"] = score_data["breakdown"]
+            outfits.append(outfit)
+        return outfits
+
+    def has_more(self, end: int) -> bool:
+        return end < len(self.state["outfits"]) or not self.exhausted
+
+
+def stream_recommendations(
+    base_product_id: int,
+    preferences: Optional[Dict[str, str]] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 10,
+    projection: Optional[Projection] = None,
+) -> Dict[str, Any]:
+    """
+    One page of the ranked outfit stream for ``base_product_id``.
+
+    Without a cursor the first page is returned; ``next_cursor`` is ``None``
+    once the stream is exhausted. Raises ValueError for malformed cursors and
+    for cursors issued before the catalog changed.
+    """
+    start_time = time.time()
+    preferences = preferences or {}
+    projection = projection or FULL
+    page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    version, offset = get_catalog_version(), 0
+    if cursor:
+        cursor_version, offset = decode_cursor(cursor)
+        if cursor_version != version:
+            # Positions in a stream over an older catalog mean nothing now.
+            raise ValueError("Cursor expired, restart without a cursor")
+
+    try:
+        base_product = Product.objects.get(id=base_product_id, is_active=True)
+    except Product.DoesNotExist:
+        raise ProductNotFoundError(f"Product not found: {base_product_id}")
+
+    stream = OutfitStream(base_product, preferences, version)
+    outfits = stream.page(offset, page_size)
+    if projection.includes("explanation"):
+        for outfit in outfits:
+            outfit["explanation"] = ScoringService.get_score_explanation(
+                {"overall": outfit["score"], "breakdown": outfit["score_breakdown"]}
+            )
+
+    end = offset + len(outfits)
+    processing_time = round((time.time() - start_time) * 1000, 2)
+    return {
+        "base_product": projection.item(
+            RecommendationService._serialize_product(base_product)
+        ),
+        "recommendations": [projection.outfit(outfit) for outfit in outfits],
+        "next_cursor": encode_cursor(version, end) if outfits and stream.has_more(end) else None,
+        "metadata": {
+            "offset": offset,
+            "returned": len(outfits),
+            "generated": len(stream),
+            "processing_time_ms": processing_time,
+            "preferences": preferences,
+        },
+        "response_time_ms": processing_time,
+    }
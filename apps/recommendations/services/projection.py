@@ -0,0 +1,130 @@
+"""
+Sparse fieldsets for recommendation responses.
+
+A ``Projection`` describes which parts of a recommendation response a client
+reads: ``fields`` limits product dicts to the listed keys, ``ids_only``
+replaces product dicts with bare ids, and ``expand`` opts back into the
+outfit-level ``score_breakdown`` / ``explanation`` sections that sparse
+responses leave out. The default projection is the full response.
+
+Product dicts are always projected through ``ITEM_FIELDS``, so keys the
+service adds for its own use never reach a response.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# The public product keys; also what the full response returns.
+ITEM_FIELDS = frozenset(
+    {
+        "id",
+        "name",
+        "category",
+        "sub_category",
+        "color",
+        "style",
+        "price",
+        "price_range",
+        "image_url",
+        "gender",
+        "occasions",
+        "seasons",
+        "tags",
+        "compatibility_score",
+    }
+)
+EXPANDABLE = frozenset({"score_breakdown", "explanation"})
+ITEM_SLOTS = ("top", "bottom", "footwear")
+
+
+def _split(value) -> Tuple[str, ...]:
+    """A comma-separated string or a list of strings as a tuple of names."""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, list) or not all(isinstance(part, str) for part in value):
+        raise ValueError("fields and expand must be strings or lists of strings")
+    return tuple(part.strip() for part in value if part and part.strip())
+
+
+def _truthy(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class Projection:
+    """Which parts of a recommendation response to build and return."""
+
+    def __init__(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        expand: Iterable[str] = (),
+        ids_only: bool = False,
+    ):
+        self.fields: Optional[FrozenSet[str]] = (
+            frozenset(fields) | {"id"} if fields else None
+        )
+        self.expand = frozenset(expand)
+        self.ids_only = ids_only
+
+        unknown = (self.fields or frozenset()) - ITEM_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        unknown = self.expand - EXPANDABLE
+        if unknown:
+            raise ValueError(f"Unknown expand values: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def from_params(cls, params) -> "Projection":
+        """Build from query params or a request body (``fields``, ``expand``, ``ids_only``)."""
+        return cls(
+            fields=_split(params.get("fields")),
+            expand=_split(params.get("expand")),
+            ids_only=_truthy(params.get("ids_only", False)),
+        )
+
+    @property
+    def is_full(self) -> bool:
+        return self.fields is None and not self.ids_only
+
+    def includes(self, section: str) -> bool:
+        """Whether an outfit-level section (``score_breakdown``, ``explanation``) is returned."""
+        return self.is_full or section in self.expand
+
+    def cache_token(self) -> Optional[Dict[str, Any]]:
+        """Stable description for cache keys; ``None`` for the full response."""
+        if self.is_full:
+            return None
+        return {
+            "fields": sorted(self.fields) if self.fields else None,
+            "expand": sorted(self.expand),
+            "ids_only": self.ids_only,
+        }
+
+    def item(self, product: Dict[str, Any]):
+        if self.ids_only:
+            return product["id"]
+        fields = ITEM_FIELDS if self.fields is None else self.fields
+        return {key: value for key, value in product.items() if key in fields}
+
+    def outfit(self, outfit: Dict[str, Any]) -> Dict[str, Any]:
+        if self.is_full:
+            return {
+                **outfit,
+                **{slot: self.item(outfit[slot]) for slot in ITEM_SLOTS},
+                "accessories": [self.item(acc) for acc in outfit["accessories"]],
+            }
+        projected = {"id": outfit["id"]}
+        for slot in ITEM_SLOTS:
+            projected[slot] = self.item(outfit[slot])
+        projected["accessories"] = [self.item(acc) for acc in outfit["accessories"]]
+        projected["total_price"] = outfit["total_price"]
+        projected["score"] = outfit["score"]
+        for section in EXPANDABLE:
+            if section in self.expand and section in outfit:
+                projected[section] = outfit[section]
+        return projected
+
+
+FULL = Projection()
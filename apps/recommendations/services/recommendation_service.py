@@ -6,20 +6,38 @@ import logging
 import time
 import hashlib
 import json
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 
 from django.core.cache import cache
 from django.conf import settings
-
-from apps.products.models import Product
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Collate, Lower
+
+from apps.core.admission import Overloaded, admit, record_stale
+from apps.core.slowlog import annotate, stage
+from apps.products.catalog import catalog_cache_key, get_catalog_version
+from apps.products.models import (
+    OCCASION_BITS,
+    Product,
+    occasions_from_mask,
+    season_mask,
+    seasons_from_mask,
+)
 from .color_service import ColorService
+from .projection import FULL, Projection
 from .scoring_service import ScoringService
 from .constants import STYLE_COMPATIBILITY, OUTFIT_CATEGORIES
 
 logger = logging.getLogger(__name__)
 
 
+class ProductNotFoundError(ValueError):
+    """A requested product does not exist or is inactive."""
+
+
 class RecommendationService:
     """
     Main service for generating outfit recommendations.
@@ -28,6 +46,9 @@ class RecommendationService:
     CACHE_TTL = getattr(settings, "CACHE_TTL", 300)  # 5 minutes default
     MAX_COMBINATIONS = 30
     MAX_PER_CATEGORY = 4
+    # Candidates cached per (fixed product, category) for "complete the look".
+    CANDIDATE_POOL_SIZE = 32
+    MAX_FIXED_ACCESSORIES = 2
 
     @classmethod
     def generate_recommendations(
@@ -35,6 +56,7 @@ class RecommendationService:
         base_product_id: int,
         preferences: Optional[Dict[str, str]] = None,
         limit: int = 3,
+        projection: Optional[Projection] = None,
     ) -> Dict[str, Any]:
         """
         Generate outfit recommendations based on a base product.
@@ -43,92 +65,286 @@ class RecommendationService:
             base_product_id: The ID of the product to build outfit around
             preferences: User preferences (occasion, season, budget)
             limit: Maximum number of outfits to return
+            projection: Parts of the response to build (default: everything)
 
         Returns:
             Dictionary containing recommendations and metadata
         """
         start_time = time.time()
         preferences = preferences or {}
+        projection = projection or FULL
 
         # Generate cache key
-        cache_key = cls._generate_cache_key(base_product_id, preferences, limit)
+        cache_key = cls._generate_cache_key(
+            base_product_id, preferences, limit, projection
+        )
+
+        annotate(product_id=base_product_id, preferences=preferences, limit=limit)
 
         # Check cache first
-        cached_result = cache.get(cache_key)
+        cached_result = cls._serve_cached(cache_key, start_time)
         if cached_result:
-            cached_result["cached"] = True
-            cached_result["response_time_ms"] = round(
-                (time.time() - start_time) * 1000, 2
-            )
             logger.info(f"Cache hit for product {base_product_id}")
             return cached_result
+        annotate(cache="miss")
 
-        # Get base product
+        # Over the concurrency limit, the last result computed for these
+        # arguments is better than an error, even from an older catalog.
+        stale_key = cls._stale_key("outfit_stale", cache_key)
         try:
-            base_product = Product.objects.prefetch_related("occasions", "seasons").get(
-                id=base_product_id, is_active=True
-            )
-        except Product.DoesNotExist:
-            raise ValueError(f"Product not found: {base_product_id}")
+            with admit():
+                result = cls._build_recommendations(
+                    base_product_id, preferences, limit, projection, start_time
+                )
+        except Overloaded:
+            stale = cls._serve_stale(stale_key, start_time)
+            if stale is None:
+                raise
+            return stale
 
-        # Determine needed categories
-        needed_categories = [
-            cat for cat in OUTFIT_CATEGORIES if cat != base_product.category
-        ]
+        # Cache the result
+        with stage("cache_set"):
+            cache.set(cache_key, result, cls.CACHE_TTL)
+            cache.set(stale_key, result, settings.ADMISSION_STALE_TTL)
+        logger.info(
+            f"Generated {result['metadata']['returned']} recommendations for product "
+            f"{base_product_id} in {result['metadata']['processing_time_ms']}ms"
+        )
 
-        # Get compatible items for each category
-        compatible_items = {}
-        for category in needed_categories:
-            compatible_items[category] = cls._get_compatible_products(
-                base_product, category, preferences
+        return result
+
+    @classmethod
+    def cached_recommendations(
+        cls,
+        base_product_id: int,
+        preferences: Optional[Dict[str, str]] = None,
+        limit: int = 3,
+        projection: Optional[Projection] = None,
+        stale: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The result ``generate_recommendations`` would return from the cache,
+        without computing anything; None on a miss. With ``stale``, fall back
+        to the last result computed for these arguments under any catalog
+        version.
+        """
+        start_time = time.time()
+        cache_key = cls._generate_cache_key(
+            base_product_id, preferences or {}, limit, projection or FULL
+        )
+        result = cls._serve_cached(cache_key, start_time)
+        if result is None and stale:
+            result = cls._serve_stale(
+                cls._stale_key("outfit_stale", cache_key), start_time
             )
+        return result
+
+    @classmethod
+    def _build_recommendations(
+        cls,
+        base_product_id: int,
+        preferences: Dict[str, str],
+        limit: int,
+        projection: Projection,
+        start_time: float,
+    ) -> Dict[str, Any]:
+        """The uncached part of ``generate_recommendations``."""
+        # Get base product
+        with stage("base_product"):
+            try:
+                base_product = Product.objects.get(id=base_product_id, is_active=True)
+            except Product.DoesNotExist:
+                raise ProductNotFoundError(f"Product not found: {base_product_id}")
+
+        # Regular recommendations are the head of the ranked outfit stream,
+        # so paging with a cursor starts with exactly these outfits.
+        from .outfit_stream import OutfitStream
+
+        stream = OutfitStream(base_product, preferences, get_catalog_version())
+        top_outfits = stream.page(0, limit)
+
+        # Explanations are only built for returned outfits that ask for them.
+        if projection.includes("explanation"):
+            with stage("explain"):
+                for outfit in top_outfits:
+                    outfit["explanation"] = ScoringService.get_score_explanation(
+                        {
+                            "overall": outfit["score"],
+                            "breakdown": outfit["score_breakdown"],
+                        }
+                    )
+
+        processing_time = round((time.time() - start_time) * 1000, 2)
+
+        return {
+            "base_product": projection.item(cls._serialize_product(base_product)),
+            "recommendations": [projection.outfit(outfit) for outfit in top_outfits],
+            "metadata": {
+                "total_generated": len(stream),
+                "returned": len(top_outfits),
+                "processing_time_ms": processing_time,
+                "preferences": preferences,
+            },
+            "cached": False,
+            "response_time_ms": processing_time,
+        }
+
+    @classmethod
+    def complete_outfit(
+        cls,
+        product_ids: List[int],
+        preferences: Optional[Dict[str, str]] = None,
+        limit: int = 3,
+        projection: Optional[Projection] = None,
+    ) -> Dict[str, Any]:
+        """
+        Complete outfits around several fixed products.
 
-        # Generate outfit combinations
-        outfits = cls._generate_outfit_combinations(
-            base_product, compatible_items, preferences
+        Only the categories the fixed products leave open are searched. For
+        each one, the cached candidate pools of the fixed products are
+        intersected and ranked by mean color harmony, so the work grows with
+        the missing categories rather than with the number of fixed items.
+
+        Args:
+            product_ids: Products the outfit must contain (at most one top,
+                bottom and footwear, and up to two accessories)
+            preferences: User preferences (occasion, season, budget)
+            limit: Maximum number of outfits to return
+            projection: Parts of the response to build (default: everything)
+        """
+        start_time = time.time()
+        preferences = preferences or {}
+        projection = projection or FULL
+        product_ids = list(dict.fromkeys(int(pk) for pk in product_ids))
+        if not product_ids:
+            raise ValueError("product_ids is required")
+
+        key_data = {
+            "product_ids": sorted(product_ids),
+            "preferences": preferences,
+            "limit": limit,
+            "projection": projection.cache_token(),
+        }
+        cache_key = catalog_cache_key(
+            "outfit_complete",
+            hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest(),
         )
+        annotate(product_ids=product_ids, preferences=preferences, limit=limit)
+        cached_result = cls._serve_cached(cache_key, start_time)
+        if cached_result:
+            return cached_result
+        annotate(cache="miss")
 
-        # Score and rank outfits
-        scored_outfits = []
-        for outfit in outfits:
-            score_data = ScoringService.calculate_outfit_score(outfit, preferences)
-            outfit_with_score = {
-                **outfit,
-                "score": score_data["overall"],
-                "score_breakdown": score_data["breakdown"],
-                "explanation": ScoringService.get_score_explanation(score_data),
-            }
-            scored_outfits.append(outfit_with_score)
+        stale_key = cls._stale_key("complete_stale", cache_key)
+        try:
+            with admit():
+                result = cls._build_complete_outfit(
+                    product_ids, preferences, limit, projection, start_time
+                )
+        except Overloaded:
+            stale = cls._serve_stale(stale_key, start_time)
+            if stale is None:
+                raise
+            return stale
+
+        with stage("cache_set"):
+            cache.set(cache_key, result, cls.CACHE_TTL)
+            cache.set(stale_key, result, settings.ADMISSION_STALE_TTL)
+        return result
 
-        # Sort by score (highest first), de-dup combos by item ids, and limit results
-        scored_outfits.sort(key=lambda x: x["score"], reverse=True)
-        seen = set()
-        top_outfits = []
-        for outfit in scored_outfits:
-            key = tuple(
-                sorted(
-                    [
-                        outfit["top"]["id"],
-                        outfit["bottom"]["id"],
-                        outfit["footwear"]["id"],
-                        *[acc["id"] for acc in outfit.get("accessories", [])],
-                    ]
+    @classmethod
+    def _build_complete_outfit(
+        cls,
+        product_ids: List[int],
+        preferences: Dict[str, str],
+        limit: int,
+        projection: Projection,
+        start_time: float,
+    ) -> Dict[str, Any]:
+        """The uncached part of ``complete_outfit``."""
+        with stage("fixed_products"):
+            products = Product.objects.in_bulk(product_ids)
+        fixed = [products[pk] for pk in product_ids if pk in products]
+        fixed = [product for product in fixed if product.is_active]
+        missing_ids = sorted(set(product_ids) - {product.id for product in fixed})
+        if missing_ids:
+            raise ProductNotFoundError(
+                f"Product not found: {', '.join(map(str, missing_ids))}"
+            )
+
+        by_category = defaultdict(list)
+        for product in fixed:
+            by_category[product.category].append(cls._serialize_product(product))
+        for category, items in by_category.items():
+            allowed = cls.MAX_FIXED_ACCESSORIES if category == "accessory" else 1
+            if len(items) > allowed:
+                raise ValueError(
+                    f"At most {allowed} fixed {category} item(s) allowed, got {len(items)}"
                 )
+
+        missing_categories = [
+            category for category in OUTFIT_CATEGORIES if category not in by_category
+        ]
+        if len(fixed) == 1:
+            # One fixed product is a regular recommendation; rank it the same
+            # way so both endpoints agree.
+            from .outfit_stream import OutfitStream
+
+            stream = OutfitStream(fixed[0], preferences, get_catalog_version())
+            top_outfits, total_generated = stream.page(0, limit), len(stream)
+        else:
+            with stage("candidate_pools"):
+                pools = cls._candidate_pools(fixed, missing_categories, preferences)
+
+            categories = dict(by_category)
+            for category in missing_categories:
+                with stage(f"intersect:{category}"):
+                    candidates, exact = cls._intersect_pools(
+                        [pools[(product.id, category)] for product in fixed]
+                    )
+                    if len(candidates) < cls.MAX_PER_CATEGORY and not exact:
+                        # The truncated pools share too few items; ask the database
+                        # for candidates meeting every fixed item's constraints.
+                        queryset = cls._build_candidate_queryset(
+                            fixed[0], category, preferences
+                        ).filter(
+                            *[cls._compatibility_filter(product) for product in fixed[1:]]
+                        )
+                        candidates = cls._rank_candidates(
+                            queryset, fixed, cls.MAX_PER_CATEGORY
+                        )
+                categories[category] = candidates
+            annotate(
+                candidate_pools={
+                    category: len(categories[category]) for category in missing_categories
+                }
             )
-            if key in seen:
-                continue
-            seen.add(key)
-            top_outfits.append(outfit)
-            if len(top_outfits) >= limit:
-                break
 
-        processing_time = round((time.time() - start_time) * 1000, 2)
+            accessory_combos = (
+                [by_category["accessory"]] if "accessory" in by_category else None
+            )
+            with stage("combine"):
+                outfits = cls._combine_outfits(categories, accessory_combos)
+            with stage("score"):
+                top_outfits = cls._rank_outfits(outfits, preferences, limit)
+            annotate(combinations_scored=len(outfits))
+            total_generated = len(outfits)
+
+        if projection.includes("explanation"):
+            for outfit in top_outfits:
+                outfit["explanation"] = ScoringService.get_score_explanation(
+                    {"overall": outfit["score"], "breakdown": outfit["score_breakdown"]}
+                )
 
-        result = {
-            "base_product": cls._serialize_product(base_product),
-            "recommendations": top_outfits,
+        processing_time = round((time.time() - start_time) * 1000, 2)
+        return {
+            "fixed_products": [
+                projection.item(cls._serialize_product(product)) for product in fixed
+            ],
+            "recommendations": [projection.outfit(outfit) for outfit in top_outfits],
             "metadata": {
-                "total_generated": len(outfits),
+                "missing_categories": missing_categories,
+                "total_generated": total_generated,
                 "returned": len(top_outfits),
                 "processing_time_ms": processing_time,
                 "preferences": preferences,
@@ -137,149 +353,325 @@ class RecommendationService:
             "response_time_ms": processing_time,
         }
 
-        # Cache the result
-        cache.set(cache_key, result, cls.CACHE_TTL)
-        logger.info(
-            f"Generated {len(top_outfits)} recommendations for product {base_product_id} in {processing_time}ms"
-        )
+    @classmethod
+    def _candidate_pools(
+        cls,
+        products: List[Product],
+        categories: List[str],
+        preferences: Dict[str, str],
+    ) -> Dict[Tuple[int, str], List[Dict[str, Any]]]:
+        """
+        Ranked candidates per (product, category), up to ``CANDIDATE_POOL_SIZE``.
 
-        return result
+        Pools depend on a single product, so they are cached and shared by
+        every request that fixes that product; all pools of a request are
+        fetched in one cache round trip.
+        """
+        version = get_catalog_version()
+        prefs_hash = hashlib.md5(
+            json.dumps(preferences, sort_keys=True).encode()
+        ).hexdigest()
+        keys = {
+            (product.id, category): (
+                f"candidate_pool_{version}_{product.id}_{category}_{prefs_hash}"
+            )
+            for product in products
+            for category in categories
+        }
+        cached = cache.get_many(list(keys.values()))
+
+        pools, fresh = {}, {}
+        by_id = {product.id: product for product in products}
+        for (product_id, category), key in keys.items():
+            if key in cached:
+                pools[(product_id, category)] = cached[key]
+                continue
+            product = by_id[product_id]
+            with stage(f"candidates:{category}"):
+                pool = cls._rank_candidates(
+                    cls._build_candidate_queryset(product, category, preferences),
+                    [product],
+                    cls.CANDIDATE_POOL_SIZE,
+                )
+            pools[(product_id, category)] = fresh[key] = pool
+        if fresh:
+            cache.set_many(fresh, cls.CACHE_TTL)
+        annotate(pool_cache={"hits": len(keys) - len(fresh), "misses": len(fresh)})
+        return pools
 
     @classmethod
-    def _generate_cache_key(cls, product_id: int, preferences: Dict, limit: int) -> str:
+    def _intersect_pools(
+        cls, pools: List[List[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Candidates present in every pool, ranked by mean harmony score.
+
+        Also returns whether the result is exact: it is when no pool was
+        truncated, since then each pool holds every compatible candidate.
+        """
+        scores = defaultdict(list)
+        rows = {}
+        for pool in pools:
+            for item in pool:
+                scores[item["id"]].append(item["compatibility_score"])
+                rows[item["id"]] = item
+        candidates = [
+            {**rows[pk], "compatibility_score": sum(values) / len(values)}
+            for pk, values in scores.items()
+            if len(values) == len(pools)
+        ]
+        candidates.sort(key=lambda x: (-x["compatibility_score"], x["name"], x["id"]))
+        exact = all(len(pool) < cls.CANDIDATE_POOL_SIZE for pool in pools)
+        return candidates[: cls.MAX_PER_CATEGORY], exact
+
+    @classmethod
+    def _generate_cache_key(
+        cls,
+        product_id: int,
+        preferences: Dict,
+        limit: int,
+        projection: Optional[Projection] = None,
+    ) -> str:
         """Generate a unique cache key."""
         key_data = {
             "product_id": product_id,
             "preferences": preferences,
             "limit": limit,
         }
+        token = projection.cache_token() if projection else None
+        if token is not None:
+            # Sparse responses are cached as returned, under their own key.
+            key_data["projection"] = token
         key_string = json.dumps(key_data, sort_keys=True)
         key_hash = hashlib.md5(key_string.encode()).hexdigest()
-        return f"outfit_rec_{key_hash}"
+        # Namespaced by catalog version so product writes invalidate results.
+        return catalog_cache_key("outfit_rec", key_hash)
+
+    @staticmethod
+    def _stale_key(prefix: str, cache_key: str) -> str:
+        """``cache_key`` without its catalog version, for stale fallbacks."""
+        return f"{prefix}_{cache_key.rsplit('_', 1)[-1]}"
+
+    @staticmethod
+    def _serve_cached(cache_key: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """The fresh result under ``cache_key``, marked as cached, or None."""
+        with stage("cache_get"):
+            cached = cache.get(cache_key)
+        if not cached:
+            return None
+        annotate(cache="hit")
+        cached["cached"] = True
+        cached["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        return cached
+
+    @staticmethod
+    def _serve_stale(stale_key: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """The stale result under ``stale_key``, marked as such, or None."""
+        stale = cache.get(stale_key)
+        if stale is None:
+            return None
+        record_stale()
+        annotate(cache="stale")
+        stale["cached"] = True
+        stale["stale"] = True
+        stale["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        return stale
+
+    @staticmethod
+    def _outfit_id(items: List[Dict[str, Any]]) -> str:
+        """Deterministic outfit id derived from its item ids."""
+        key = "-".join(str(item["id"]) for item in items)
+        return f"outfit_{hashlib.sha1(key.encode()).hexdigest()[:16]}"
 
     @classmethod
-    def _get_compatible_products(
+    def _build_candidate_queryset(
         cls, base_product: Product, category: str, preferences: Dict[str, str]
-    ) -> List[Dict[str, Any]]:
-        """Get products compatible with the base product for a specific category."""
+    ):
+        """
+        Candidate products for one category, before color filtering.
 
-        # Start with all products in the category
-        queryset = Product.objects.filter(
-            category=category, is_active=True
-        ).prefetch_related("occasions", "seasons")
+        The category/is_active/style/gender predicates are served by the
+        partial ``products_active_candidate_idx`` index.
+        """
 
-        # Filter by style compatibility
-        compatible_styles = STYLE_COMPATIBILITY.get(
-            base_product.style, [base_product.style]
-        )
-        queryset = queryset.filter(style__in=compatible_styles)
+        # Start with all products in the category. Rows are ranked in Python,
+        # so drop the model's default ordering: left in, it steers planners
+        # towards the listing index purely to avoid a sort.
+        queryset = Product.objects.filter(category=category, is_active=True).order_by()
 
-        # Filter by gender compatibility
-        if base_product.gender != "unisex":
-            queryset = queryset.filter(gender__in=[base_product.gender, "unisex"])
+        # Filter by style and gender compatibility
+        queryset = queryset.filter(cls._compatibility_filter(base_product))
 
-        # Filter by occasion if specified
+        # Filter by occasion/season with bitwise tests on the denormalized
+        # masks, which keeps the whole predicate on the products table.
         if preferences.get("occasion"):
-            queryset = queryset.filter(
-                occasions__occasion=preferences["occasion"]
-            ).distinct()
+            queryset = queryset.alias(
+                occasion_hit=F("occasion_mask").bitand(
+                    OCCASION_BITS.get(preferences["occasion"], 0)
+                )
+            ).filter(occasion_hit__gt=0)
 
-        # Filter by season if specified
         if preferences.get("season"):
-            queryset = queryset.filter(
-                seasons__season__in=[preferences["season"], "all"]
-            ).distinct()
+            queryset = queryset.alias(
+                season_hit=F("season_mask").bitand(
+                    season_mask([preferences["season"], "all"])
+                )
+            ).filter(season_hit__gt=0)
 
-        # Convert to list and filter by color compatibility
-        products = list(queryset)
-        compatible_products = []
+        return queryset
 
-        for product in products:
-            if ColorService.are_colors_compatible(base_product.color, product.color):
-                compatibility_score = ColorService.get_color_harmony_score(
-                    base_product.color, product.color
-                )
-                product_data = cls._serialize_product(product)
-                product_data["compatibility_score"] = compatibility_score
-                compatible_products.append(product_data)
+    @staticmethod
+    def _compatibility_filter(product: Product) -> Q:
+        """Style and gender constraints a candidate must meet to go with ``product``."""
+        condition = Q(
+            style__in=STYLE_COMPATIBILITY.get(product.style, [product.style])
+        )
+        if product.gender != "unisex":
+            condition &= Q(gender__in=[product.gender, "unisex"])
+        return condition
+
+    @classmethod
+    def _rank_candidates(
+        cls, queryset, base_products: List[Product], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        The ``limit`` best candidates in ``queryset`` for ``base_products``.
+
+        Candidates must be color-compatible with every base product and are
+        ranked by their mean harmony score, then name and id. Both happen in
+        the query: the harmony rules for each base color are compiled into a
+        color -> score table, incompatible colors are filtered out with ``IN``
+        and the rest are ranked by a ``CASE`` on score, so the database
+        returns only the top candidates.
+        """
+        # Match colors case-insensitively, like ColorService does.
+        queryset = queryset.annotate(color_key=Lower("color"))
+        tables = [
+            ColorService.compatible_color_scores(product.color)
+            for product in base_products
+        ]
+        ranks = []
+        for scores, default in tables:
+            if default is None:
+                queryset = queryset.filter(color_key__in=list(scores))
+            ranks.append(cls._color_rank(scores, default))
+        rank = ranks[0]
+        for extra in ranks[1:]:
+            rank = rank + extra
+        if len(ranks) > 1:
+            rank = rank / Value(float(len(ranks)))
+
+        # Ties break on name then id, compared bytewise like Python strings.
+        name = Collate("name", "C") if connection.vendor == "postgresql" else F("name")
+        queryset = queryset.annotate(color_rank=rank).order_by(
+            F("color_rank").desc(), name, "id"
+        )[:limit]
+
+        compatible_products = []
+        for product in queryset:
+            color = product.color.lower()
+            product_data = cls._serialize_product(product)
+            product_data["compatibility_score"] = sum(
+                scores.get(color, default) for scores, default in tables
+            ) / len(tables)
+            compatible_products.append(product_data)
+        return compatible_products
 
-        # Sort by compatibility score and limit
-        compatible_products.sort(key=lambda x: x["compatibility_score"], reverse=True)
-        return compatible_products[: cls.MAX_PER_CATEGORY]
+    @staticmethod
+    def _color_rank(scores: Dict[str, float], default: Optional[float]) -> Case:
+        """``CASE`` expression giving a row's harmony score from a compiled table."""
+        by_score = defaultdict(list)
+        for color, score in scores.items():
+            by_score[score].append(color)
+        return Case(
+            *[
+                When(color_key__in=sorted(colors), then=Value(score))
+                for score, colors in sorted(by_score.items(), reverse=True)
+            ],
+            default=Value(default if default is not None else 0.0),
+            output_field=FloatField(),
+        )
 
     @classmethod
-    def _generate_outfit_combinations(
+    def _combine_outfits(
         cls,
-        base_product: Product,
-        compatible_items: Dict[str, List[Dict]],
-        preferences: Dict[str, str],
+        categories: Dict[str, List[Dict]],
+        accessory_combos: Optional[List[List[Dict]]] = None,
     ) -> List[Dict[str, Any]]:
-        """Generate outfit combinations from compatible items."""
-
-        outfits = []
-        base_data = cls._serialize_product(base_product)
-
-        # Setup categories based on base product
-        categories = {
-            "top": (
-                [base_data]
-                if base_product.category == "top"
-                else compatible_items.get("top", [])
-            ),
-            "bottom": (
-                [base_data]
-                if base_product.category == "bottom"
-                else compatible_items.get("bottom", [])
-            ),
-            "footwear": (
-                [base_data]
-                if base_product.category == "footwear"
-                else compatible_items.get("footwear", [])
-            ),
-            "accessory": (
-                [base_data]
-                if base_product.category == "accessory"
-                else compatible_items.get("accessory", [])
-            ),
-        }
+        """
+        Outfits from per-category item lists, up to ``MAX_COMBINATIONS``.
 
-        # Generate combinations
-        combination_count = 0
+        Accessories are combined by ``_get_accessory_combinations`` unless
+        ``accessory_combos`` is given.
+        """
+        if accessory_combos is None:
+            accessory_combos = cls._get_accessory_combinations(categories["accessory"])
 
+        outfits = []
         for top in categories["top"][: cls.MAX_PER_CATEGORY]:
             for bottom in categories["bottom"][: cls.MAX_PER_CATEGORY]:
                 for footwear in categories["footwear"][: cls.MAX_PER_CATEGORY]:
-                    # Get accessory combinations
-                    accessory_combos = cls._get_accessory_combinations(
-                        categories["accessory"]
-                    )
-
                     for accessories in accessory_combos:
-                        if combination_count >= cls.MAX_COMBINATIONS:
-                            break
-
-                        outfit = {
-                            "id": f"outfit_{int(time.time() * 1000)}_{combination_count}",
-                            "top": top,
-                            "bottom": bottom,
-                            "footwear": footwear,
-                            "accessories": accessories,
-                            "total_price": cls._calculate_total_price(
-                                [top, bottom, footwear] + accessories
-                            ),
-                        }
-                        outfits.append(outfit)
-                        combination_count += 1
-
-                    if combination_count >= cls.MAX_COMBINATIONS:
-                        break
-                if combination_count >= cls.MAX_COMBINATIONS:
-                    break
-            if combination_count >= cls.MAX_COMBINATIONS:
-                break
-
+                        if len(outfits) >= cls.MAX_COMBINATIONS:
+                            return outfits
+                        outfits.append(
+                            cls._make_outfit(top, bottom, footwear, accessories)
+                        )
         return outfits
 
+    @classmethod
+    def _make_outfit(
+        cls, top: Dict, bottom: Dict, footwear: Dict, accessories: List[Dict]
+    ) -> Dict[str, Any]:
+        items = [top, bottom, footwear] + accessories
+        return {
+            "id": cls._outfit_id(items),
+            "top": top,
+            "bottom": bottom,
+            "footwear": footwear,
+            "accessories": accessories,
+            "total_price": cls._calculate_total_price(items),
+        }
+
+    @staticmethod
+    def _rank_outfits(
+        outfits: List[Dict[str, Any]], preferences: Dict[str, str], limit: int
+    ) -> List[Dict[str, Any]]:
+        """Score outfits and return the ``limit`` best distinct ones."""
+        scored_outfits = []
+        for outfit in outfits:
+            score_data = ScoringService.calculate_outfit_score(outfit, preferences)
+            scored_outfits.append(
+                {
+                    **outfit,
+                    "score": score_data["overall"],
+                    "score_breakdown": score_data["breakdown"],
+                }
+            )
+
+        # Sort by score (highest first), de-dup combos by item ids, and limit results
+        scored_outfits.sort(key=lambda x: x["score"], reverse=True)
+        seen = set()
+        top_outfits = []
+        for outfit in scored_outfits:
+            key = tuple(
+                sorted(
+                    [
+                        outfit["top"]["id"],
+                        outfit["bottom"]["id"],
+                        outfit["footwear"]["id"],
+                        *[acc["id"] for acc in outfit.get("accessories", [])],
+                    ]
+                )
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            top_outfits.append(outfit)
+            if len(top_outfits) >= limit:
+                break
+        return top_outfits
+
     @staticmethod
     def _get_accessory_combinations(accessories: List[Dict]) -> List[List[Dict]]:
         """Get accessory combinations (1-2 accessories per outfit)."""
@@ -310,7 +702,12 @@ class RecommendationService:
 
     @staticmethod
     def _serialize_product(product: Product) -> Dict[str, Any]:
-        """Serialize a Product model to dictionary."""
+        """
+        Serialize a Product model to dictionary.
+
+        Occasions and seasons are decoded from the product's masks, so no
+        per-product queries are issued.
+        """
         return {
             "id": product.id,
             "name": product.name,
@@ -322,7 +719,9 @@ class RecommendationService:
             "price_range": product.price_range,
             "image_url": product.image_url,
             "gender": product.gender,
-            "occasions": list(product.occasions.values_list("occasion", flat=True)),
-            "seasons": list(product.seasons.values_list("season", flat=True)),
+            "occasions": occasions_from_mask(product.occasion_mask),
+            "seasons": seasons_from_mask(product.season_mask),
+            "occasion_mask": product.occasion_mask,
+            "season_mask": product.season_mask,
             "tags": product.tags,
         }
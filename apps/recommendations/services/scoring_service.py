@@ -10,6 +10,7 @@ SCORING BREAKDOWN:
 """
 
 from typing import Dict, List, Optional, Any
+from apps.products.models import OCCASION_BITS, season_mask
 from .color_service import ColorService
 from .constants import (
     STYLE_COMPATIBILITY,
@@ -106,6 +107,10 @@ class ScoringService:
         if not target_occasion:
             return 0.8  # Default score if no occasion specified
         
+        # Products serialized by RecommendationService carry an occasion
+        # bitmask, which turns the membership test into a bitwise AND.
+        target_bit = OCCASION_BITS.get(target_occasion, 0)
+        
         def get_occasions(p):
             if isinstance(p, dict):
                 return p.get('occasions', [])
@@ -113,8 +118,11 @@ class ScoringService:
         
         match_count = 0
         for product in products:
-            occasions = get_occasions(product)
-            if target_occasion in occasions:
+            mask = product.get('occasion_mask') if isinstance(product, dict) else None
+            if mask is not None:
+                if mask & target_bit:
+                    match_count += 1
+            elif target_occasion in get_occasions(product):
                 match_count += 1
         
         return match_count / len(products) if products else 0.8
@@ -126,6 +134,7 @@ class ScoringService:
             return 0.8  # Default score if no season specified
         
         compatible_seasons = SEASON_COMPATIBILITY.get(target_season, [target_season, 'all'])
+        compatible_mask = season_mask(compatible_seasons) | season_mask(['all'])
         
         def get_seasons(p):
             if isinstance(p, dict):
@@ -134,8 +143,12 @@ class ScoringService:
         
         match_count = 0
         for product in products:
-            seasons = get_seasons(product)
-            has_match = any(s in compatible_seasons or s == 'all' for s in seasons)
+            mask = product.get('season_mask') if isinstance(product, dict) else None
+            if mask is not None:
+                has_match = bool(mask & compatible_mask)
+            else:
+                seasons = get_seasons(product)
+                has_match = any(s in compatible_seasons or s == 'all' for s in seasons)
             if has_match:
                 match_count += 1
         
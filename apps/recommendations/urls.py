@@ -3,9 +3,10 @@ Recommendation URL patterns.
 """
 
 from django.urls import path
-from .views import RecommendationView, BulkRecommendationView
+from .views import RecommendationView, BulkRecommendationView, CompleteLookView
 
 urlpatterns = [
     path('<int:product_id>/', RecommendationView.as_view(), name='get-recommendations'),
     path('bulk/', BulkRecommendationView.as_view(), name='bulk-recommendations'),
+    path('complete/', CompleteLookView.as_view(), name='complete-look'),
 ]
\ No newline at end of file
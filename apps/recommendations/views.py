@@ -8,11 +8,89 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
-from .services.recommendation_service import RecommendationService
+from apps.core.admission import Overloaded, admission_controlled, admit
+from apps.core.conditional import catalog_conditional
+from apps.core.memory import track_memory
+
+from .services.outfit_stream import stream_recommendations
+from .services.projection import Projection
+from .services.recommendation_service import (
+    ProductNotFoundError,
+    RecommendationService,
+)
 from .serializers import RecommendationResponseSerializer
 
 logger = logging.getLogger(__name__)
 
+PROJECTION_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description="Comma-separated product fields to return, e.g. id,image_url (id is always included)",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="expand",
+        description="With fields/ids_only: outfit sections to add back (score_breakdown, explanation)",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="ids_only",
+        description="Return product ids instead of product objects",
+        required=False,
+        type=bool,
+    ),
+]
+
+
+def _parse_projection(params):
+    """Return ``(projection, None)`` or ``(None, error_response)``."""
+    if not isinstance(params, dict):
+        return None, Response(
+            {
+                "success": False,
+                "error": "Request body must be a JSON object",
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        return Projection.from_params(params), None
+    except ValueError as e:
+        return None, Response(
+            {
+                "success": False,
+                "error": str(e),
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+def _bulk_success(product_id, result):
+    return {
+        "product_id": product_id,
+        "success": True,
+        **result,
+    }
+
+
+def _bulk_item(product_id, preferences, limit, projection):
+    """One bulk entry, computed (or served from the cache)."""
+    try:
+        result = RecommendationService.generate_recommendations(
+            base_product_id=product_id,
+            preferences=preferences,
+            limit=limit,
+            projection=projection,
+        )
+    except ValueError as e:
+        return {
+            "product_id": product_id,
+            "success": False,
+            "error": str(e),
+        }
+    return _bulk_success(product_id, result)
+
 
 class RecommendationView(APIView):
     """
@@ -33,6 +111,10 @@ class RecommendationView(APIView):
         - **Budget Alignment**: Similar price ranges
         
         **Performance**: Response time is guaranteed to be under 1 second.
+
+        **Paging**: pass `cursor` (empty for the first page) to page through
+        up to 500 outfits, best first, `page_size` at a time. Follow `next`
+        until it is null. Cursors expire when the catalog changes.
         """,
         parameters=[
             OpenApiParameter(
@@ -66,6 +148,19 @@ class RecommendationView(APIView):
                 required=False,
                 type=int,
             ),
+            OpenApiParameter(
+                name="cursor",
+                description="Page through the outfit stream; empty for the first page, then the cursor from `next`",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Outfits per page when paging (default: 10, max: 50)",
+                required=False,
+                type=int,
+            ),
+            *PROJECTION_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(
@@ -75,12 +170,20 @@ class RecommendationView(APIView):
             400: OpenApiResponse(description="Bad request"),
             404: OpenApiResponse(description="Product not found"),
             500: OpenApiResponse(description="Internal server error"),
+            503: OpenApiResponse(description="Busy and no stale result; see Retry-After"),
         },
     )
+    @catalog_conditional
+    @admission_controlled("recommendations")
+    @track_memory("recommendations")
     def get(self, request, product_id):
         """
         Get outfit recommendations for a product.
         """
+        projection, error = _parse_projection(request.query_params)
+        if error:
+            return error
+
         try:
             # Parse query parameters
             preferences = {
@@ -91,6 +194,9 @@ class RecommendationView(APIView):
             # Remove None values
             preferences = {k: v for k, v in preferences.items() if v}
 
+            if "cursor" in request.query_params:
+                return self._stream(request, product_id, preferences, projection)
+
             limit = int(request.query_params.get("limit", 3))
             limit = min(max(limit, 1), 20)  # Clamp between 1 and 20
 
@@ -99,6 +205,7 @@ class RecommendationView(APIView):
                 base_product_id=product_id,
                 preferences=preferences,
                 limit=limit,
+                projection=projection,
             )
 
             return Response(
@@ -108,6 +215,9 @@ class RecommendationView(APIView):
                 }
             )
 
+        except Overloaded:
+            raise
+
         except ValueError as e:
             logger.warning(f"Value error in recommendations: {str(e)}")
             return Response(
@@ -128,12 +238,69 @@ class RecommendationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def _stream(self, request, product_id, preferences, projection):
+        """One page of the ranked outfit stream."""
+        try:
+            page_size = int(request.query_params.get("page_size", 10))
+        except ValueError:
+            return Response(
+                {
+                    "success": False,
+                    "error": "page_size must be an integer",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            result = stream_recommendations(
+                base_product_id=product_id,
+                preferences=preferences,
+                cursor=request.query_params.get("cursor") or None,
+                page_size=page_size,
+                projection=projection,
+            )
+        except ProductNotFoundError as e:
+            return Response(
+                {
+                    "success": False,
+                    "error": str(e),
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except ValueError as e:
+            return Response(
+                {
+                    "success": False,
+                    "error": str(e),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        next_cursor = result.pop("next_cursor")
+        next_url = None
+        if next_cursor:
+            params = request.query_params.copy()
+            params["cursor"] = next_cursor
+            next_url = request.build_absolute_uri(
+                f"{request.path}?{params.urlencode()}"
+            )
+        return Response(
+            {
+                "success": True,
+                **result,
+                "next": next_url,
+            }
+        )
+
 
 class BulkRecommendationView(APIView):
     """
     Get recommendations for multiple products at once.
     """
 
+    # POST only to carry a body; it never writes, so replicas can serve it.
+    replica_reads = True
+
     @extend_schema(
         tags=["Recommendations"],
         summary="Get Bulk Recommendations",
@@ -159,15 +326,35 @@ class BulkRecommendationView(APIView):
                         "type": "integer",
                         "default": 3,
                     },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Product fields to return (id is always included)",
+                    },
+                    "expand": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Outfit sections to add: score_breakdown, explanation",
+                    },
+                    "ids_only": {
+                        "type": "boolean",
+                        "description": "Return product ids instead of product objects",
+                    },
                 },
                 "required": ["product_ids"],
             },
         },
     )
+    @admission_controlled("bulk")
+    @track_memory("bulk_recommendations")
     def post(self, request):
         """
         Get recommendations for multiple products.
         """
+        projection, error = _parse_projection(request.data)
+        if error:
+            return error
+
         try:
             product_ids = request.data.get("product_ids", [])
             preferences = request.data.get("preferences", {})
@@ -191,37 +378,58 @@ class BulkRecommendationView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            results = []
-            for product_id in product_ids:
+            # Cached items never enter the limiter. The uncached rest is
+            # admitted once, so the batch is never shed halfway through; over
+            # the limit, stale results stand in for it where they exist, and
+            # only a batch with nothing to serve is a 503.
+            results = [None] * len(product_ids)
+            for index, product_id in enumerate(product_ids):
+                cached = RecommendationService.cached_recommendations(
+                    product_id, preferences, limit, projection
+                )
+                if cached is not None:
+                    results[index] = _bulk_success(product_id, cached)
+            pending = [index for index, result in enumerate(results) if result is None]
+
+            headers = None
+            if pending:
                 try:
-                    result = RecommendationService.generate_recommendations(
-                        base_product_id=product_id,
-                        preferences=preferences,
-                        limit=limit,
-                    )
-                    results.append(
-                        {
-                            "product_id": product_id,
-                            "success": True,
-                            **result,
-                        }
-                    )
-                except ValueError as e:
-                    results.append(
-                        {
-                            "product_id": product_id,
-                            "success": False,
-                            "error": str(e),
-                        }
-                    )
+                    with admit(items=len(pending)):
+                        for index in pending:
+                            results[index] = _bulk_item(
+                                product_ids[index], preferences, limit, projection
+                            )
+                except Overloaded as exc:
+                    served = len(product_ids) - len(pending)
+                    for index in pending:
+                        stale = RecommendationService.cached_recommendations(
+                            product_ids[index], preferences, limit, projection,
+                            stale=True,
+                        )
+                        if stale is None:
+                            results[index] = {
+                                "product_id": product_ids[index],
+                                "success": False,
+                                "error": "Service is busy, retry later",
+                            }
+                        else:
+                            results[index] = _bulk_success(product_ids[index], stale)
+                            served += 1
+                    if not served:
+                        raise
+                    headers = {"Retry-After": str(exc.retry_after)}
 
             return Response(
                 {
                     "success": True,
                     "results": results,
-                }
+                },
+                headers=headers,
             )
 
+        except Overloaded:
+            raise
+
         except Exception as e:
             logger.error(f"Error in bulk recommendations: {str(e)}", exc_info=True)
             return Response(
@@ -231,3 +439,136 @@ class BulkRecommendationView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class CompleteLookView(APIView):
+    """
+    Complete outfits around products the shopper already picked.
+    """
+
+    # POST only to carry a body; it never writes, so replicas can serve it.
+    replica_reads = True
+
+    @extend_schema(
+        tags=["Recommendations"],
+        summary="Complete the Look",
+        description=(
+            "Generate outfits that contain all of the given products, filling "
+            "only the categories they leave open. At most one top, bottom and "
+            "footwear item and up to two accessories may be fixed."
+        ),
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "product_ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "Products every outfit must contain",
+                    },
+                    "preferences": {
+                        "type": "object",
+                        "properties": {
+                            "occasion": {"type": "string"},
+                            "season": {"type": "string"},
+                            "budget": {"type": "string"},
+                        },
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "default": 3,
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Product fields to return (id is always included)",
+                    },
+                    "expand": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Outfit sections to add: score_breakdown, explanation",
+                    },
+                    "ids_only": {
+                        "type": "boolean",
+                        "description": "Return product ids instead of product objects",
+                    },
+                },
+                "required": ["product_ids"],
+            },
+        },
+        responses={
+            200: OpenApiResponse(description="Completed outfits"),
+            400: OpenApiResponse(description="Invalid product combination"),
+            404: OpenApiResponse(description="Product not found"),
+            503: OpenApiResponse(description="Busy and no stale result; see Retry-After"),
+        },
+    )
+    @admission_controlled("recommendations")
+    @track_memory("complete_look")
+    def post(self, request):
+        """
+        Complete outfits around the fixed products.
+        """
+        projection, error = _parse_projection(request.data)
+        if error:
+            return error
+
+        product_ids = request.data.get("product_ids")
+        if (
+            not isinstance(product_ids, list)
+            or not product_ids
+            or not all(isinstance(pk, int) for pk in product_ids)
+        ):
+            return Response(
+                {
+                    "success": False,
+                    "error": "product_ids must be a non-empty list of integers",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = min(max(int(request.data.get("limit", 3)), 1), 20)
+            result = RecommendationService.complete_outfit(
+                product_ids=product_ids,
+                preferences=request.data.get("preferences") or {},
+                limit=limit,
+                projection=projection,
+            )
+            return Response(
+                {
+                    "success": True,
+                    **result,
+                }
+            )
+
+        except ProductNotFoundError as e:
+            return Response(
+                {
+                    "success": False,
+                    "error": str(e),
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        except ValueError as e:
+            return Response(
+                {
+                    "success": False,
+                    "error": str(e),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        except Overloaded:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error completing outfit: {str(e)}", exc_info=True)
+            return Response(
+                {
+                    "success": False,
+                    "error": "An error occurred while generating recommendations",
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
@@ -46,10 +46,11 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
 ]
 
+# Every app here is imported on each worker boot; keep it to what is used.
+# (JWT and its token blacklist are disabled, see REST_FRAMEWORK below.)
 THIRD_PARTY_APPS = [
     "rest_framework",
-    "rest_framework_simplejwt.token_blacklist",
-    "drf_yasg",
+    "drf_spectacular",
     "corsheaders",
 ]
 
@@ -62,6 +63,8 @@ INHOUSE_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + INHOUSE_APPS
 
 MIDDLEWARE = [
+    # First, so traces cover the whole middleware stack.
+    "apps.core.slowlog.SlowRequestMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,6 +73,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.core.db_router.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -96,6 +100,93 @@ WSGI_APPLICATION = "backend.wsgi.application"
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")
 DATABASES = {"default": dj_database_url.parse(DATABASE_URL, conn_max_age=600)}
 
+# Optional read replicas, comma-separated, e.g.
+# DATABASE_REPLICA_URLS=postgres://ro@replica1/outfits,postgres://ro@replica2/outfits
+# Read-only requests are routed to them by apps.core.db_router.
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+):
+    if not _url:
+        continue
+    _alias = f"replica_{_index}"
+    DATABASES[_alias] = dj_database_url.parse(_url, conn_max_age=600)
+    DATABASES[_alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(_alias)
+
+# Pool PostgreSQL connections per process (apps.core.db_backends.postgresql).
+# Connections go back to the pool after each request, so CONN_MAX_AGE is 0;
+# the same settings suit sync workers and ASGI. MAX_SIZE should cover the
+# threads per process that query concurrently.
+DATABASE_POOL = os.getenv("DATABASE_POOL", "1") == "1"
+if DATABASE_POOL:
+    for _settings in DATABASES.values():
+        if _settings["ENGINE"] == "django.db.backends.postgresql":
+            _settings["ENGINE"] = "apps.core.db_backends.postgresql"
+            _settings["CONN_MAX_AGE"] = 0
+            _settings["POOL"] = {
+                "MIN_SIZE": int(os.getenv("DATABASE_POOL_MIN_SIZE", 1)),
+                "MAX_SIZE": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+                "TIMEOUT": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+                "MAX_IDLE": float(os.getenv("DATABASE_POOL_MAX_IDLE", 300)),
+            }
+
+DATABASE_ROUTERS = ["apps.core.db_router.ReplicaRouter"]
+# Seconds a client reads from the primary after it wrote.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+# Seconds between health checks of a replica.
+REPLICA_HEALTH_INTERVAL = int(os.getenv("REPLICA_HEALTH_INTERVAL", 10))
+
+# Directory for the memory-mapped catalog snapshot shared by the worker
+# processes of a host (apps.products.snapshot); empty disables it. Must be
+# local to the host, e.g. /dev/shm/outfits or a tmpfs mount.
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+# Seconds between checks for a newly published snapshot.
+CATALOG_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_CHECK_INTERVAL", 1))
+
+
+# Cold boot of a web worker (importing the WSGI app), in milliseconds. Checked
+# by the test suite and by `manage.py profile_startup`.
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 1500))
+
+# Staff-only memory diagnostics under /api/diagnostics/memory/ (apps.core.memory).
+# Off by default; tracing itself is started with PYTHONTRACEMALLOC or from
+# the endpoint. Snapshots are also dumped to MEMORY_SNAPSHOT_DIR when set.
+MEMORY_DIAGNOSTICS = os.getenv("MEMORY_DIAGNOSTICS", "0") == "1"
+MEMORY_SNAPSHOT_DIR = os.getenv("MEMORY_SNAPSHOT_DIR", "")
+
+# Slow-request log (apps.core.slowlog): requests under these paths are traced
+# and kept when slower than the threshold, plus a random sample of the rest.
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG", "1") == "1"
+SLOW_REQUEST_PATHS = ["/api/recommendations/", "/api/products/"]
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", 500))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", 0.01))
+SLOW_REQUEST_BUFFER_SIZE = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", 200))
+# Local SQLite file shared by a host's workers; empty keeps traces in memory.
+SLOW_REQUEST_DB = os.getenv("SLOW_REQUEST_DB", "")
+SLOW_REQUEST_DB_MAX_ROWS = int(os.getenv("SLOW_REQUEST_DB_MAX_ROWS", 5000))
+
+# Adaptive concurrency limits per process for uncached recommendation work
+# (apps.core.admission). Keep max_limit below the worker's thread count so
+# cheap endpoints always get a thread. Requests over the limit are served
+# stale results kept for ADMISSION_STALE_TTL seconds, or get a 503.
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+ADMISSION_LIMITS = {
+    "recommendations": {
+        "initial": 8,
+        "min_limit": 1,
+        "max_limit": int(os.getenv("ADMISSION_MAX_RECOMMENDATIONS", 16)),
+        "target_ms": float(os.getenv("ADMISSION_TARGET_MS", 250)),
+    },
+    "bulk": {
+        "initial": 2,
+        "min_limit": 1,
+        "max_limit": int(os.getenv("ADMISSION_MAX_BULK", 4)),
+        "target_ms": float(os.getenv("ADMISSION_TARGET_MS", 250)),
+    },
+}
+ADMISSION_STALE_TTL = int(os.getenv("ADMISSION_STALE_TTL", 86400))
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -133,10 +224,13 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # The browsable API is a debugging aid; in production it only adds
+    # template rendering to any request that happens to accept text/html.
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
-    ],
+        "apps.core.renderers.ORJSONRenderer",
+        "apps.core.renderers.MessagePackRenderer",
+    ]
+    + (["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
@@ -4,6 +4,7 @@ URL configuration for Outfit Recommendation System.
 
 from django.contrib import admin
 from django.urls import path, include
+from apps.core.admin import slow_requests_view
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -12,6 +13,7 @@ from drf_spectacular.views import (
 
 urlpatterns = [
     # Admin
+    path('admin/slow-requests/', admin.site.admin_view(slow_requests_view), name='admin-slow-requests'),
     path('admin/', admin.site.urls),
     
     # API endpoints
@@ -12,13 +12,9 @@ const api = axios.create({
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
-    // Add timestamp to prevent caching issues
-    if (config.method === 'get') {
-      config.params = {
-        ...config.params,
-        _t: Date.now(),
-      };
-    }
+    // GET responses carry ETag/Last-Modified with `Cache-Control: no-cache`,
+    // so the browser revalidates instead of serving stale data; no
+    // cache-busting parameter is needed.
     return config;
   },
   (error) => {
@@ -0,0 +1,21 @@
+"""
+Shared pytest configuration.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """Run tests against an in-process cache instead of Redis."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "outfit-tests",
+        }
+    }
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
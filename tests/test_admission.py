@@ -0,0 +1,255 @@
+"""
+Tests for adaptive admission control.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.admission import AIMDLimiter, get_limiter, reset_limiters
+from apps.products.catalog import bump_catalog_version
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(settings):
+    settings.ADMISSION_CONTROL = True
+    reset_limiters()
+    yield
+    reset_limiters()
+
+
+@pytest.fixture
+def products(db):
+    build_synthetic_catalog(60, seed=50)
+    return list(Product.objects.filter(category='top')[:2])
+
+
+def _saturate(name):
+    limiter = get_limiter(name)
+    limiter.in_flight = int(limiter.limit)
+    return limiter
+
+
+def _recommend(product, **params):
+    url = reverse('get-recommendations', kwargs={'product_id': product.id})
+    return APIClient().get(url, params)
+
+
+class TestLimiter:
+    """AIMD arithmetic."""
+
+    def _limiter(self, **overrides):
+        options = {'initial': 4, 'min_limit': 1, 'max_limit': 8, 'target_ms': 100}
+        options.update(overrides)
+        return AIMDLimiter('test', **options)
+
+    def test_rejects_at_the_limit(self):
+        limiter = self._limiter(initial=2)
+
+        assert limiter.try_acquire() and limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.stats()['rejected'] == 1
+
+    def test_fast_calls_grow_a_used_limit(self):
+        limiter = self._limiter()
+        for _ in range(40):
+            for _ in range(int(limiter.limit)):
+                limiter.try_acquire()
+            for _ in range(limiter.in_flight):
+                limiter.release(10)
+
+        assert limiter.stats()['limit'] == 8
+
+    def test_idle_limit_does_not_grow(self):
+        limiter = self._limiter()
+        for _ in range(50):
+            limiter.try_acquire()
+            limiter.release(10)
+
+        assert limiter.stats()['limit'] == 4
+
+    def test_slow_calls_shrink_the_limit_once_per_interval(self):
+        limiter = self._limiter(initial=8, backoff=0.5)
+        for _ in range(3):
+            limiter.try_acquire()
+            limiter.release(500)
+
+        assert limiter.stats()['limit'] == 4
+        assert limiter.retry_after() == 1
+
+    def test_limit_stays_within_bounds(self):
+        limiter = self._limiter(initial=1, backoff=0.1, target_ms=0)
+        for _ in range(5):
+            limiter.try_acquire()
+            limiter.release(500)
+
+        assert limiter.stats()['limit'] == 1
+
+
+@pytest.mark.django_db
+class TestShedding:
+    """What an overloaded endpoint answers."""
+
+    def test_busy_without_stale_result_is_503(self, products):
+        _saturate('recommendations')
+
+        response = _recommend(products[0])
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data['success'] is False
+        assert int(response['Retry-After']) >= 1
+
+    def test_busy_serves_the_stale_result(self, products):
+        fresh = _recommend(products[0], occasion='office')
+        bump_catalog_version()
+        limiter = _saturate('recommendations')
+
+        response = _recommend(products[0], occasion='office')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['stale'] is True
+        assert response.data['recommendations'] == fresh.data['recommendations']
+        assert limiter.stats()['served_stale'] == 1
+
+    def test_stale_result_carries_no_validators(self, products):
+        _recommend(products[0])
+        bump_catalog_version()
+        _saturate('recommendations')
+
+        response = _recommend(products[0])
+
+        assert response.data['stale'] is True
+        assert 'ETag' not in response
+        assert 'Last-Modified' not in response
+        assert 'no-store' in response['Cache-Control']
+
+    def test_cache_hits_are_not_limited(self, products):
+        _recommend(products[0])
+        _saturate('recommendations')
+
+        response = _recommend(products[0])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['cached'] is True
+        assert 'stale' not in response.data
+
+    def test_bulk_has_its_own_limit(self, products):
+        _saturate('bulk')
+        url = reverse('bulk-recommendations')
+        body = {'product_ids': [product.id for product in products]}
+
+        assert APIClient().post(url, body, format='json').status_code == (
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        assert _recommend(products[0]).status_code == status.HTTP_200_OK
+
+    def test_bulk_is_not_shed_halfway(self, products, monkeypatch):
+        limiter = get_limiter('bulk')
+        original = RecommendationService._build_recommendations.__func__
+
+        def saturate_after_first_item(cls, *args, **kwargs):
+            # Other requests fill the limit while this one is running.
+            limiter.in_flight = int(limiter.limit)
+            return original(cls, *args, **kwargs)
+
+        monkeypatch.setattr(
+            RecommendationService, '_build_recommendations',
+            classmethod(saturate_after_first_item),
+        )
+        url = reverse('bulk-recommendations')
+        body = {'product_ids': [product.id for product in products]}
+
+        response = APIClient().post(url, body, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [result['success'] for result in response.data['results']] == [True, True]
+        assert limiter.stats()['admitted'] == 1
+
+    def _bulk(self, products):
+        url = reverse('bulk-recommendations')
+        body = {'product_ids': [product.id for product in products]}
+        return APIClient().post(url, body, format='json')
+
+    def test_cached_bulk_items_are_not_limited(self, products):
+        self._bulk(products)
+        limiter = _saturate('bulk')
+
+        response = self._bulk(products)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert all(result['cached'] for result in response.data['results'])
+        assert limiter.stats()['rejected'] == 0
+
+    def test_busy_bulk_serves_what_it_can(self, products):
+        fresh = self._bulk(products[:1]).data['results'][0]
+        stale = _recommend(products[1], limit=3).data
+        bump_catalog_version()
+        self._bulk(products[:1])
+        _saturate('bulk')
+
+        response = self._bulk(products)
+
+        assert response.status_code == status.HTTP_200_OK
+        first, second = response.data['results']
+        assert first['cached'] is True and 'stale' not in first
+        assert first['recommendations'] == fresh['recommendations']
+        assert second['stale'] is True
+        assert second['recommendations'] == stale['recommendations']
+
+    def test_busy_bulk_marks_items_it_cannot_serve(self, products):
+        self._bulk(products[:1])
+        _saturate('bulk')
+
+        response = self._bulk(products)
+
+        assert response.status_code == status.HTTP_200_OK
+        first, second = response.data['results']
+        assert first['success'] is True
+        assert second == {
+            'product_id': products[1].id,
+            'success': False,
+            'error': 'Service is busy, retry later',
+        }
+        assert int(response['Retry-After']) >= 1
+
+    def test_complete_look_is_limited(self, products):
+        _saturate('recommendations')
+
+        response = APIClient().post(
+            reverse('complete-look'), {'product_ids': [products[0].id]}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_disabled(self, products, settings):
+        settings.ADMISSION_CONTROL = False
+        _saturate('recommendations')
+
+        assert _recommend(products[0]).status_code == status.HTTP_200_OK
+
+    def test_cheap_endpoints_stay_available(self, products, client):
+        _saturate('recommendations')
+        _saturate('bulk')
+
+        assert client.get('/api/health/').status_code == status.HTTP_200_OK
+        assert client.get('/api/products/').status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_stats_report_limiter_state(products, client):
+    _recommend(products[0])
+
+    admission = client.get('/api/stats/').json()['admission']
+
+    assert admission['enabled'] is True
+    assert set(admission['limiters']) == {'recommendations', 'bulk'}
+    recommendations = admission['limiters']['recommendations']
+    assert recommendations['admitted'] == 1
+    assert recommendations['in_flight'] == 0
+    assert recommendations['latency_ms'] > 0
@@ -0,0 +1,111 @@
+"""
+Tests for the benchmark suite.
+"""
+
+import pytest
+
+from apps.core.benchmark import compare_reports, run_benchmarks, summarize
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog, iter_synthetic_products
+
+
+class TestSyntheticCatalog:
+    """Tests for the seeded catalog generator."""
+
+    def test_generation_is_deterministic_across_ranges(self):
+        """Growing a catalog yields the same products as building it at once."""
+        direct = [fields["sku"] for fields, _, _ in iter_synthetic_products(0, 1500)]
+        grown = [fields["sku"] for fields, _, _ in iter_synthetic_products(0, 700)]
+        grown += [fields["sku"] for fields, _, _ in iter_synthetic_products(700, 1500)]
+        assert direct == grown
+
+        first = list(iter_synthetic_products(1200, 1201, seed=7))
+        again = list(iter_synthetic_products(1200, 1201, seed=7))
+        assert first == again
+
+    @pytest.mark.django_db
+    def test_build_creates_products_with_relations(self):
+        """Synthetic products get occasions and seasons."""
+        created = build_synthetic_catalog(50, seed=3, batch_size=20)
+
+        assert created == 50
+        assert Product.objects.count() == 50
+        product = Product.objects.prefetch_related("occasions", "seasons").first()
+        assert product.occasions.exists()
+        assert product.seasons.exists()
+
+
+@pytest.mark.django_db
+class TestBenchmarkRunner:
+    """Tests for running and comparing benchmark reports."""
+
+    def test_run_benchmarks_report_shape(self, settings):
+        """A tiny run produces a JSON-friendly report for every case."""
+        settings.ALLOWED_HOSTS = ["*"]
+        report = run_benchmarks(sizes=[80], seed=1, samples=3)
+
+        results = report["results"]["80"]
+        assert set(results) == {
+            "candidate_query",
+            "recommend_cold",
+            "recommend_warm",
+            "combination_scoring",
+            "bulk_endpoint",
+            "import_rows",
+            "search",
+            "render",
+            "connection_acquire",
+            "similar_items",
+            "catalog_snapshot",
+        }
+        assert results["recommend_cold"]["count"] == 3
+        assert results["search"]["count"] == 3
+        assert results["render"]["recommend_msgpack_bytes"] > 0
+        assert results["connection_acquire"]["pooled_count"] == 8 * 3 * 5
+        assert results["connection_acquire"]["pooled_connections_created"] <= 4
+        assert results["similar_items"]["products"] == 80
+        assert results["similar_items"]["ivf_count"] == 3
+        assert results["import_rows"]["created"] == results["import_rows"]["rows"]
+        # The import case is rolled back and does not grow the catalog.
+        assert Product.objects.count() == 80
+
+    def test_unknown_case_rejected(self):
+        """Asking for an unknown case raises."""
+        with pytest.raises(ValueError):
+            run_benchmarks(sizes=[10], cases=["nope"])
+
+
+class TestReportComparison:
+    """Tests for baseline regression detection."""
+
+    def test_flags_latency_and_throughput_regressions(self):
+        """Slower latency and lower throughput beyond tolerance are flagged."""
+        baseline = {
+            "results": {
+                "1000": {
+                    "recommend_cold": {"p95_ms": 100.0, "count": 20},
+                    "import_rows": {"rows_per_sec": 1000.0},
+                }
+            }
+        }
+        current = {
+            "results": {
+                "1000": {
+                    "recommend_cold": {"p95_ms": 140.0, "count": 20},
+                    "import_rows": {"rows_per_sec": 950.0},
+                }
+            }
+        }
+
+        regressions = compare_reports(current, baseline, tolerance=0.25)
+
+        assert [(r["case"], r["metric"]) for r in regressions] == [
+            ("recommend_cold", "p95_ms")
+        ]
+
+    def test_summarize_percentiles(self):
+        """Latency summaries use nearest-rank percentiles."""
+        summary = summarize([float(n) for n in range(1, 101)])
+        assert summary["p50_ms"] == 50.0
+        assert summary["p95_ms"] == 95.0
+        assert summary["max_ms"] == 100.0
@@ -0,0 +1,149 @@
+"""
+Tests for the product change feed.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.changes import changes_since, latest_seq
+from apps.products.models import Product, ProductChange, ProductOccasion
+from apps.products.synthetic import build_synthetic_catalog
+from apps.products.utils import import_products_from_workbook_rows
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def product(db):
+    return Product.objects.create(
+        name='Feed Shirt',
+        category='top',
+        sub_category='shirt',
+        color='navy',
+        style='formal',
+        gender='male',
+        price=40,
+        price_range='mid',
+    )
+
+
+def _feed(api_client, **params):
+    return api_client.get(reverse('product-changes'), params)
+
+
+@pytest.mark.django_db
+class TestChangeLog:
+    """Every write path appends to the log."""
+
+    def test_save_and_relations_are_logged(self, product):
+        ProductOccasion.objects.create(product=product, occasion='office')
+        product.color = 'black'
+        product.save()
+
+        assert list(ProductChange.objects.values_list('product_id', flat=True)) == [
+            product.pk
+        ] * 3
+
+    def test_bulk_paths_are_logged(self):
+        build_synthetic_catalog(30, seed=47)
+        headers = ['name', 'category', 'sub_category', 'color', 'style', 'price', 'sku', 'occasions']
+        result = import_products_from_workbook_rows(
+            [['Import Tee', 'top', 'tee', 'white', 'casual', 12, 'IMP-1', 'casual, weekend']],
+            headers,
+        )
+
+        assert result['errors'] == []
+        logged = set(ProductChange.objects.values_list('product_id', flat=True))
+        assert logged == set(Product.objects.values_list('id', flat=True))
+
+    def test_sequence_is_monotonic(self, product):
+        before = latest_seq()
+        product.save()
+        product.delete()
+
+        seqs = list(ProductChange.objects.filter(seq__gt=before).values_list('seq', flat=True))
+        assert len(seqs) == 2
+        assert seqs == sorted(seqs)
+
+
+@pytest.mark.django_db
+class TestChangesSince:
+    """Compaction and batching."""
+
+    def test_compacts_to_latest_state(self, product):
+        since = latest_seq()
+        ProductOccasion.objects.create(product=product, occasion='party')
+        product.name = 'Renamed Shirt'
+        product.save()
+
+        result = changes_since(since)
+
+        assert len(result['changes']) == 1
+        change = result['changes'][0]
+        assert change['op'] == 'upsert'
+        assert change['seq'] == result['next_since'] == latest_seq()
+        assert change['product']['name'] == 'Renamed Shirt'
+        assert change['product']['occasions'] == ['party']
+
+    def test_delete_and_deactivate_are_deletes(self, product):
+        other = Product.objects.create(
+            name='Other', category='bottom', sub_category='jeans', color='blue',
+            style='casual', price=30, price_range='mid',
+        )
+        other_id, since = other.pk, latest_seq()
+        other.delete()
+        product.is_active = False
+        product.save()
+
+        changes = changes_since(since)['changes']
+
+        assert [(c['id'], c['op']) for c in changes] == [
+            (other_id, 'delete'),
+            (product.pk, 'delete'),
+        ]
+        assert 'product' not in changes[0]
+
+    def test_batches_resume_from_next_since(self):
+        build_synthetic_catalog(25, seed=7)
+        seen, since = [], 0
+        while True:
+            batch = changes_since(since, limit=10)
+            seen.extend(change['id'] for change in batch['changes'])
+            since = batch['next_since']
+            if not batch['has_more']:
+                break
+
+        assert sorted(seen) == sorted(Product.objects.values_list('id', flat=True))
+        assert changes_since(since)['changes'] == []
+
+
+@pytest.mark.django_db
+class TestChangesEndpoint:
+    """GET /api/products/changes/."""
+
+    def test_returns_changes_after_since(self, api_client, product):
+        since = latest_seq()
+        product.price = 55
+        product.save()
+
+        response = _feed(api_client, since=since)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['success'] is True
+        assert [c['id'] for c in response.data['changes']] == [product.pk]
+        assert response.data['changes'][0]['product']['price'] == '55.00'
+        assert response.data['has_more'] is False
+
+    @pytest.mark.parametrize('params', [{'since': 'x'}, {'since': -1}, {'limit': 0}])
+    def test_invalid_parameters_are_400(self, api_client, params):
+        assert _feed(api_client, **params).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_export_reports_change_seq(self, api_client, product):
+        response = api_client.get(reverse('product-export'))
+
+        assert int(response['X-Change-Seq']) == latest_seq()
@@ -0,0 +1,154 @@
+"""
+Tests for "complete the look" recommendations.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services.color_service import ColorService
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(400, seed=31)
+    return Product.objects.filter(is_active=True)
+
+
+def _pick(catalog, category, **filters):
+    return catalog.filter(category=category, gender='male', **filters).order_by('id').first()
+
+
+def _complete(api_client, ids, **extra):
+    return api_client.post(
+        reverse('complete-look'), {'product_ids': ids, **extra}, format='json'
+    )
+
+
+@pytest.mark.django_db
+class TestCompleteOutfit:
+    """Service behaviour."""
+
+    def test_single_item_matches_regular_recommendations(self, catalog):
+        top = _pick(catalog, 'top')
+        regular = RecommendationService.generate_recommendations(top.id, {}, 5)
+        completed = RecommendationService.complete_outfit([top.id], {}, 5)
+
+        assert completed['recommendations'] == regular['recommendations']
+
+    def test_outfits_contain_every_fixed_item(self, catalog):
+        top = _pick(catalog, 'top', style='casual')
+        bottom = _pick(catalog, 'bottom', style='casual')
+        result = RecommendationService.complete_outfit([top.id, bottom.id], {}, 5)
+
+        assert result['metadata']['missing_categories'] == ['footwear', 'accessory']
+        assert result['recommendations']
+        for outfit in result['recommendations']:
+            assert outfit['top']['id'] == top.id
+            assert outfit['bottom']['id'] == bottom.id
+            for item in [outfit['footwear'], *outfit['accessories']]:
+                assert ColorService.are_colors_compatible(top.color, item['color'])
+                assert ColorService.are_colors_compatible(bottom.color, item['color'])
+
+    def test_fixed_accessories_are_kept_together(self, catalog):
+        top = _pick(catalog, 'top')
+        accessories = list(catalog.filter(category='accessory').order_by('id')[:2])
+        result = RecommendationService.complete_outfit(
+            [top.id] + [acc.id for acc in accessories], {}, 3
+        )
+
+        for outfit in result['recommendations']:
+            assert [acc['id'] for acc in outfit['accessories']] == [
+                acc.id for acc in accessories
+            ]
+
+    def test_pools_are_reused_across_requests(self, catalog, monkeypatch):
+        top = _pick(catalog, 'top')
+        bottoms = list(catalog.filter(category='bottom', gender='male').order_by('id')[:2])
+        calls = []
+        original = RecommendationService._rank_candidates.__func__
+
+        def spy(cls, queryset, base_products, limit):
+            calls.append([product.id for product in base_products])
+            return original(cls, queryset, base_products, limit)
+
+        monkeypatch.setattr(RecommendationService, '_rank_candidates', classmethod(spy))
+
+        RecommendationService.complete_outfit([top.id, bottoms[0].id], {}, 3)
+        calls.clear()
+        RecommendationService.complete_outfit([top.id, bottoms[1].id], {}, 3)
+
+        assert [top.id] not in calls
+        assert [bottoms[1].id] in calls
+
+    def test_warm_cost_does_not_grow_with_fixed_items(
+        self, catalog, django_assert_max_num_queries
+    ):
+        top = _pick(catalog, 'top', style='casual')
+        accessory = catalog.filter(category='accessory', gender='unisex').order_by('id').first()
+        for product in (top, accessory):
+            RecommendationService.complete_outfit([product.id], {}, 3)
+
+        # One lookup of the fixed products, plus at most one fallback query
+        # per missing category.
+        with django_assert_max_num_queries(3):
+            RecommendationService.complete_outfit([top.id, accessory.id], {}, 3)
+
+    def test_falls_back_to_joint_query_for_thin_intersections(self, catalog, monkeypatch):
+        monkeypatch.setattr(RecommendationService, 'CANDIDATE_POOL_SIZE', 2)
+        top = _pick(catalog, 'top', style='smart_casual')
+        bottom = _pick(catalog, 'bottom', style='smart_casual')
+        result = RecommendationService.complete_outfit([top.id, bottom.id], {}, 3)
+
+        assert result['recommendations']
+        footwear = result['recommendations'][0]['footwear']
+        assert ColorService.are_colors_compatible(top.color, footwear['color'])
+        assert ColorService.are_colors_compatible(bottom.color, footwear['color'])
+
+    def test_result_is_cached(self, catalog):
+        top = _pick(catalog, 'top')
+        first = RecommendationService.complete_outfit([top.id], {}, 3)
+        again = RecommendationService.complete_outfit([top.id], {}, 3)
+
+        assert first['cached'] is False
+        assert again['cached'] is True
+
+
+@pytest.mark.django_db
+class TestCompleteLookView:
+    """POST /api/recommendations/complete/."""
+
+    def test_success(self, api_client, catalog):
+        top = _pick(catalog, 'top')
+        response = _complete(api_client, [top.id], limit=2, ids_only=True)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['fixed_products'] == [top.id]
+        assert len(response.data['recommendations']) <= 2
+
+    def test_two_items_of_one_category_is_400(self, api_client, catalog):
+        tops = list(catalog.filter(category='top').values_list('id', flat=True)[:2])
+        response = _complete(api_client, tops)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'top' in response.data['error']
+
+    def test_unknown_product_is_404(self, api_client, catalog):
+        response = _complete(api_client, [catalog.first().id, 0])
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize('ids', [[], 'abc', [1, 'x']])
+    def test_invalid_payload_is_400(self, api_client, catalog, ids):
+        assert _complete(api_client, ids).status_code == status.HTTP_400_BAD_REQUEST
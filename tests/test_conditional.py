@@ -0,0 +1,155 @@
+"""
+Tests for catalog-versioned conditional GET.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(60, seed=5)
+    return Product.objects.filter(is_active=True)
+
+
+def _recommend_url(catalog):
+    product = catalog.filter(category='top').first()
+    return reverse('get-recommendations', kwargs={'product_id': product.id})
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """ETag / Last-Modified handling on catalog-backed endpoints."""
+
+    @pytest.mark.parametrize('route', ['list', 'filters', 'detail', 'recommend'])
+    def test_if_none_match_returns_304_without_queries(
+        self, api_client, catalog, route, django_assert_num_queries
+    ):
+        url = {
+            'list': reverse('product-list'),
+            'filters': reverse('product-filters'),
+            'detail': reverse('product-detail', kwargs={'pk': catalog.first().pk}),
+            'recommend': _recommend_url(catalog),
+        }[route]
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'].startswith('W/"')
+        assert 'Last-Modified' in response
+        assert 'no-cache' in response['Cache-Control']
+
+        with django_assert_num_queries(0):
+            again = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED
+        assert again['ETag'] == response['ETag']
+        assert again.content == b''
+
+    def test_etag_and_vary_follow_the_accept_header(self, api_client, catalog):
+        url = reverse('product-list')
+        as_json = api_client.get(url, HTTP_ACCEPT='application/json')
+        as_msgpack = api_client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        assert as_json['ETag'] != as_msgpack['ETag']
+        assert 'Accept' in as_json['Vary']
+        assert 'Accept' in as_msgpack['Vary']
+
+        again = api_client.get(
+            url, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=as_msgpack['ETag']
+        )
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED
+        assert 'Accept' in again['Vary']
+
+    def test_etag_varies_with_query_but_not_cache_buster(self, api_client, catalog):
+        url = reverse('product-list')
+        base = api_client.get(url)['ETag']
+
+        assert api_client.get(url, {'_t': 123})['ETag'] == base
+        assert api_client.get(url, {'category': 'top'})['ETag'] != base
+
+    def test_etag_is_weak_because_bodies_vary(self, api_client, catalog):
+        url = _recommend_url(catalog)
+        first = api_client.get(url)
+        second = api_client.get(url)
+
+        assert first.data['cached'] is False
+        assert second.data['cached'] is True
+        assert first['ETag'] == second['ETag']
+        assert first['ETag'].startswith('W/')
+
+        # If-None-Match uses the weak comparison, so the bare tag matches too.
+        again = api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'][2:])
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_catalog_write_changes_etag(
+        self, api_client, catalog, django_capture_on_commit_callbacks
+    ):
+        url = reverse('product-list')
+        etag = api_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product = catalog.first()
+            product.price = 1
+            product.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_if_modified_since(self, api_client, catalog):
+        url = reverse('product-list')
+        last_modified = api_client.get(url)['Last-Modified']
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_errors_carry_no_validators(self, api_client, db):
+        url = reverse('get-recommendations', kwargs={'product_id': 99999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert 'ETag' not in response
+
+
+@pytest.mark.django_db
+class TestDeterministicOutfits:
+    """Outfit ids and cached payloads are stable across generations."""
+
+    def test_outfit_ids_derive_from_items(self, catalog):
+        product = catalog.filter(category='top').first()
+        first = RecommendationService.generate_recommendations(product.id, {}, 5)
+        cache.clear()
+        second = RecommendationService.generate_recommendations(product.id, {}, 5)
+
+        assert first['recommendations']
+        assert second['cached'] is False
+        assert [o['id'] for o in first['recommendations']] == [
+            o['id'] for o in second['recommendations']
+        ]
+        for outfit in first['recommendations']:
+            items = [outfit['top'], outfit['bottom'], outfit['footwear'], *outfit['accessories']]
+            assert outfit['id'] == RecommendationService._outfit_id(items)
+
+    def test_cache_key_follows_catalog_version(
+        self, catalog, django_capture_on_commit_callbacks
+    ):
+        product = catalog.filter(category='top').first()
+        key = RecommendationService._generate_cache_key(product.id, {}, 3)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+
+        assert RecommendationService._generate_cache_key(product.id, {}, 3) != key
+        assert key.startswith('outfit_rec_')
@@ -0,0 +1,149 @@
+"""
+Tests for read-replica routing.
+"""
+
+import time
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core import db_router
+from apps.core.db_router import PIN_COOKIE, ReplicaRouter
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def replicas(settings, monkeypatch):
+    """Configure one replica and record every time reads are routed to it."""
+    settings.DATABASE_REPLICAS = ['replica_0']
+    db_router.reset_health()
+    routed = []
+
+    def choose_replica():
+        routed.append('replica_0')
+        # Keep running queries on the test database.
+        return None
+
+    monkeypatch.setattr(db_router, 'choose_replica', choose_replica)
+    yield routed
+    db_router.reset_health()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(30, seed=3)
+    return Product.objects.filter(is_active=True)
+
+
+class TestReplicaRouter:
+    """Router decisions outside of requests."""
+
+    def test_reads_outside_requests_use_primary(self, replicas):
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+        assert replicas == []
+
+    def test_writes_and_migrations_use_primary(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_0']
+        router = ReplicaRouter()
+
+        assert router.db_for_write(Product) == 'default'
+        assert router.allow_migrate('default', 'products')
+        assert not router.allow_migrate('replica_0', 'products')
+
+    def test_unhealthy_replica_is_skipped_until_rechecked(self, settings, monkeypatch):
+        settings.DATABASE_REPLICAS = ['replica_0', 'replica_1']
+        settings.REPLICA_HEALTH_INTERVAL = 60
+        db_router.reset_health()
+        checks = []
+        # Try the replicas in order so both get checked on the first call.
+        monkeypatch.setattr(db_router.random, 'shuffle', lambda aliases: None)
+        monkeypatch.setattr(
+            db_router, '_check', lambda alias: checks.append(alias) or alias == 'replica_1'
+        )
+
+        assert {db_router.choose_replica() for _ in range(5)} == {'replica_1'}
+        assert sorted(set(checks)) == ['replica_0', 'replica_1']
+        assert len(checks) == 2
+
+        settings.REPLICA_HEALTH_INTERVAL = 0
+        monkeypatch.setattr(db_router, '_check', lambda alias: False)
+        assert db_router.choose_replica() is None
+        db_router.reset_health()
+
+
+# Not wrapped in a test transaction: reads inside one always use the primary.
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRoutingMiddleware:
+    """Which requests read from replicas."""
+
+    def test_safe_requests_use_replica(self, api_client, catalog, replicas):
+        api_client.get(reverse('product-list'))
+
+        assert replicas
+
+    def test_replica_is_chosen_once_per_request(self, api_client, catalog, replicas):
+        # A counted page: the count, the rows and their prefetches.
+        api_client.get(reverse('product-list'), {'page': 1})
+
+        assert replicas == ['replica_0']
+
+    def test_bulk_post_opts_in(self, api_client, catalog, replicas):
+        product = catalog.filter(category='top').first()
+        api_client.post(
+            reverse('bulk-recommendations'), {'product_ids': [product.id]}, format='json'
+        )
+
+        assert replicas
+
+    def test_write_pins_client_to_primary(self, api_client, catalog, replicas, settings):
+        product = catalog.first()
+        response = api_client.patch(
+            reverse('product-detail', kwargs={'pk': product.pk}),
+            {'name': 'Renamed'},
+            format='json',
+        )
+
+        assert response.status_code == 200
+        assert float(response.cookies[PIN_COOKIE].value) > time.time()
+        assert response.cookies[PIN_COOKIE]['max-age'] == settings.REPLICA_PIN_SECONDS
+
+        replicas.clear()
+        api_client.get(reverse('product-detail', kwargs={'pk': product.pk}))
+        assert replicas == []
+
+    def test_expired_pin_reads_from_replica(self, api_client, catalog, replicas):
+        api_client.cookies[PIN_COOKIE] = str(time.time() - 1)
+        api_client.get(reverse('product-list'))
+
+        assert replicas
+
+    def test_no_pin_without_replicas(self, api_client, catalog, settings):
+        settings.DATABASE_REPLICAS = []
+        product = catalog.first()
+        response = api_client.patch(
+            reverse('product-detail', kwargs={'pk': product.pk}),
+            {'name': 'Renamed'},
+            format='json',
+        )
+
+        assert PIN_COOKIE not in response.cookies
+
+    def test_reads_inside_transaction_use_primary(self, replicas):
+        state = db_router._RoutingState(use_replica=True)
+        token = db_router._state.set(state)
+        try:
+            with transaction.atomic():
+                assert ReplicaRouter().db_for_read(Product) == 'default'
+            ReplicaRouter().db_for_read(Product)
+        finally:
+            db_router._state.reset(token)
+
+        assert replicas == ['replica_0']
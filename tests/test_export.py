@@ -0,0 +1,148 @@
+"""
+Tests for the streaming catalog export.
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.export import COLUMNS, export_rows, stream_export
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.products.utils import import_products_from_workbook_rows
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(150, seed=46)
+    return Product.objects.filter(is_active=True)
+
+
+def _export(api_client, **params):
+    response = api_client.get(reverse('product-export'), params)
+    return response, b''.join(response.streaming_content)
+
+
+def _csv_rows(body):
+    return list(csv.reader(io.StringIO(body.decode())))
+
+
+@pytest.mark.django_db
+class TestExportRows:
+    """Chunked row reading."""
+
+    def test_rows_carry_relations(self, catalog):
+        product = catalog.order_by('id').first()
+        rows = {row['id']: row for row in export_rows(catalog.order_by('id'))}
+
+        assert len(rows) == catalog.count()
+        assert sorted(rows[product.id]['occasions']) == sorted(
+            product.occasions.values_list('occasion', flat=True)
+        )
+        assert rows[product.id]['price'] == str(product.price)
+
+    def test_relation_queries_are_per_chunk(self, catalog, django_assert_max_num_queries):
+        # One products query plus occasions and seasons per chunk of 50.
+        with django_assert_max_num_queries(1 + 2 * 3):
+            assert len(list(export_rows(catalog.order_by('id'), chunk_size=50))) == 150
+
+    def test_unknown_format_is_rejected(self, catalog):
+        with pytest.raises(ValueError):
+            stream_export(catalog, 'parquet')
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    """GET /api/products/export/."""
+
+    def test_csv_is_default(self, api_client, catalog):
+        response, body = _export(api_client)
+        rows = _csv_rows(body)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'products.csv' in response['Content-Disposition']
+        assert response.has_header('ETag')
+        assert tuple(rows[0]) == COLUMNS
+        assert len(rows) - 1 == catalog.count()
+
+    def test_filters_and_ordering_follow_the_list_endpoint(self, api_client, catalog):
+        _, body = _export(api_client, category='top', ordering='-price')
+        rows = [dict(zip(COLUMNS, row)) for row in _csv_rows(body)[1:]]
+
+        assert {row['category'] for row in rows} == {'top'}
+        assert len(rows) == catalog.filter(category='top').count()
+        prices = [float(row['price']) for row in rows]
+        assert prices == sorted(prices, reverse=True)
+
+    def test_ndjson(self, api_client, catalog):
+        response, body = _export(api_client, file_format='ndjson', gender='female')
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert len(lines) == catalog.filter(gender='female').count()
+        assert all(isinstance(line['occasions'], list) for line in lines)
+        assert set(lines[0]) == set(COLUMNS)
+
+    def test_xlsx_reimports_to_the_same_catalog(self, api_client, catalog):
+        import openpyxl
+
+        _, body = _export(api_client, file_format='xlsx')
+        sheet = openpyxl.load_workbook(io.BytesIO(body), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        expected = list(
+            catalog.order_by('sku').values_list('sku', 'name', 'category', 'gender', 'style')
+        )
+        expected_occasions = {
+            product.sku: sorted(product.occasions.values_list('occasion', flat=True))
+            for product in catalog
+        }
+
+        Product.objects.all().delete()
+        result = import_products_from_workbook_rows(rows[1:], list(rows[0]))
+
+        assert result['errors'] == []
+        assert list(
+            Product.objects.order_by('sku').values_list('sku', 'name', 'category', 'gender', 'style')
+        ) == expected
+        for product in Product.objects.all():
+            assert sorted(product.occasions.values_list('occasion', flat=True)) == (
+                expected_occasions[product.sku]
+            )
+
+    def test_unknown_format_is_400(self, api_client, catalog):
+        response = api_client.get(reverse('product-export'), {'file_format': 'pdf'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+    """manage.py export_products."""
+
+    def test_writes_file(self, catalog, tmp_path):
+        path = tmp_path / 'tops.csv'
+        call_command(
+            'export_products', '--output', str(path), '--category', 'top', stdout=io.StringIO()
+        )
+
+        rows = _csv_rows(path.read_bytes())
+        assert len(rows) - 1 == catalog.filter(category='top').count()
+        assert not list(tmp_path.glob('*.part'))
+
+    def test_streams_to_stdout(self, catalog):
+        out = io.StringIO()
+        call_command('export_products', '--format', 'ndjson', '--chunk-size', '40', stdout=out)
+
+        assert len(out.getvalue().splitlines()) == catalog.count()
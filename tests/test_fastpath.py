@@ -0,0 +1,99 @@
+"""
+Tests for the serializer-free product read path.
+"""
+
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.products.fastpath import (
+    detail_values,
+    get_product_detail,
+    list_values,
+    serialize_details,
+    serialize_list,
+)
+from apps.products.models import Product, ProductOccasion, ProductSeason
+from apps.products.serializers import ProductListSerializer, ProductSerializer
+from apps.products.synthetic import build_synthetic_catalog
+from apps.products.views import ProductViewSet
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(50, seed=13)
+    odd = Product.objects.create(
+        name='No SKU Belt', category='accessory', sub_category='belt',
+        color='brown', style='casual', gender='unisex', price='12.5',
+        price_range='budget', image_url=None, sku=None, tags=[],
+    )
+    # Inserted out of value order, so relation order is observable.
+    ProductOccasion.objects.create(product=odd, occasion='weekend')
+    ProductOccasion.objects.create(product=odd, occasion='office')
+    ProductSeason.objects.create(product=odd, season='winter')
+    ProductSeason.objects.create(product=odd, season='summer')
+    return ProductViewSet.queryset.all()
+
+
+def _json(data):
+    return json.loads(json.dumps(data, default=str))
+
+
+@pytest.mark.django_db
+class TestFastPathParity:
+    """The fast path must be indistinguishable from the serializers."""
+
+    def test_list_rows_match_serializer(self, catalog):
+        expected = ProductListSerializer(catalog, many=True).data
+        actual = serialize_list(list_values(catalog))
+
+        assert actual == expected
+        assert [list(row) for row in actual] == [list(row) for row in expected]
+
+    def test_detail_rows_match_serializer(self, catalog):
+        expected = ProductSerializer(catalog, many=True).data
+        actual = serialize_details(detail_values(catalog))
+
+        assert _json(actual) == _json(expected)
+        assert [list(row) for row in actual] == [list(row) for row in expected]
+
+    def test_single_detail(self, catalog):
+        product = catalog.get(name='No SKU Belt')
+
+        assert get_product_detail(catalog, product.pk) == ProductSerializer(product).data
+        assert get_product_detail(catalog, 0) is None
+
+    def test_endpoints_render_identically(self, api_client, catalog):
+        product = catalog.get(name='No SKU Belt')
+        detail = api_client.get(reverse('product-detail', kwargs={'pk': product.pk}))
+        assert json.loads(detail.content) == _json(ProductSerializer(product).data)
+
+        page = api_client.get(reverse('product-list'), {'ordering': '-price', 'page_size': 100})
+        expected = ProductListSerializer(catalog.order_by('-price'), many=True).data
+        assert json.loads(page.content)['results'] == _json(expected)
+
+    def test_detail_query_count(self, api_client, catalog, django_assert_max_num_queries):
+        product = catalog.first()
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        api_client.get(url)  # warm the catalog version key
+
+        # One row query plus one for both relations, aggregated in SQL.
+        with django_assert_max_num_queries(2):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+        assert response.status_code == 200
+
+    def test_missing_detail_is_404(self, api_client, catalog):
+        response = api_client.get(reverse('product-detail', kwargs={'pk': 0}))
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('pk', ['abc', '1e3'])
+    def test_non_numeric_detail_is_404(self, api_client, catalog, pk):
+        response = api_client.get(reverse('product-detail', kwargs={'pk': pk}))
+        assert response.status_code == 404
@@ -0,0 +1,49 @@
+"""
+Tests for the HTTP load-generation harness.
+"""
+
+from collections import Counter
+
+import pytest
+
+from apps.core.loadtest import ZipfSampler, parse_mix, run_load, serve_application
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+class TestLoadTestHelpers:
+    """Tests for request mix parsing and popularity sampling."""
+
+    def test_parse_mix(self):
+        """Mix strings become integer weights; unknown endpoints are rejected."""
+        assert parse_mix("recommend=3,products=1") == {"recommend": 3, "products": 1}
+        assert parse_mix(None)["recommend"] > 0
+        with pytest.raises(ValueError):
+            parse_mix("checkout=5")
+        with pytest.raises(ValueError):
+            parse_mix("recommend=0")
+
+    def test_zipf_sampler_is_skewed(self):
+        """The most popular item is drawn far more often than the median one."""
+        sampler = ZipfSampler(list(range(100)), exponent=1.2, seed=1)
+        counts = Counter(sampler.sample_many(5000))
+        top = counts.most_common(1)[0][1]
+        assert top > 5000 * 0.15
+        assert len(counts) > 20
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_load_against_live_app(settings):
+    """The harness drives all endpoints of an in-process server."""
+    settings.ALLOWED_HOSTS = ["*"]
+    build_synthetic_catalog(40, seed=5)
+    ids = list(Product.objects.values_list("id", flat=True))
+
+    with serve_application() as base_url:
+        report = run_load(
+            base_url, ids, concurrency=2, duration=None, requests=12, bulk_size=2
+        )
+
+    assert report["overall"]["requests"] == 12
+    assert report["overall"]["error_rate"] == 0
+    assert set(report["endpoints"]) == {"recommend", "bulk", "products"}
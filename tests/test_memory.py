@@ -0,0 +1,144 @@
+"""
+Tests for the memory diagnostics endpoints.
+"""
+
+import tracemalloc
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.memory import reset_memory_diagnostics, take_snapshot
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+_leak = []
+
+
+@pytest.fixture
+def staff_client(db, django_user_model, settings):
+    settings.MEMORY_DIAGNOSTICS = True
+    client = APIClient()
+    client.force_authenticate(
+        django_user_model.objects.create_user('ops', password='x', is_staff=True)
+    )
+    return client
+
+
+@pytest.fixture
+def tracing():
+    reset_memory_diagnostics()
+    tracemalloc.start(1)
+    yield
+    tracemalloc.stop()
+    reset_memory_diagnostics()
+    _leak.clear()
+
+
+@pytest.mark.django_db
+class TestAccess:
+    """Opt-in and staff only."""
+
+    def test_disabled_is_404(self, staff_client, settings):
+        settings.MEMORY_DIAGNOSTICS = False
+
+        assert staff_client.get(reverse('memory-status')).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_non_staff_is_rejected(self, settings, django_user_model):
+        settings.MEMORY_DIAGNOSTICS = True
+        client = APIClient()
+        client.force_authenticate(django_user_model.objects.create_user('shopper', password='x'))
+
+        assert client.get(reverse('memory-status')).status_code == status.HTTP_403_FORBIDDEN
+        assert APIClient().get(reverse('memory-objects')).status_code in (
+            status.HTTP_401_UNAUTHORIZED,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+
+@pytest.mark.django_db
+class TestSnapshots:
+    """tracemalloc snapshots and diffs."""
+
+    def test_snapshot_requires_tracing(self, staff_client):
+        assert not tracemalloc.is_tracing()
+
+        response = staff_client.post(reverse('memory-snapshots'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_start_and_stop_tracing(self, staff_client):
+        response = staff_client.post(reverse('memory-status'), {'tracing': True, 'frames': 2}, format='json')
+        try:
+            assert response.data['tracing'] is True
+            assert response.data['frames'] == 2
+        finally:
+            response = staff_client.post(reverse('memory-status'), {'tracing': False}, format='json')
+        assert response.data['tracing'] is False
+
+    def test_diff_shows_growth_by_line(self, staff_client, tracing):
+        first = staff_client.post(reverse('memory-snapshots')).data['snapshot']['id']
+        _leak.extend(bytearray(1024) for _ in range(2000))
+        second = staff_client.post(reverse('memory-snapshots')).data['snapshot']['id']
+
+        response = staff_client.get(
+            reverse('memory-snapshot-detail', kwargs={'snapshot_id': second}),
+            {'compare_to': first, 'limit': 5},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        top = response.data['stats'][0]
+        assert top['file'] == __file__
+        assert top['size_diff_bytes'] >= 2000 * 1024
+        assert response.data['size_diff_bytes'] >= 2000 * 1024
+
+    def test_group_by_filename(self, staff_client, tracing):
+        snapshot_id = take_snapshot()['id']
+
+        response = staff_client.get(
+            reverse('memory-snapshot-detail', kwargs={'snapshot_id': snapshot_id}),
+            {'group_by': 'filename'},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['stats']
+        assert all('line' not in stat for stat in response.data['stats'])
+
+    def test_unknown_snapshot_and_bad_group_by(self, staff_client, tracing):
+        snapshot_id = take_snapshot()['id']
+        url = reverse('memory-snapshot-detail', kwargs={'snapshot_id': snapshot_id})
+
+        assert staff_client.get(url, {'group_by': 'module'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert staff_client.get(
+            reverse('memory-snapshot-detail', kwargs={'snapshot_id': snapshot_id + 99})
+        ).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_snapshots_are_written_to_disk(self, staff_client, tracing, settings, tmp_path):
+        settings.MEMORY_SNAPSHOT_DIR = str(tmp_path)
+
+        path = staff_client.post(reverse('memory-snapshots')).data['snapshot']['path']
+
+        assert tracemalloc.Snapshot.load(path).traces
+
+
+@pytest.mark.django_db
+class TestObjectsAndViewPeaks:
+    """Object counts and per-request peaks."""
+
+    def test_object_counts(self, staff_client):
+        response = staff_client.get(reverse('memory-objects'), {'limit': 5})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['objects']) == 5
+        assert any(row['type'] == 'builtins.dict' for row in response.data['objects'])
+
+    def test_recommendation_requests_record_peaks(self, staff_client, tracing):
+        build_synthetic_catalog(80, seed=48)
+        product = Product.objects.filter(category='top').first()
+        staff_client.get(reverse('get-recommendations', kwargs={'product_id': product.id}))
+
+        views = staff_client.get(reverse('memory-status')).data['views']
+        assert views['recommendations']['requests'] == 1
+        assert views['recommendations']['max_peak_bytes'] > 0
+        assert views['recommendations']['recent'][0]['path'].endswith(f'/{product.id}/')
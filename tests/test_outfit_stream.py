@@ -0,0 +1,180 @@
+"""
+Tests for the paginated ranked-outfit stream.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.catalog import bump_catalog_version
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services import outfit_stream
+from apps.recommendations.services.outfit_stream import (
+    BATCH_SIZE,
+    decode_cursor,
+    encode_cursor,
+    stream_recommendations,
+)
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+from apps.recommendations.services.scoring_service import ScoringService
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def top(db):
+    build_synthetic_catalog(300, seed=43)
+    return Product.objects.filter(category='top', gender='male').order_by('id').first()
+
+
+def _ids(page):
+    return [outfit['id'] for outfit in page['recommendations']]
+
+
+def _walk(top, pages, page_size=10):
+    result = stream_recommendations(top.id, {}, None, page_size)
+    seen = [result]
+    for _ in range(pages - 1):
+        if not result['next_cursor']:
+            break
+        result = stream_recommendations(top.id, {}, result['next_cursor'], page_size)
+        seen.append(result)
+    return seen
+
+
+@pytest.mark.django_db
+class TestOutfitStream:
+    """Service behaviour."""
+
+    def test_pages_do_not_overlap(self, top):
+        pages = _walk(top, 4)
+        ids = [pk for page in pages for pk in _ids(page)]
+
+        assert len(ids) == 40
+        assert len(set(ids)) == len(ids)
+
+    @pytest.mark.parametrize('limit', [1, 5, 20])
+    def test_first_page_equals_regular_recommendations(self, top, limit):
+        regular = RecommendationService.generate_recommendations(top.id, {}, limit)
+        page = stream_recommendations(top.id, {}, None, limit)
+
+        assert page['recommendations'] == regular['recommendations']
+
+    def test_scores_never_rise_within_a_batch(self, top):
+        page = stream_recommendations(top.id, {}, None, BATCH_SIZE)
+        scores = [outfit['score'] for outfit in page['recommendations']]
+
+        assert len(scores) == BATCH_SIZE
+        assert scores == sorted(scores, reverse=True)
+
+    def test_scores_never_rise_across_pages_of_a_batch(self, top):
+        pages = _walk(top, 4, page_size=BATCH_SIZE // 4)
+        scores = [outfit['score'] for page in pages for outfit in page['recommendations']]
+
+        assert len(scores) == BATCH_SIZE
+        assert scores == sorted(scores, reverse=True)
+
+    def test_small_page_scores_one_batch(self, top, monkeypatch):
+        calls = []
+        original = ScoringService.calculate_outfit_score
+
+        def spy(outfit, preferences):
+            calls.append(outfit['id'])
+            return original(outfit, preferences)
+
+        monkeypatch.setattr(ScoringService, 'calculate_outfit_score', staticmethod(spy))
+        page = stream_recommendations(top.id, {}, None, 3)
+
+        # One batch ranked, then the page itself scored for its breakdown.
+        assert len(calls) == BATCH_SIZE + 3
+        assert page['metadata']['generated'] == BATCH_SIZE
+
+    def test_pages_past_the_ranked_part_extend_it(self, top):
+        pages = _walk(top, 5, page_size=10)
+
+        assert pages[0]['metadata']['generated'] == BATCH_SIZE
+        assert pages[-1]['metadata']['generated'] == 2 * BATCH_SIZE
+
+    def test_next_page_does_not_recompute(self, top, monkeypatch, django_assert_max_num_queries):
+        first = stream_recommendations(top.id, {}, None, 10)
+        calls = []
+        original = ScoringService.calculate_outfit_score
+
+        def spy(outfit, preferences):
+            calls.append(outfit['id'])
+            return original(outfit, preferences)
+
+        monkeypatch.setattr(ScoringService, 'calculate_outfit_score', staticmethod(spy))
+
+        # Only the base product lookup hits the database.
+        with django_assert_max_num_queries(1):
+            second = stream_recommendations(top.id, {}, first['next_cursor'], 10)
+
+        # Scored once for the page itself, never to re-rank the stream.
+        assert sorted(calls) == sorted(_ids(second))
+
+    def test_stream_ends_with_null_cursor(self, top, monkeypatch):
+        monkeypatch.setattr(outfit_stream, 'MAX_STREAM_LENGTH', 25)
+        pages = _walk(top, 10)
+
+        assert sum(len(page['recommendations']) for page in pages) == 25
+        assert pages[-1]['next_cursor'] is None
+
+    def test_cursor_round_trip(self):
+        assert decode_cursor(encode_cursor(7, 30)) == (7, 30)
+
+    @pytest.mark.parametrize('cursor', ['garbage', encode_cursor(1, -5), 'e30'])
+    def test_malformed_cursor_is_rejected(self, top, cursor):
+        with pytest.raises(ValueError):
+            stream_recommendations(top.id, {}, cursor, 10)
+
+    def test_cursor_expires_with_catalog(self, top):
+        first = stream_recommendations(top.id, {}, None, 10)
+        bump_catalog_version()
+
+        with pytest.raises(ValueError, match='expired'):
+            stream_recommendations(top.id, {}, first['next_cursor'], 10)
+
+
+@pytest.mark.django_db
+class TestOutfitStreamView:
+    """GET /api/recommendations/<id>/?cursor=."""
+
+    def test_follow_next_links(self, api_client, top):
+        url = reverse('get-recommendations', args=[top.id])
+        response = api_client.get(url, {'cursor': '', 'page_size': 5, 'ids_only': 'true'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['recommendations']) == 5
+        assert response.data['metadata']['offset'] == 0
+        assert 'page_size=5' in response.data['next']
+
+        second = api_client.get(response.data['next'])
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data['metadata']['offset'] == 5
+        assert not set(_ids(response.data)) & set(_ids(second.data))
+
+    def test_page_size_is_capped(self, api_client, top):
+        url = reverse('get-recommendations', args=[top.id])
+        response = api_client.get(url, {'cursor': '', 'page_size': 500, 'ids_only': 'true'})
+
+        assert len(response.data['recommendations']) == outfit_stream.MAX_PAGE_SIZE
+
+    def test_bad_cursor_is_400(self, api_client, top):
+        url = reverse('get-recommendations', args=[top.id])
+        response = api_client.get(url, {'cursor': 'nope'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_unknown_product_is_404(self, api_client, top):
+        url = reverse('get-recommendations', args=[999999])
+        response = api_client.get(url, {'cursor': ''})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
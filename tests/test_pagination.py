@@ -0,0 +1,131 @@
+"""
+Tests for product listing pagination.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.catalog import get_catalog_version
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(45, seed=7)
+    return Product.objects.filter(is_active=True)
+
+
+def _walk(client, params):
+    url = reverse('product-list')
+    ids = []
+    pages = 0
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        ids.extend(item['id'] for item in response.data['results'])
+        pages += 1
+        if not response.data['next']:
+            return ids, pages, response
+        response = client.get(response.data['next'])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Tests for cursor mode."""
+
+    def test_walks_default_ordering(self, api_client, catalog):
+        ids, pages, _ = _walk(api_client, {'cursor': '', 'page_size': 10})
+
+        expected = list(catalog.order_by('category', 'name', 'id').values_list('id', flat=True))
+        assert ids == expected
+        assert pages == 5
+
+    def test_walks_descending_price(self, api_client, catalog):
+        ids, _, _ = _walk(api_client, {'cursor': '', 'ordering': '-price', 'page_size': 7})
+
+        expected = list(catalog.order_by('-price', '-id').values_list('id', flat=True))
+        assert ids == expected
+
+    def test_previous_link_returns_prior_page(self, api_client, catalog):
+        url = reverse('product-list')
+        first = api_client.get(url, {'cursor': '', 'ordering': 'created_at', 'page_size': 10})
+        second = api_client.get(first.data['next'])
+        back = api_client.get(second.data['previous'])
+
+        assert first.data['previous'] is None
+        assert [p['id'] for p in back.data['results']] == [p['id'] for p in first.data['results']]
+
+    def test_count_is_opt_in(self, api_client, catalog):
+        url = reverse('product-list')
+        plain = api_client.get(url, {'cursor': ''})
+        counted = api_client.get(url, {'cursor': '', 'count': 'exact', 'category': 'top'})
+
+        assert 'count' not in plain.data
+        assert counted.data['count'] == catalog.filter(category='top').count()
+
+    def test_skips_count_query(self, api_client, catalog):
+        url = reverse('product-list')
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(url, {'cursor': '', 'page_size': 5})
+
+        assert not any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries)
+
+    def test_invalid_cursor(self, api_client, catalog):
+        url = reverse('product-list')
+        response = api_client.get(url, {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_bound_to_ordering(self, api_client, catalog):
+        url = reverse('product-list')
+        first = api_client.get(url, {'cursor': '', 'ordering': 'price'})
+        cursor = first.data['next'].split('cursor=')[1].split('&')[0]
+        response = api_client.get(url, {'cursor': cursor, 'ordering': 'name'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestCachedCount:
+    """Tests for the page-number mode's cached count."""
+
+    def test_page_number_mode_unchanged(self, api_client, catalog):
+        url = reverse('product-list')
+        response = api_client.get(url, {'page': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == catalog.count()
+        assert len(response.data['results']) == 20
+
+    def test_count_served_from_cache(self, api_client, catalog):
+        url = reverse('product-list')
+        api_client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(url, {'page': 2})
+
+        assert not any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries)
+
+    def test_write_invalidates_count(
+        self, api_client, catalog, django_capture_on_commit_callbacks
+    ):
+        url = reverse('product-list')
+        before = api_client.get(url).data['count']
+        version = get_catalog_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Product.objects.filter(pk=catalog.first().pk).update(is_active=False)
+            catalog.last().save()
+        after = api_client.get(url).data['count']
+
+        assert get_catalog_version() != version
+        assert after == before - 1
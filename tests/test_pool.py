@@ -0,0 +1,193 @@
+"""
+Tests for the in-process connection pool.
+"""
+
+import threading
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.pool import ConnectionPool, PoolTimeout, close_pools, get_pool, pool_stats
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    made = []
+
+    def connect():
+        conn = FakeConnection(len(made))
+        made.append(conn)
+        return conn
+
+    kwargs.setdefault('check', lambda conn: conn.healthy)
+    return ConnectionPool(connect, **kwargs), made
+
+
+class TestConnectionPool:
+    """Checkout, checkin, health checks and limits."""
+
+    def test_connections_are_reused(self):
+        pool, made = make_pool(max_size=2)
+
+        first = pool.getconn()
+        pool.putconn(first)
+        again = pool.getconn()
+
+        assert again is first
+        assert len(made) == 1
+        assert pool.stats()['acquired'] == 2
+
+    def test_unhealthy_connection_is_replaced_on_checkout(self):
+        pool, made = make_pool(max_size=1)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.healthy = False
+
+        replacement = pool.getconn()
+
+        assert replacement is not conn
+        assert conn.closed
+        stats = pool.stats()
+        assert stats['failed_checks'] == 1
+        assert stats['size'] == 1
+
+    def test_discard_frees_the_slot(self):
+        pool, made = make_pool(max_size=1)
+        conn = pool.getconn()
+        pool.putconn(conn, discard=True)
+
+        assert conn.closed
+        assert pool.getconn() is made[1]
+
+    def test_times_out_when_exhausted(self):
+        pool, _ = make_pool(max_size=1)
+        pool.getconn()
+
+        with pytest.raises(PoolTimeout):
+            pool.getconn(timeout=0.01)
+        assert pool.stats()['timeouts'] == 1
+
+    def test_waiter_gets_returned_connection(self):
+        pool, made = make_pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(pool.getconn()))
+        waiter.start()
+        while pool.stats()['waiting'] == 0:
+            pass
+        pool.putconn(conn)
+        waiter.join()
+
+        assert results == [conn]
+        assert len(made) == 1
+        assert pool.stats()['wait_ms_max'] > 0
+
+    def test_idle_connections_expire_down_to_min_size(self):
+        pool, made = make_pool(min_size=1, max_size=3, max_idle=0)
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+
+        stats = pool.stats()
+        assert stats['size'] == 1
+        assert stats['idle'] == 1
+        assert sum(conn.closed for conn in made) == 2
+
+    def test_min_size_is_opened_on_first_use(self):
+        pool, made = make_pool(min_size=3, max_size=5)
+        conn = pool.getconn()
+
+        stats = pool.stats()
+        assert len(made) == 3
+        assert stats['size'] == 3
+        assert stats['idle'] == 2
+        assert pool.getconn() is not conn
+        assert len(made) == 3
+
+    def test_min_size_is_restored_after_discards(self):
+        pool, made = make_pool(min_size=2, max_size=2)
+        conns = [pool.getconn(), pool.getconn()]
+        for conn in conns:
+            pool.putconn(conn, discard=True)
+
+        stats = pool.stats()
+        assert stats['size'] == 2
+        assert stats['idle'] == 2
+        assert len(made) == 4
+
+    def test_failed_connect_releases_slot(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError('refused')
+            return FakeConnection(len(attempts))
+
+        pool = ConnectionPool(connect, max_size=1)
+        with pytest.raises(OSError):
+            pool.getconn()
+        assert pool.getconn().number == 2
+
+    def test_concurrent_checkouts_never_exceed_max_size(self):
+        pool, made = make_pool(max_size=3, timeout=5)
+        peak = []
+
+        def worker():
+            for _ in range(50):
+                conn = pool.getconn()
+                peak.append(pool.stats()['in_use'])
+                pool.putconn(conn)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) <= 3
+        assert len(made) <= 3
+        assert pool.stats()['acquired'] == 400
+
+    def test_closed_pool_closes_idle_and_returned_connections(self):
+        pool, _ = make_pool(max_size=2)
+        idle, busy = pool.getconn(), pool.getconn()
+        pool.putconn(idle)
+        pool.close()
+        pool.putconn(busy)
+
+        assert idle.closed and busy.closed
+        assert pool.stats()['size'] == 0
+
+    def test_invalid_sizes(self):
+        with pytest.raises(ValueError):
+            ConnectionPool(lambda: None, min_size=3, max_size=2)
+
+
+class TestPoolRegistry:
+    """Process-wide pools and their metrics."""
+
+    def test_registry(self):
+        pool = get_pool(('test', 1), lambda: make_pool(name='registry-test')[0])
+        assert get_pool(('test', 1), lambda: None) is pool
+        pool.putconn(pool.getconn())
+
+        assert any(stats['name'] == 'registry-test' for stats in pool_stats())
+        close_pools('registry-test')
+        assert not any(stats['name'] == 'registry-test' for stats in pool_stats())
+
+    @pytest.mark.django_db
+    def test_stats_endpoint_reports_pools(self):
+        response = APIClient().get(reverse('system-stats'))
+
+        assert response.data['database_pools'] == pool_stats()
@@ -3,11 +3,24 @@ Tests for the products app.
 """
 
 import pytest
+from django.db import transaction
+from django.db.models.deletion import Collector
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from apps.products.models import Product, ProductOccasion, ProductSeason
+from apps.products.catalog import get_catalog_version
+from apps.products.models import (
+    Product,
+    ProductOccasion,
+    ProductSeason,
+    occasion_mask,
+    occasions_from_mask,
+    season_mask,
+    seasons_from_mask,
+    sync_product_masks,
+)
+from apps.products.synthetic import build_synthetic_catalog
 
 
 @pytest.fixture
@@ -69,4 +82,128 @@ class TestProductEndpoints:
         url = reverse('product-detail', kwargs={'pk': 99999})
         response = api_client.get(url)
         
-        assert response.status_code == status.HTTP_404_NOT_FOUND
\ No newline at end of file
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+class TestProductMasks:
+    """Tests for the denormalized occasion/season masks."""
+
+    def test_create_endpoint_sets_masks(self, api_client):
+        """Products created through the API get masks matching their relations."""
+        url = reverse('product-list')
+        response = api_client.post(url, {
+            'name': 'Linen Shirt',
+            'category': 'top',
+            'sub_category': 'shirt',
+            'color': 'white',
+            'style': 'casual',
+            'gender': 'male',
+            'price': '39.00',
+            'price_range': 'budget',
+            'occasions': ['beach', 'casual'],
+            'seasons': ['summer'],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        product = Product.objects.get(id=response.data['id'])
+        assert occasions_from_mask(product.occasion_mask) == ['casual', 'beach']
+        assert seasons_from_mask(product.season_mask) == ['summer']
+
+    def test_relation_changes_resync_masks(self, sample_product):
+        """Adding or removing relation rows updates the product masks."""
+        sample_product.refresh_from_db()
+        assert sample_product.occasion_mask == occasion_mask(['office'])
+        assert sample_product.season_mask == season_mask(['all'])
+
+        ProductOccasion.objects.create(product=sample_product, occasion='wedding')
+        ProductSeason.objects.filter(product=sample_product).delete()
+        sample_product.refresh_from_db()
+
+        assert occasions_from_mask(sample_product.occasion_mask) == ['office', 'wedding']
+        assert sample_product.season_mask == 0
+
+    def test_instance_delete_resyncs_masks(self, sample_product):
+        """Deleting a single relation row (as admin inlines do) updates the masks."""
+        ProductOccasion.objects.get(product=sample_product).delete()
+        sample_product.refresh_from_db()
+
+        assert sample_product.occasion_mask == 0
+        assert sample_product.season_mask == season_mask(['all'])
+
+    def test_sync_is_one_update(self, django_assert_num_queries):
+        """Masks for any number of products are recomputed in one statement."""
+        build_synthetic_catalog(40, seed=29)
+        expected = dict(Product.objects.values_list('id', 'occasion_mask'))
+        Product.objects.update(occasion_mask=0, season_mask=0)
+
+        with django_assert_num_queries(1):
+            sync_product_masks(expected)
+
+        assert dict(Product.objects.values_list('id', 'occasion_mask')) == expected
+
+    @pytest.mark.django_db(transaction=True)
+    def test_catalog_version_bumps_once_per_transaction(self, sample_product):
+        """Many relation writes in one transaction bump the version once."""
+        version = get_catalog_version()
+        with transaction.atomic():
+            for occasion in ['party', 'date', 'brunch']:
+                ProductOccasion.objects.create(product=sample_product, occasion=occasion)
+            ProductSeason.objects.filter(product=sample_product).delete()
+            sample_product.save()
+
+        assert get_catalog_version() == version + 1
+
+    def test_product_delete_fast_deletes_relations(self, sample_product):
+        """Relation rows are removed by cascade without per-row signals."""
+        collector = Collector(using='default')
+
+        assert collector.can_fast_delete(sample_product.occasions.all())
+        assert collector.can_fast_delete(sample_product.seasons.all())
+
+
+@pytest.mark.django_db
+class TestProductFacets:
+    """Tests for the faceted filters endpoint."""
+
+    def test_facet_counts_respect_filters(self, api_client, sample_product):
+        """Counts cover active products matching the applied filters."""
+        Product.objects.create(
+            name='Black Loafers', category='footwear', sub_category='loafers',
+            color='black', style='formal', gender='male', price=90,
+            price_range='mid',
+        )
+        Product.objects.create(
+            name='Hidden Tee', category='top', sub_category='t-shirt',
+            color='white', style='casual', gender='male', price=10,
+            price_range='budget', is_active=False,
+        )
+        url = reverse('product-filters')
+
+        response = api_client.get(url)
+        assert response.data['total'] == 2
+        assert {f['value']: f['count'] for f in response.data['facets']['category']} == {
+            'top': 1, 'footwear': 1,
+        }
+        assert 'white' not in response.data['filters']['colors']
+
+        response = api_client.get(url, {'category': 'footwear'})
+        assert response.data['total'] == 1
+        assert response.data['facets']['color'] == [{'value': 'black', 'count': 1}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_facets_cached_until_catalog_changes(
+        self, api_client, sample_product, django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        """Repeat calls skip the database until a product is written."""
+        url = reverse('product-filters')
+        api_client.get(url)
+        with django_assert_num_queries(0):
+            api_client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_product.color = 'white'
+            sample_product.save()
+
+        response = api_client.get(url)
+        assert response.data['facets']['color'] == [{'value': 'white', 'count': 1}]
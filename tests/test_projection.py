@@ -0,0 +1,178 @@
+"""
+Tests for sparse recommendation responses.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services.projection import Projection
+from apps.recommendations.services.recommendation_service import (
+    RecommendationService,
+)
+from apps.recommendations.services.scoring_service import ScoringService
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def base_product(db):
+    build_synthetic_catalog(120, seed=21)
+    return Product.objects.filter(category='top', gender='male').first()
+
+
+def _url(product):
+    return reverse('get-recommendations', kwargs={'product_id': product.id})
+
+
+class TestProjection:
+    """Tests for parsing and applying projections."""
+
+    def test_from_params(self):
+        projection = Projection.from_params(
+            {'fields': 'image_url, price', 'expand': 'explanation', 'ids_only': 'false'}
+        )
+
+        assert projection.fields == {'id', 'image_url', 'price'}
+        assert projection.includes('explanation')
+        assert not projection.includes('score_breakdown')
+        assert not projection.is_full
+
+    def test_default_is_full(self):
+        projection = Projection.from_params({})
+
+        assert projection.is_full
+        assert projection.cache_token() is None
+        assert projection.includes('score_breakdown')
+
+    @pytest.mark.parametrize('params', [{'fields': 'id,secret'}, {'fields': 'occasion_mask'}, {'expand': 'everything'}])
+    def test_rejects_unknown_names(self, params):
+        with pytest.raises(ValueError):
+            Projection.from_params(params)
+
+    @pytest.mark.parametrize('params', [{'fields': 5}, {'fields': [1]}, {'expand': {'a': 'b'}}])
+    def test_rejects_values_that_are_not_strings(self, params):
+        with pytest.raises(ValueError):
+            Projection.from_params(params)
+
+
+@pytest.mark.django_db
+class TestSparseResponses:
+    """Tests for fields/expand/ids_only on the recommendation endpoints."""
+
+    def test_full_response_unchanged(self, api_client, base_product):
+        data = api_client.get(_url(base_product)).data
+        outfit = data['recommendations'][0]
+
+        assert 'name' in outfit['top']
+        assert outfit['explanation'] == ScoringService.get_score_explanation(
+            {'overall': outfit['score'], 'breakdown': outfit['score_breakdown']}
+        )
+
+    def test_full_response_hides_scoring_masks(self, api_client, base_product):
+        data = api_client.get(_url(base_product)).data
+        outfit = data['recommendations'][0]
+        items = [data['base_product'], outfit['top'], outfit['bottom'], *outfit['accessories']]
+
+        for item in items:
+            assert 'occasions' in item
+            assert 'occasion_mask' not in item
+            assert 'season_mask' not in item
+
+    def test_full_items_keep_the_baseline_keys(self, api_client, base_product):
+        data = api_client.get(_url(base_product)).data
+        outfit = data['recommendations'][0]
+        baseline = {
+            'id', 'name', 'category', 'sub_category', 'color', 'style', 'price',
+            'price_range', 'image_url', 'gender', 'occasions', 'seasons', 'tags',
+        }
+
+        assert set(data['base_product']) == baseline
+        for item in [outfit['bottom'], outfit['footwear'], *outfit['accessories']]:
+            assert set(item) == baseline | {'compatibility_score'}
+
+    def test_fields(self, api_client, base_product):
+        data = api_client.get(_url(base_product), {'fields': 'image_url'}).data
+        outfit = data['recommendations'][0]
+
+        assert data['base_product'] == {'id': base_product.id, 'image_url': base_product.image_url}
+        assert set(outfit) == {'id', 'top', 'bottom', 'footwear', 'accessories', 'total_price', 'score'}
+        assert set(outfit['top']) == {'id', 'image_url'}
+
+    def test_ids_only_with_expand(self, api_client, base_product):
+        data = api_client.get(
+            _url(base_product), {'ids_only': 'true', 'expand': 'score_breakdown'}
+        ).data
+        outfit = data['recommendations'][0]
+
+        assert data['base_product'] == base_product.id
+        assert isinstance(outfit['bottom'], int)
+        assert all(isinstance(acc, int) for acc in outfit['accessories'])
+        assert 'score_breakdown' in outfit
+        assert 'explanation' not in outfit
+
+    def test_ids_only_payload_is_an_order_of_magnitude_smaller(self, api_client, base_product):
+        full = api_client.get(_url(base_product), {'limit': 10})
+        sparse = api_client.get(_url(base_product), {'limit': 10, 'ids_only': '1'})
+
+        assert len(sparse.content) * 10 <= len(full.content)
+
+    def test_sparse_results_are_cached_separately(self, api_client, base_product):
+        api_client.get(_url(base_product))
+        sparse = api_client.get(_url(base_product), {'ids_only': '1'}).data
+        again = api_client.get(_url(base_product), {'ids_only': '1'}).data
+
+        assert sparse['cached'] is False
+        assert again['cached'] is True
+        assert again['recommendations'] == sparse['recommendations']
+
+    def test_sparse_skips_explanations(self, base_product, monkeypatch):
+        calls = []
+        original = ScoringService.get_score_explanation
+        monkeypatch.setattr(
+            ScoringService, 'get_score_explanation',
+            staticmethod(lambda data: calls.append(data) or original(data)),
+        )
+        RecommendationService.generate_recommendations(
+            base_product.id, {}, 3, projection=Projection(ids_only=True)
+        )
+        assert calls == []
+
+        RecommendationService.generate_recommendations(base_product.id, {}, 3)
+        assert 0 < len(calls) <= 3
+
+    def test_invalid_projection_is_400(self, api_client, base_product):
+        response = api_client.get(_url(base_product), {'fields': 'nope'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'nope' in response.data['error']
+
+    @pytest.mark.parametrize('url', ['bulk-recommendations', 'complete-look'])
+    @pytest.mark.parametrize('body', [
+        {'product_ids': [1], 'fields': 5},
+        {'product_ids': [1], 'fields': [1]},
+        [1, 2],
+    ])
+    def test_malformed_body_is_400(self, api_client, base_product, url, body):
+        response = api_client.post(reverse(url), body, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['success'] is False
+
+    def test_bulk_accepts_projection(self, api_client, base_product):
+        response = api_client.post(
+            reverse('bulk-recommendations'),
+            {'product_ids': [base_product.id], 'fields': ['image_url'], 'limit': 2},
+            format='json',
+        )
+        result = response.data['results'][0]
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(result['base_product']) == {'id', 'image_url'}
+        assert set(result['recommendations'][0]['top']) == {'id', 'image_url'}
@@ -0,0 +1,92 @@
+"""
+Tests for the API renderers.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+import msgpack
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.renderers import MessagePackRenderer, ORJSONRenderer
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(40, seed=9)
+    return Product.objects.filter(is_active=True)
+
+
+PAYLOAD = {
+    'price': decimal.Decimal('19.90'),
+    'created': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2024, 5, 1),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Product'),
+    'nested': [{'score': 0.5, 'tags': ('a', 'b')}],
+}
+
+
+class TestRenderers:
+    """Renderer output matches what DRF's JSON encoder would produce."""
+
+    def test_orjson_matches_stdlib_renderer(self):
+        fast = json.loads(ORJSONRenderer().render(PAYLOAD))
+        stdlib = json.loads(JSONRenderer().render(PAYLOAD))
+
+        assert fast == stdlib
+
+    def test_orjson_indent(self):
+        body = ORJSONRenderer().render({'a': 1}, 'application/json; indent=4')
+        assert body == b'{\n  "a": 1\n}'
+
+    def test_msgpack_round_trip(self):
+        decoded = msgpack.unpackb(MessagePackRenderer().render(PAYLOAD))
+
+        assert decoded == json.loads(JSONRenderer().render(PAYLOAD))
+
+    def test_empty_body(self):
+        assert ORJSONRenderer().render(None) == b''
+        assert MessagePackRenderer().render(None) == b''
+
+
+@pytest.mark.django_db
+class TestContentNegotiation:
+    """Renderer selection through the Accept header."""
+
+    def test_json_by_default(self, api_client, catalog):
+        response = api_client.get(reverse('product-list'))
+
+        assert response['Content-Type'] == 'application/json'
+        assert json.loads(response.content)['count'] == catalog.count()
+
+    def test_msgpack_on_request(self, api_client, catalog):
+        product = catalog.filter(category='top').first()
+        url = reverse('get-recommendations', kwargs={'product_id': product.id})
+        response = api_client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/msgpack'
+        body = msgpack.unpackb(response.content)
+        assert body['base_product']['id'] == product.id
+
+    def test_browsable_api_disabled_outside_debug(self, api_client, catalog):
+        response = api_client.get(
+            reverse('product-list'), HTTP_ACCEPT='text/html,application/xhtml+xml,*/*'
+        )
+
+        assert response['Content-Type'] == 'application/json'
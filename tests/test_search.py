@@ -0,0 +1,151 @@
+"""
+Tests for full-text product search.
+"""
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.models import Product
+from apps.products.search import fts5_query, search_tokens, tsquery
+from apps.products.synthetic import build_synthetic_catalog
+from apps.products.utils import import_products_from_workbook_rows
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+def make_product(name, sub_category='shirt', tags=None, **extra):
+    fields = {
+        'category': 'top', 'color': 'navy', 'style': 'casual', 'gender': 'male',
+        'price': 30, 'price_range': 'budget', 'tags': tags or [],
+    }
+    fields.update(extra)
+    return Product.objects.create(name=name, sub_category=sub_category, **fields)
+
+
+def search(client, term, **params):
+    response = client.get(reverse('product-list'), {'search': term, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [item['name'] for item in response.data['results']]
+
+
+class TestQueryBuilding:
+    """Tests for search term normalisation."""
+
+    def test_tokens(self):
+        assert search_tokens(['Slim-Fit', 'slim', 'Tee"']) == ['slim', 'fit', 'tee']
+
+    def test_fts5_query_quotes_tokens(self):
+        assert fts5_query(['navy', 'oxford']) == '"navy"* "oxford"*'
+
+    def test_tsquery_prefixes_tokens(self):
+        assert tsquery(['navy', 'oxford']) == 'navy:* & oxford:*'
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    """Tests for the search filter backend."""
+
+    @pytest.fixture(autouse=True)
+    def require_index(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            pytest.skip(f'No full-text index on {connection.vendor}')
+
+    def test_matches_name_sub_category_and_tags(self, api_client):
+        make_product('Oxford Button Down', tags=['cotton'])
+        make_product('Crew Tee', sub_category='oxford')
+        make_product('Field Jacket', sub_category='jacket', tags=['oxford', 'waxed'])
+        make_product('Chino Shorts', sub_category='shorts')
+
+        assert sorted(search(api_client, 'oxford')) == [
+            'Crew Tee', 'Field Jacket', 'Oxford Button Down',
+        ]
+
+    def test_every_term_must_match(self, api_client):
+        make_product('Navy Linen Shirt', tags=['linen'])
+        make_product('Navy Wool Sweater', sub_category='sweater', tags=['wool'])
+
+        assert search(api_client, 'navy linen') == ['Navy Linen Shirt']
+
+    def test_prefix_and_punctuation(self, api_client):
+        make_product('Stretch Denim Jeans', sub_category='jeans', tags=['slim-fit'])
+
+        assert search(api_client, 'stret') == ['Stretch Denim Jeans']
+        assert search(api_client, 'slim-fit') == ['Stretch Denim Jeans']
+
+    def test_relevance_order_unless_ordering_given(self, api_client):
+        make_product('Plain Tee', tags=['linen'], price=10)
+        make_product('Linen Shirt', price=50)
+
+        assert search(api_client, 'linen') == ['Linen Shirt', 'Plain Tee']
+        assert search(api_client, 'linen', ordering='price') == ['Plain Tee', 'Linen Shirt']
+
+    def test_index_follows_updates_and_deletes(self, api_client):
+        product = make_product('Harbor Jacket', sub_category='jacket')
+        product.name = 'Canyon Jacket'
+        product.save()
+
+        assert search(api_client, 'harbor') == []
+        assert search(api_client, 'canyon') == ['Canyon Jacket']
+
+        product.delete()
+        assert search(api_client, 'canyon') == []
+
+    def test_index_covers_bulk_import(self, api_client):
+        build_synthetic_catalog(30, seed=3)
+        import_products_from_workbook_rows(
+            [['Quartzite Loafer', 'footwear', 'loafers', 'tan', '', 'formal',
+              'male', '120', 'mid', 'leather', 'office', 'all', 'Q-1']],
+            ['name', 'category', 'sub_category', 'color', 'image_url', 'style',
+             'gender', 'price', 'price_range', 'tags', 'occasions', 'seasons', 'sku'],
+        )
+
+        assert search(api_client, 'quartzite') == ['Quartzite Loafer']
+        expected = Product.objects.filter(sub_category='loafers', is_active=True).count()
+        response = api_client.get(
+            reverse('product-list'), {'search': 'loafers', 'page_size': 100}
+        )
+        assert response.data['count'] == expected
+
+    def test_search_combines_with_keyset_and_facets(self, api_client):
+        for n in range(5):
+            make_product(f'Linen Shirt {n}', color='white' if n % 2 else 'navy')
+        make_product('Wool Coat', sub_category='coat')
+
+        response = api_client.get(
+            reverse('product-list'), {'search': 'linen', 'cursor': '', 'page_size': 2}
+        )
+        assert len(response.data['results']) == 2
+        assert response.data['next']
+
+        facets = api_client.get(reverse('product-filters'), {'search': 'linen'}).data
+        assert facets['total'] == 5
+        assert {f['value']: f['count'] for f in facets['facets']['color']} == {
+            'navy': 3, 'white': 2,
+        }
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason='FTS5 triggers')
+    def test_fts_triggers_exist_after_migrate(self):
+        """A migration that rebuilds ``products`` must recreate the triggers."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                [Product._meta.db_table],
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+
+        assert triggers >= {
+            'products_fts_insert', 'products_fts_delete', 'products_fts_update',
+        }
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason='FTS5 plan')
+    def test_sqlite_plan_uses_fts_index(self):
+        from apps.products.search import search_products
+
+        plan = search_products(Product.objects.all(), ['linen']).explain()
+        assert 'VIRTUAL TABLE INDEX' in plan
@@ -3,7 +3,11 @@ Tests for the recommendation services.
 """
 
 import pytest
-from apps.recommendations.services.color_service import ColorService
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+from apps.recommendations.services.color_service import KNOWN_COLORS, ColorService
+from apps.recommendations.services.constants import OUTFIT_CATEGORIES
+from apps.recommendations.services.recommendation_service import RecommendationService
 from apps.recommendations.services.scoring_service import ScoringService
 
 
@@ -102,4 +106,67 @@ class TestScoringService:
         
         assert 'rating' in explanation
         assert 'details' in explanation
-        assert isinstance(explanation['details'], list)
\ No newline at end of file
+        assert isinstance(explanation['details'], list)
+
+
+def _python_ranked(base, category, preferences, limit):
+    """The candidate ranking as it was done before it moved into SQL."""
+    queryset = RecommendationService._build_candidate_queryset(base, category, preferences)
+    ranked = []
+    for product in queryset:
+        if ColorService.are_colors_compatible(base.color, product.color):
+            data = RecommendationService._serialize_product(product)
+            data['compatibility_score'] = ColorService.get_color_harmony_score(
+                base.color, product.color
+            )
+            ranked.append(data)
+    ranked.sort(key=lambda x: (-x['compatibility_score'], x['name'], x['id']))
+    return ranked[:limit]
+
+
+class TestCompiledColorScores:
+    """The compiled color tables must agree with the pairwise rules."""
+
+    @pytest.mark.parametrize('base', sorted(KNOWN_COLORS) + ['Navy', 'teal', 'mauve'])
+    def test_matches_pairwise_rules(self, base):
+        scores, default = ColorService.compatible_color_scores(base)
+
+        for other in sorted(KNOWN_COLORS) + ['mauve', 'chartreuse']:
+            compatible = ColorService.are_colors_compatible(base, other)
+            score = scores.get(other, default)
+            assert (score is not None) == compatible
+            if compatible:
+                assert score == ColorService.get_color_harmony_score(base, other)
+
+
+@pytest.mark.django_db
+class TestCandidateQuery:
+    """Candidates ranked in SQL match the old Python-side ranking."""
+
+    @pytest.fixture
+    def catalog(self):
+        build_synthetic_catalog(300, seed=5)
+        for index, product in enumerate(Product.objects.order_by('id')[:40]):
+            product.color = ['Navy', 'mauve', 'WHITE', 'teal'][index % 4]
+            product.save()
+
+    @pytest.mark.parametrize('preferences', [{}, {'occasion': 'office'}, {'season': 'summer'}])
+    def test_parity_with_python_ranking(self, catalog, preferences):
+        for base in Product.objects.order_by('id')[::7]:
+            for category in OUTFIT_CATEGORIES:
+                if category == base.category:
+                    continue
+                expected = _python_ranked(
+                    base, category, preferences, RecommendationService.CANDIDATE_POOL_SIZE
+                )
+                pools = RecommendationService._candidate_pools([base], [category], preferences)
+                assert pools[(base.id, category)] == expected
+
+    def test_fetches_only_the_top_candidates(self, catalog, django_assert_num_queries):
+        base = Product.objects.filter(color='red').first()
+        with django_assert_num_queries(1) as captured:
+            RecommendationService._candidate_pools([base], ['bottom'], {})
+
+        sql = captured.captured_queries[0]['sql']
+        assert 'LIMIT 32' in sql
+        assert 'CASE' in sql
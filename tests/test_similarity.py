@@ -0,0 +1,223 @@
+"""
+Tests for the similar-items index and endpoint.
+"""
+
+import numpy as np
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.products.catalog import bump_catalog_version
+from apps.products.changes import record_changes
+from apps.products.models import Product, ProductOccasion
+from apps.products.similarity import (
+    DIMENSIONS,
+    ENCODED_FIELDS,
+    SimilarityIndex,
+    encode_products,
+    get_similarity_index,
+    reset_similarity_index,
+)
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    reset_similarity_index()
+    yield
+    reset_similarity_index()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(200, seed=17)
+    return Product.objects.filter(is_active=True)
+
+
+def _rows(queryset):
+    return list(queryset.order_by('id').values_list(*ENCODED_FIELDS))
+
+
+def _url(product_id):
+    return reverse('product-similar', kwargs={'pk': product_id})
+
+
+ROW = (1, 'top', 'casual', 'male', 'mid', 'navy', 't-shirt', ['cotton', 'slim'], 3, 1)
+
+
+class TestEncoding:
+    """Feature vectors."""
+
+    def test_rows_are_unit_vectors(self):
+        other = (2, 'footwear', 'formal', 'female', 'luxury', 'Mauve', 'heels', 'party', 0, 0)
+        matrix = encode_products([ROW, other])
+
+        assert matrix.shape == (2, DIMENSIONS)
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+    def test_similar_products_score_higher(self):
+        near = (2,) + ROW[1:7] + (['cotton'],) + ROW[8:]
+        far = (3, 'footwear', 'formal', 'female', 'luxury', 'red', 'heels', [], 4, 2)
+        matrix = encode_products([ROW, near, far])
+        scores = matrix @ matrix[0]
+
+        assert scores[1] > 0.9
+        assert scores[2] < scores[1]
+
+    def test_encoding_is_deterministic(self):
+        assert np.array_equal(encode_products([ROW]), encode_products([ROW]))
+
+
+@pytest.mark.django_db
+class TestSimilarityIndex:
+    """Brute-force and IVF search."""
+
+    def test_brute_force_matches_exhaustive_cosine(self, catalog):
+        rows = _rows(catalog)
+        index = SimilarityIndex()
+        index.upsert(rows)
+        matrix = encode_products(rows)
+        ids = [row[0] for row in rows]
+        categories = [row[1] for row in rows]
+
+        query = 5
+        results = index.search(ids[query], limit=5)
+
+        scores = matrix @ matrix[query]
+        expected = sorted(
+            (
+                (-round(float(scores[i]), 5), ids[i])
+                for i in range(len(ids))
+                if i != query and categories[i] == categories[query]
+            )
+        )[:5]
+        assert not index.uses_ivf
+        assert [pk for pk, _ in results] == [pk for _, pk in expected]
+        assert all(a[1] >= b[1] for a, b in zip(results, results[1:]))
+
+    def test_ivf_agrees_with_brute_force(self, catalog):
+        rows = _rows(catalog)
+        brute = SimilarityIndex()
+        ivf = SimilarityIndex(ivf_threshold=0, nprobe=4)
+        brute.upsert(rows)
+        ivf.upsert(rows)
+
+        assert ivf.uses_ivf
+        for product_id in [row[0] for row in rows[::20]]:
+            expected = brute.search(product_id, 10)
+            found = ivf.search(product_id, 10)
+            assert len(found) == len(expected)
+            assert found[-1][1] == pytest.approx(expected[-1][1], abs=0.05)
+
+    def test_same_category_filter(self, catalog):
+        index = SimilarityIndex()
+        index.upsert(_rows(catalog))
+        product = catalog.filter(category='top').first()
+
+        same = index.search(product.id, 20)
+        mixed = index.search(product.id, 200, same_category=False)
+
+        def categories(results):
+            ids = [pk for pk, _ in results]
+            return set(catalog.filter(id__in=ids).values_list('category', flat=True))
+
+        assert categories(same) == {'top'}
+        assert len(categories(mixed)) > 1
+
+    def test_upsert_and_remove(self, catalog):
+        rows = _rows(catalog)
+        index = SimilarityIndex(ivf_threshold=0, nprobe=2)
+        index.upsert(rows)
+        clone = (10 ** 6,) + rows[0][1:]
+        index.upsert([clone])
+
+        assert index.search(rows[0][0], 1)[0] == (10 ** 6, pytest.approx(1.0))
+
+        index.remove([10 ** 6])
+        assert index.search(10 ** 6, 1) is None
+        assert all(pk != 10 ** 6 for pk, _ in index.search(rows[0][0], 50))
+        assert len(index) == len(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCatalogSync:
+    """The process-wide index follows catalog writes incrementally."""
+
+    def test_picks_up_changes(self, catalog, django_capture_on_commit_callbacks):
+        index = get_similarity_index()
+        assert len(index) == catalog.count()
+        base = catalog.first()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            twin = Product.objects.get(pk=base.pk)
+            twin.pk = None
+            twin.sku = 'twin'
+            twin.save()
+        assert get_similarity_index().search(base.id, 1)[0][0] == twin.id
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ProductOccasion.objects.create(product=twin, occasion='wedding')
+        row = index.positions[twin.id]
+        expected = encode_products(_rows(Product.objects.filter(pk=twin.pk)))[0]
+        get_similarity_index()
+        assert np.allclose(index.vectors[row], expected)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Product.objects.filter(pk=twin.pk).update(is_active=False)
+            Product.objects.get(pk=base.pk).save()
+        assert twin.id not in get_similarity_index().positions
+
+        with django_capture_on_commit_callbacks(execute=True):
+            base.delete()
+        assert get_similarity_index().search(base.id, 1) is None
+        assert len(get_similarity_index()) == catalog.count()
+
+    def test_follows_the_change_log_not_updated_at(self, catalog):
+        """A write stamped before the last sync (a late commit) is still applied."""
+        index = get_similarity_index()
+        product, other = catalog.order_by('id')[:2]
+        stamped = Product.objects.order_by('updated_at').first().updated_at
+
+        Product.objects.filter(pk=product.pk).update(
+            category=other.category, style=other.style, gender=other.gender,
+            price_range=other.price_range, color=other.color,
+            sub_category=other.sub_category, tags=other.tags,
+            occasion_mask=other.occasion_mask, season_mask=other.season_mask,
+            updated_at=stamped,
+        )
+        record_changes([product.pk])
+        bump_catalog_version()
+
+        assert get_similarity_index() is index
+        assert index.search(other.id, 1)[0] == (product.id, pytest.approx(1.0))
+
+
+@pytest.mark.django_db
+class TestSimilarEndpoint:
+    """GET /api/products/<id>/similar/."""
+
+    def test_returns_ranked_products(self, api_client, catalog):
+        product = catalog.filter(category='bottom').first()
+        response = api_client.get(_url(product.id), {'limit': 5})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert data['count'] == 5
+        assert product.id not in [item['id'] for item in data['products']]
+        assert {item['category'] for item in data['products']} == {'bottom'}
+        similarities = [item['similarity'] for item in data['products']]
+        assert similarities == sorted(similarities, reverse=True)
+
+    def test_unknown_product_is_404(self, api_client, catalog):
+        assert api_client.get(_url(0)).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_invalid_limit_is_400(self, api_client, catalog):
+        response = api_client.get(_url(catalog.first().id), {'limit': 'many'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,173 @@
+"""
+Tests for the slow-request log.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core import slowlog
+from apps.products.models import Product
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture(autouse=True)
+def fresh_log(settings):
+    settings.SLOW_REQUEST_LOG = True
+    settings.SLOW_REQUEST_SAMPLE_RATE = 0
+    settings.SLOW_REQUEST_DB = ''
+    slowlog.reset_slow_log()
+    yield
+    slowlog.reset_slow_log()
+
+
+@pytest.fixture
+def product(db):
+    build_synthetic_catalog(60, seed=49)
+    return Product.objects.filter(category='top').first()
+
+
+@pytest.fixture
+def staff_client(db, django_user_model):
+    client = APIClient()
+    client.force_authenticate(
+        django_user_model.objects.create_user('ops', password='x', is_staff=True)
+    )
+    return client
+
+
+def _recommend(product, **params):
+    url = reverse('get-recommendations', kwargs={'product_id': product.id})
+    return APIClient().get(url, params)
+
+
+@pytest.mark.django_db
+class TestTracing:
+    """What gets kept and what a trace holds."""
+
+    def test_fast_requests_are_dropped(self, product, settings):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 60_000
+
+        _recommend(product)
+
+        assert slowlog.slow_requests() == []
+
+    def test_sampled_requests_are_kept(self, product, settings):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 60_000
+        settings.SLOW_REQUEST_SAMPLE_RATE = 1
+
+        _recommend(product)
+
+        assert [entry['reason'] for entry in slowlog.slow_requests()] == ['sample']
+
+    def test_slow_trace_has_stages_sql_and_annotations(self, product, settings):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+
+        _recommend(product, occasion='office')
+
+        [summary] = slowlog.slow_requests()
+        trace = slowlog.get_slow_request(summary['id'])
+        assert trace['reason'] == 'slow'
+        assert trace['path'].endswith(f'/{product.id}/')
+        assert trace['query_string'] == 'occasion=office'
+        assert trace['sql_count'] == len(trace['statements']) > 0
+        assert 'stages' not in summary
+
+        annotations = trace['annotations']
+        assert annotations['product_id'] == product.id
+        assert annotations['cache'] == 'miss'
+        assert set(annotations['candidate_pools']) == {'bottom', 'footwear', 'accessory'}
+        assert annotations['combinations_scored'] > 0
+
+        stages = {stage['name']: stage for stage in trace['stages']}
+        assert {'cache_get', 'base_product', 'candidates:bottom', 'score'} <= set(stages)
+        assert stages['candidates:bottom']['queries'] >= 1
+
+    def test_cache_hit_is_annotated(self, product, settings):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+
+        _recommend(product)
+        _recommend(product)
+
+        outcomes = sorted(entry['annotations']['cache'] for entry in slowlog.slow_requests())
+        assert outcomes == ['hit', 'miss']
+
+    def test_untraced_paths_and_disabled_log(self, product, settings, client):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        client.get('/api/health/')
+        settings.SLOW_REQUEST_LOG = False
+        _recommend(product)
+
+        assert slowlog.slow_requests() == []
+
+    def test_ring_buffer_is_bounded(self, product, settings):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        settings.SLOW_REQUEST_BUFFER_SIZE = 3
+
+        for _ in range(5):
+            _recommend(product)
+
+        assert len(slowlog.slow_requests()) == 3
+
+
+@pytest.mark.django_db
+class TestPersistence:
+    """The shared SQLite file."""
+
+    def test_traces_survive_the_process_buffer(self, product, settings, tmp_path):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        settings.SLOW_REQUEST_DB = str(tmp_path / 'slow.sqlite3')
+        settings.SLOW_REQUEST_DB_MAX_ROWS = 2
+
+        for occasion in ('office', 'party', 'wedding'):
+            _recommend(product, occasion=occasion)
+        slowlog.reset_slow_log()
+
+        kept = slowlog.slow_requests()
+        assert sorted(entry['query_string'] for entry in kept) == [
+            'occasion=party',
+            'occasion=wedding',
+        ]
+        assert slowlog.get_slow_request(kept[0]['id'])['stages']
+        assert len(slowlog.slow_requests(path='/recommendations/')) == 2
+        assert slowlog.slow_requests(path='/products/') == []
+
+
+@pytest.mark.django_db
+class TestEndpoints:
+    """Staff endpoint and admin page."""
+
+    def test_list_and_detail(self, product, settings, staff_client):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        _recommend(product, occasion='wedding')
+
+        response = staff_client.get(reverse('slow-requests'), {'reason': 'slow'})
+        assert response.status_code == status.HTTP_200_OK
+        [entry] = response.data['requests']
+
+        detail = staff_client.get(reverse('slow-request-detail', kwargs={'trace_id': entry['id']}))
+        assert detail.status_code == status.HTTP_200_OK
+        assert detail.data['request']['statements']
+
+        missing = staff_client.get(reverse('slow-request-detail', kwargs={'trace_id': 'nope'}))
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_staff_only(self):
+        assert APIClient().get(reverse('slow-requests')).status_code in (
+            status.HTTP_401_UNAUTHORIZED,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_admin_page(self, product, settings, admin_client):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        _recommend(product, occasion='wedding')
+        trace_id = slowlog.slow_requests()[0]['id']
+
+        listing = admin_client.get(reverse('admin-slow-requests'))
+        detail = admin_client.get(reverse('admin-slow-requests'), {'id': trace_id})
+
+        assert listing.status_code == 200
+        assert b'occasion=wedding' in listing.content
+        assert detail.status_code == 200
+        assert b'candidates:bottom' in detail.content
@@ -0,0 +1,237 @@
+"""
+Tests for the memory-mapped catalog snapshot.
+"""
+
+import io
+import mmap
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from apps.products import similarity
+from apps.products.catalog import get_catalog_version
+from apps.products.models import Product
+from apps.products.similarity import (
+    ENCODED_FIELDS,
+    CatalogSimilarityIndex,
+    get_similarity_index,
+    reset_similarity_index,
+)
+from apps.products.snapshot import (
+    KEEP_PREVIOUS,
+    CatalogSnapshot,
+    SnapshotError,
+    SnapshotWatcher,
+    current_snapshot_path,
+    write_snapshot,
+)
+from apps.products.synthetic import build_synthetic_catalog
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    reset_similarity_index()
+    yield
+    reset_similarity_index()
+
+
+@pytest.fixture
+def catalog(db):
+    build_synthetic_catalog(200, seed=44)
+    return Product.objects.filter(is_active=True)
+
+
+@pytest.fixture
+def snapshot_dir(settings, tmp_path):
+    settings.CATALOG_SNAPSHOT_DIR = str(tmp_path)
+    settings.CATALOG_SNAPSHOT_CHECK_INTERVAL = 0
+    return tmp_path
+
+
+def _built_index(ivf_threshold=similarity.IVF_THRESHOLD):
+    index = CatalogSimilarityIndex(ivf_threshold=ivf_threshold)
+    index.sync(get_catalog_version())
+    return index
+
+
+def _buffer(array):
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return getattr(base, 'obj', base)
+
+
+def _wait_for_publisher():
+    if similarity._publisher is not None:
+        similarity._publisher.join(10)
+
+
+class TestSnapshotFile:
+    """File format, pointer and pruning."""
+
+    def test_round_trip_maps_arrays_read_only(self, tmp_path):
+        vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+        ids = np.array([3, 5, 8, 13], np.int64)
+        path = write_snapshot(
+            tmp_path, 7, None, {'ids': ids, 'vectors': vectors, 'empty': np.zeros(0, np.int8)},
+            strings={'category': ['top']}, meta={'encoder': 1},
+        )
+        snapshot = CatalogSnapshot(path)
+
+        assert snapshot.version == 7
+        assert snapshot.strings == {'category': ['top']}
+        assert snapshot.meta == {'encoder': 1}
+        assert np.array_equal(snapshot['ids'], ids)
+        assert np.array_equal(snapshot['vectors'], vectors)
+        assert snapshot['empty'].shape == (0,)
+        assert not snapshot['vectors'].flags.writeable
+        assert isinstance(_buffer(snapshot['vectors']), mmap.mmap)
+        assert current_snapshot_path(tmp_path) == path
+
+    @pytest.mark.parametrize('content', [b'', b'not a snapshot', b'CATSNAP1\x05\x00\x00\x00{"fo'])
+    def test_bad_files_are_rejected(self, tmp_path, content):
+        path = tmp_path / 'bad.snap'
+        path.write_bytes(content)
+
+        with pytest.raises(SnapshotError):
+            CatalogSnapshot(path)
+
+    def test_truncated_file_is_rejected(self, tmp_path):
+        path = write_snapshot(tmp_path, 1, None, {'ids': np.arange(1000)})
+        path.write_bytes(path.read_bytes()[:-100])
+
+        with pytest.raises(SnapshotError):
+            CatalogSnapshot(path)
+
+    def test_old_snapshots_are_pruned(self, tmp_path):
+        paths = [write_snapshot(tmp_path, v, None, {'ids': np.arange(v)}) for v in range(1, 6)]
+
+        remaining = sorted(tmp_path.glob('catalog-*.snap'))
+        assert len(remaining) == KEEP_PREVIOUS + 1
+        assert paths[-1] in remaining
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_watcher_sees_each_new_pointer_once(self, tmp_path):
+        watcher = SnapshotWatcher(tmp_path, interval=0)
+        assert not watcher.changed()
+
+        write_snapshot(tmp_path, 1, None, {'ids': np.arange(3)})
+        assert watcher.changed()
+        assert not watcher.changed()
+        assert watcher.load().version == 1
+
+        write_snapshot(tmp_path, 2, None, {'ids': np.arange(3)})
+        assert watcher.changed()
+        assert watcher.load().version == 2
+
+
+@pytest.mark.django_db
+class TestSnapshotIndex:
+    """Similarity index served from a snapshot."""
+
+    @pytest.mark.parametrize('ivf_threshold', [similarity.IVF_THRESHOLD, 50])
+    def test_search_matches_private_index(self, catalog, tmp_path, ivf_threshold):
+        index = _built_index(ivf_threshold)
+        mapped = CatalogSimilarityIndex.from_snapshot(
+            CatalogSnapshot(index.publish(tmp_path)), ivf_threshold=ivf_threshold
+        )
+
+        assert mapped.uses_ivf == index.uses_ivf
+        assert len(mapped) == len(index)
+        for product_id in catalog.order_by('id').values_list('id', flat=True)[:20]:
+            assert mapped.search(product_id, 5) == index.search(product_id, 5)
+        assert mapped.search(0) is None
+
+    def test_updates_copy_instead_of_writing_the_mapping(self, catalog, tmp_path):
+        snapshot = CatalogSnapshot(_built_index().publish(tmp_path))
+        mapped = CatalogSimilarityIndex.from_snapshot(snapshot)
+        product = catalog.order_by('id').first()
+        original = snapshot['vectors'].copy()
+
+        row = list(Product.objects.filter(id=product.id).values_list(*ENCODED_FIELDS)[0])
+        row[1:3] = ['footwear', 'formal']
+        mapped.upsert([tuple(row)])
+        mapped.remove([catalog.order_by('id').last().id])
+
+        assert mapped.snapshot is None
+        assert np.array_equal(snapshot['vectors'], original)
+        assert len(mapped) == len(snapshot['ids']) - 1
+
+    def test_snapshot_from_another_encoder_is_ignored(self, catalog, tmp_path, monkeypatch):
+        path = _built_index().publish(tmp_path)
+        monkeypatch.setattr(similarity, 'ENCODER_FINGERPRINT', -1)
+
+        assert CatalogSimilarityIndex.from_snapshot(CatalogSnapshot(path)) is None
+
+    def test_publish_skips_current_version(self, catalog, tmp_path):
+        index = _built_index()
+
+        assert index.publish(tmp_path) is not None
+        assert index.publish(tmp_path) is None
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSharedIndex:
+    """Workers sharing the snapshot through get_similarity_index."""
+
+    def test_first_worker_publishes_and_others_map_it(
+        self, catalog, snapshot_dir, django_assert_num_queries
+    ):
+        first = get_similarity_index()
+        _wait_for_publisher()
+        assert first.snapshot is None
+        assert current_snapshot_path(snapshot_dir) is not None
+
+        reset_similarity_index()
+        with django_assert_num_queries(0):
+            worker = get_similarity_index()
+
+        assert worker.snapshot is not None
+        product_id = catalog.order_by('id').first().id
+        assert worker.search(product_id, 5) == first.search(product_id, 5)
+
+    def test_worker_swaps_to_published_snapshot(self, catalog, snapshot_dir):
+        index = get_similarity_index()
+        _wait_for_publisher()
+
+        # The worker that published picks its own snapshot up on the next call.
+        swapped = get_similarity_index()
+        assert swapped is not index
+        assert swapped.snapshot is not None
+
+    def test_catalog_change_is_applied_then_republished(self, catalog, snapshot_dir):
+        call_command('build_catalog_snapshot', stdout=io.StringIO())
+        mapped = get_similarity_index()
+        assert mapped.snapshot is not None
+
+        product = catalog.order_by('id').first()
+        product.is_active = False
+        product.save()
+
+        updated = get_similarity_index()
+        _wait_for_publisher()
+        assert updated.search(product.id) is None
+        assert CatalogSnapshot(current_snapshot_path(snapshot_dir)).version == updated.version
+
+        reset_similarity_index()
+        assert get_similarity_index().search(product.id) is None
+
+
+@pytest.mark.django_db
+class TestBuildCommand:
+    """manage.py build_catalog_snapshot."""
+
+    def test_requires_a_directory(self, settings):
+        from django.core.management.base import CommandError
+
+        settings.CATALOG_SNAPSHOT_DIR = ''
+        with pytest.raises(CommandError):
+            call_command('build_catalog_snapshot')
+
+    def test_writes_snapshot(self, catalog, tmp_path, capsys):
+        call_command('build_catalog_snapshot', '--dir', str(tmp_path))
+
+        snapshot = CatalogSnapshot(current_snapshot_path(tmp_path))
+        assert len(snapshot['ids']) == catalog.count()
+        assert 'Wrote' in capsys.readouterr().out
@@ -0,0 +1,77 @@
+"""
+Tests for worker start-up cost.
+"""
+
+import io
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.core.startup import by_package, parse_importtime, profile_startup
+
+# The child process must not need Redis or touch the development database.
+PROBE_ENV = {'DATABASE_URL': 'sqlite:///:memory:'}
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils
+import time:      2000 |       2120 | django
+import time:       500 |        500 |     yaml.reader
+import time:       300 |        800 |   yaml
+"""
+
+
+class TestImportTimeParsing:
+    """-X importtime output."""
+
+    def test_rows(self):
+        rows = parse_importtime(IMPORTTIME)
+
+        assert [row['module'] for row in rows] == ['django.utils', 'django', 'yaml.reader', 'yaml']
+        assert rows[1] == {'module': 'django', 'self_ms': 2.0, 'cumulative_ms': 2.12, 'depth': 0}
+        assert rows[2]['depth'] == 2
+
+    def test_package_totals(self):
+        assert by_package(parse_importtime(IMPORTTIME)) == {'django': 2.12, 'yaml': 0.8}
+
+
+class TestColdBoot:
+    """Booting the WSGI app in a fresh interpreter."""
+
+    def test_boot_within_budget(self, settings):
+        report = profile_startup(path=None, importtime=False, env=PROBE_ENV)
+
+        assert report['boot_ms'] <= settings.STARTUP_BUDGET_MS, (
+            f"Cold boot took {report['boot_ms']:.0f} ms, budget is "
+            f"{settings.STARTUP_BUDGET_MS:.0f} ms; run manage.py profile_startup"
+        )
+
+    def test_optional_dependencies_stay_unloaded(self):
+        # Any request loads the URLconf and with it every view module.
+        report = profile_startup(path='/api/health/', importtime=False, env=PROBE_ENV)
+
+        assert report['lazy_modules_loaded'] == []
+
+    def test_command_reports_imports(self, monkeypatch):
+        monkeypatch.setenv('DATABASE_URL', PROBE_ENV['DATABASE_URL'])
+        out = io.StringIO()
+        call_command('profile_startup', '--path', '', '--top', '3', stdout=out)
+
+        output = out.getvalue()
+        assert 'Boot:' in output
+        assert 'django' in output
+
+    def test_command_fails_over_budget(self, monkeypatch):
+        monkeypatch.setenv('DATABASE_URL', PROBE_ENV['DATABASE_URL'])
+
+        with pytest.raises(CommandError, match='budget'):
+            call_command('profile_startup', '--path', '', '--budget', '1', stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+def test_api_docs_render(client):
+    """Swagger UI needs drf_spectacular's templates, i.e. the installed app."""
+    response = client.get('/api/docs/')
+
+    assert response.status_code == 200
@@ -0,0 +1,125 @@
+"""
+Tests for the system stats endpoint.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core import stats
+from apps.core.stats import (
+    collect_redis_telemetry,
+    compute_catalog_stats,
+    get_cache_telemetry,
+)
+from apps.products.models import Product, occasion_mask, season_mask
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def products(db):
+    def make(name, category, occasions, seasons, is_active=True):
+        return Product.objects.create(
+            name=name, category=category, sub_category='x', color='black',
+            style='casual', gender='unisex', price=10, price_range='budget',
+            occasion_mask=occasion_mask(occasions), season_mask=season_mask(seasons),
+            is_active=is_active,
+        )
+
+    return [
+        make('Tee', 'top', ['casual', 'beach'], ['summer']),
+        make('Shirt', 'top', ['office'], ['all']),
+        make('Jeans', 'bottom', ['casual'], ['all']),
+        make('Old Boots', 'footwear', ['casual'], ['winter'], is_active=False),
+    ]
+
+
+@pytest.mark.django_db
+class TestCatalogStats:
+    """Tests for the grouped catalog aggregate."""
+
+    def test_single_query_aggregate(self, products, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            stats = compute_catalog_stats()
+
+        assert stats['total'] == 4
+        assert stats['active'] == 3
+        assert stats['by_category'] == {
+            'tops': 2, 'bottoms': 1, 'footwear': 1, 'accessories': 0,
+        }
+        assert stats['active_by_category']['footwear'] == 0
+        assert stats['occasions']['casual'] == 2
+        assert stats['occasions']['office'] == 1
+        assert stats['seasons'] == {
+            'summer': 1, 'winter': 0, 'spring': 0, 'fall': 0, 'all': 2,
+        }
+
+    def test_endpoint_is_cached(self, api_client, products, django_assert_num_queries):
+        url = reverse('system-stats')
+        first = api_client.get(url)
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert first.data['products'] == second.data['products']
+        assert first.data['products']['by_category']['tops'] == 2
+        assert second.data['cache']['status'] == 'connected'
+
+
+class StubRedis:
+    """Just enough of a redis-py client for the telemetry collector."""
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def info(self):
+        return {
+            'redis_version': '7.2.0', 'used_memory': 2048, 'used_memory_human': '2K',
+            'maxmemory': 0, 'evicted_keys': 3, 'expired_keys': 1,
+            'keyspace_hits': 30, 'keyspace_misses': 10,
+        }
+
+    def dbsize(self):
+        return len(self.keys)
+
+    def scan_iter(self, match=None, count=None):
+        prefix = match.strip('*')
+        return (key for key in self.keys if prefix in key)
+
+    def memory_usage(self, key):
+        return 100
+
+
+class TestRedisTelemetry:
+    """Tests for the Redis telemetry collector."""
+
+    def test_reports_info_and_recommendation_keys(self):
+        keys = [f':1:outfit_rec_{n}' for n in range(5)] + [':1:catalog_version']
+        telemetry = collect_redis_telemetry(StubRedis(keys))
+
+        assert telemetry['backend'] == 'Redis'
+        assert telemetry['evicted_keys'] == 3
+        assert telemetry['hit_ratio'] == 0.75
+        assert telemetry['total_keys'] == 6
+        assert telemetry['recommendation_keys'] == {
+            'count': 5, 'count_is_exact': True, 'sampled': 5,
+            'avg_bytes': 100, 'estimated_bytes': 500,
+        }
+
+    def test_scan_is_capped(self, monkeypatch):
+        monkeypatch.setattr(stats, 'SCAN_LIMIT', 3)
+        keys = [f'outfit_rec_{n}' for n in range(10)]
+        telemetry = collect_redis_telemetry(StubRedis(keys))
+
+        assert telemetry['recommendation_keys']['count'] == 3
+        assert telemetry['recommendation_keys']['count_is_exact'] is False
+
+    def test_non_redis_cache(self):
+        telemetry = get_cache_telemetry()
+
+        assert telemetry['backend'] == 'LocMemCache'
+        assert telemetry['status'] == 'connected'
+        assert get_cache_telemetry() == telemetry